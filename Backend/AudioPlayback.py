@@ -0,0 +1,193 @@
+#It implements a long-lived audio playback service: the mixer is opened once, clips are played straight from memory in submission order, and playback is cut off through events, so speech can be interrupted immediately (barge-in).
+
+import io
+import wave
+import queue
+import threading
+
+
+def AudioFormat(Audio: bytes) -> str:
+    """'wav' for RIFF/WAVE data, otherwise the MP3 that edge_tts produces"""
+    return "wav" if Audio[:4] == b"RIFF" else "mp3"
+
+
+class PygameBackend:
+    """pygame.mixer.music, initialized once for the life of the process.
+
+    The end of a clip is the mixer's end event (``music.set_endevent``);
+    ``wake()`` posts a second event type so a waiting ``wait()`` returns
+    without the clip having ended. Both arrive on pygame's event queue, which
+    is initialized (without opening a window) by the thread that plays.
+    """
+
+    def __init__(self):
+        self.pygame = None
+
+    def open(self):
+        import pygame
+        pygame.display.init()  #The event queue lives in the video subsystem; no window is created
+        pygame.mixer.init()
+        self.ended = pygame.event.custom_type()
+        self.woken = pygame.event.custom_type()
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([self.ended, self.woken])
+        pygame.mixer.music.set_endevent(self.ended)
+        self.pygame = pygame
+
+    def start(self, audio: bytes, format: str):
+        self.pygame.event.clear([self.ended, self.woken])  #Drop the end of a clip that was stopped
+        self.pygame.mixer.music.load(io.BytesIO(audio), format)
+        self.pygame.mixer.music.play()
+
+    def wait(self) -> bool:
+        """Block until the clip ends (True) or ``wake()`` is called (False)"""
+        return self.pygame.event.wait().type == self.ended
+
+    def wake(self):
+        if self.pygame is not None:
+            self.pygame.event.post(self.pygame.event.Event(self.woken))
+
+    def stop(self):
+        self.pygame.mixer.music.stop()
+        self.pygame.mixer.music.unload()
+
+    def close(self):
+        self.pygame.mixer.quit()
+        self.pygame.display.quit()
+
+
+class ClockBackend:
+    """Offline stand-in: 'plays' WAV clips by waiting for their duration"""
+
+    def __init__(self):
+        self.played = []
+        self._events = queue.Queue()  #Number of the clip that ended, or None from wake()
+        self._clip = 0
+        self._timer = None
+
+    def open(self):
+        pass
+
+    def start(self, audio: bytes, format: str):
+        duration = 0.0
+        if format == "wav":
+            with wave.open(io.BytesIO(audio), "rb") as clip:
+                duration = clip.getnframes() / clip.getframerate()
+        self.played.append(audio)
+        self._clip += 1
+        self._timer = threading.Timer(duration, self._events.put, (self._clip,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def wait(self) -> bool:
+        return self._events.get() == self._clip
+
+    def wake(self):
+        self._events.put(None)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def close(self):
+        self.stop()
+
+
+class Clip:
+    def __init__(self, audio: bytes, format: str, stop: threading.Event):
+        self.audio = audio
+        self.format = format
+        self.stop = stop
+        self.done = threading.Event()
+        self.interrupted = False
+
+
+class PlaybackEngine:
+    """Plays submitted clips one after another on a single thread that owns the mixer.
+
+    A clip ends early when its ``stop`` event is set (a SpeechPipeline passes
+    its own and calls ``cancel()``), or when ``interrupt()`` cuts off
+    everything that is playing or queued. The playback thread sleeps on the
+    backend until the clip ends or one of those wakes it; nothing is polled.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or PygameBackend()
+
+        self.clips_played = 0
+        self.interruptions = 0
+
+        self._queue = queue.Queue()
+        self._live = set()  #Queued and playing clips, so interrupt() can reach them
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def submit(self, audio: bytes, stop: threading.Event = None, format: str = None) -> Clip:
+        """Queue a clip and return it; ``clip.done`` is set once it has played or was cut off"""
+        clip = Clip(audio, format or AudioFormat(audio), stop or threading.Event())
+        with self._lock:
+            self._live.add(clip)
+        self._ensure_started()
+        self._queue.put(clip)
+        return clip
+
+    def play(self, audio: bytes, stop: threading.Event = None):
+        """Play a clip and block until it has finished (the SpeechPipeline player interface)"""
+        self.submit(audio, stop).done.wait()
+
+    def interrupt(self):
+        """Barge-in: stop the current clip and drop every queued one"""
+        with self._lock:
+            clips = list(self._live)
+        if clips:
+            self.interruptions += 1
+        for clip in clips:
+            clip.interrupted = True
+            clip.stop.set()
+        self.backend.wake()
+
+    def cancel(self, stop: threading.Event):
+        """Cut off the clips submitted with ``stop``, which the caller has just set"""
+        with self._lock:
+            clips = [clip for clip in self._live if clip.stop is stop]
+        if clips:
+            self.backend.wake()
+
+    def _finish(self, clip: Clip):
+        with self._lock:
+            self._live.discard(clip)
+        clip.done.set()
+
+    def _run(self):
+        self.backend.open()
+        while True:
+            clip = self._queue.get()
+            if clip is None:
+                break
+            if clip.stop.is_set() or not clip.audio:
+                self._finish(clip)
+                continue
+            try:
+                self.backend.start(clip.audio, clip.format)
+                #stop is set before wake() posts, so a wake dropped by start() is still seen here
+                while not clip.stop.is_set():
+                    if self.backend.wait():
+                        break
+                else:
+                    self.backend.stop()
+                self.clips_played += 1
+            except Exception as e:
+                print(f"Error playing audio: {e}")
+            finally:
+                self._finish(clip)
+        self.backend.close()
+
+    def close(self):
+        self.interrupt()
+        self._queue.put(None)
@@ -6,7 +6,6 @@ from pywhatkit import search, playonyt   #Import functions for Google searches a
 from dotenv import dotenv_values
 from bs4 import BeautifulSoup   #For parsing HTML content
 from rich import print   #For styled console output
-from groq import Groq
 import webbrowser   #For opening URLs
 import subprocess   #For interacting with system
 import os   #For interacting with system
@@ -18,6 +17,9 @@ from datetime import datetime
 import os
 import webbrowser
 from Backend.SystemControl import set_volume, mute_mic, adjust_brightness
+from Backend.Reminders import ParseReminderTask
+from Backend.Resilience import ResilientCall
+from Backend.Providers import GetGroqClient
 
 
 env_vars = dotenv_values(".env")
@@ -29,8 +31,8 @@ classes = ["zCubwf","hgKElc","LTKOO sY7ric","Z0LcW","gsrt vk_bk FzvWSb YwPhnf","
 #Define a user-agent for making web requests
 useragent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.75 Safari/537.36"
 
-#Initialize the Groq client
-client = Groq(api_key=GroqAPIKey)
+#Shared Groq client (retries are handled by ResilientCall)
+client = GetGroqClient()
 
 #Predefined professional responses for user interactions 
 professional_responses = [
@@ -63,22 +65,27 @@ def Content(Topic):
         print(f"⏳ Generating content for: {Topic}")
 
         # Call the Groq LLM API with updated model
-        completion = client.chat.completions.create(
-            model="llama3-70b-8192",  # ✅ Updated from deprecated mixtral
-            messages=[
-                {"role": "system", "content": "You're a professional content creator. Create informative, creative, and well-structured content."},
-                {"role": "user", "content": f"Write content on the topic: {Topic}"}
-            ],
-            temperature=0.8,
-            stream=True
-        )
-
-        # Collect the streamed content
-        ContentByAI = ""
-        for chunk in completion:
-            if chunk.choices[0].delta.content:
-                ContentByAI += chunk.choices[0].delta.content
-                print(chunk.choices[0].delta.content, end="")
+        def Generate():
+            completion = client.chat.completions.create(
+                model="llama3-70b-8192",  # ✅ Updated from deprecated mixtral
+                messages=[
+                    {"role": "system", "content": "You're a professional content creator. Create informative, creative, and well-structured content."},
+                    {"role": "user", "content": f"Write content on the topic: {Topic}"}
+                ],
+                temperature=0.8,
+                stream=True
+            )
+
+            # Collect the streamed content
+            ContentByAI = ""
+            for chunk in completion:
+                if chunk.choices[0].delta.content:
+                    ContentByAI += chunk.choices[0].delta.content
+                    print(chunk.choices[0].delta.content, end="")
+            return ContentByAI
+
+        # Capped retries with backoff instead of failing on the first provider error
+        ContentByAI = ResilientCall("groq", Generate)
 
         # Ensure filename is safe
         safe_filename = Topic.lower().replace(' ', '_').replace('/', '_')
@@ -251,6 +258,9 @@ async def TranslateAndExecute(commands: list[str]):
         elif "mute mic" in cmd or "unmute mic" in cmd:
             funcs.append(asyncio.to_thread(mute_mic))
 
+        elif command.startswith("reminder "):
+            funcs.append(asyncio.to_thread(SetReminder, command))
+
         
         else:
             print(f"No Function Found. For {command}")
@@ -276,6 +286,15 @@ async def Automation(commands: list[str]):
 
     return True
 
+#Function to turn a "reminder <time> [<date>] <message>" task into a calendar event
+def SetReminder(command: str) -> bool:
+    reminder = ParseReminderTask(command)
+    if reminder is None:
+        print(f"Could not read a time from: {command}")
+        return False
+    when, message = reminder
+    return create_reminder(when.strftime("%Y-%m-%d %H:%M"), message)
+
 def create_reminder(datetime_str: str, message: str) -> bool:
     
     try:
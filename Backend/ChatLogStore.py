@@ -0,0 +1,409 @@
+#It implements an append-only, segmented chat log store (JSON Lines on disk) with an in-memory tail index and periodic compaction, so a chat turn costs the same I/O no matter how long the history is.
+
+import os
+import json
+import threading
+from contextlib import contextmanager
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:  #Windows
+    fcntl = None
+    import msvcrt
+
+#Default on-disk locations, relative to the project root like the rest of the backend
+ChatLogDirectory = os.path.join("Data", "ChatLog")
+LegacyChatLogPath = os.path.join("Data", "ChatLog.json")
+
+SegmentPrefix = "segment-"
+SegmentSuffix = ".jsonl"
+SegmentSizesName = "segments.json"  #Record count per closed segment, so compaction can plan without reading them
+LockName = "chatlog.lock"  #Locked while a process reads or changes the segments
+
+
+def LockFile(file):
+    """Block until this process holds the exclusive lock on ``file``"""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        return
+    file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue  #LK_LOCK gives up after about 10 seconds; keep waiting
+
+
+def UnlockFile(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ChatLogStore:
+    """Append-only chat log split into JSON Lines segment files.
+
+    Every record is one line ``{"id": n, "role": ..., "content": ...}``. New
+    records are appended to the newest (active) segment, which is rolled over
+    once it holds ``segment_size`` records. The last ``tail_size`` records are
+    kept in memory so the chatbots never have to parse the whole history, and
+    small closed segments are merged from time to time by ``compact()``.
+
+    The assistant and the API servers share one log, so every read and write
+    of the segments holds a file lock on the directory as well as the thread
+    lock; ids stay unique and a compaction never removes a segment another
+    process is appending to.
+    """
+
+    def __init__(self, directory: str = ChatLogDirectory, legacy_path: str = LegacyChatLogPath,
+                 segment_size: int = 256, tail_size: int = 256, compact_every: int = 64, max_segments: int = 8,
+                 compacted_size: int = 4096):
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.segment_size = segment_size
+        self.compact_every = compact_every
+        self.max_segments = max_segments
+        self.compacted_size = compacted_size
+
+        self._lock = threading.RLock()
+        self._lock_depth = 0  #Nesting of _locked() in the thread holding _lock
+        self._tail = deque(maxlen=tail_size)
+        self._segments = []  #Sorted segment file names
+        self._active_lines = 0  #Records in the active segment
+        self._next_id = 0
+        self._appends_since_compact = 0
+        self._fingerprint = None  #(segment names, active segment size) as of our last read/write
+        self._sizes = {}  #Segment name -> [file size in bytes, record count]
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.directory, LockName), "a+b")
+        self._load()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and, in the outermost call, the file lock shared with other processes"""
+        with self._lock:
+            if self._lock_depth == 0:
+                LockFile(self._lock_file)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    UnlockFile(self._lock_file)
+
+    #----- segment helpers -----
+
+    def _segment_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _segment_name(self, index):
+        return f"{SegmentPrefix}{index:06d}{SegmentSuffix}"
+
+    def _segment_index(self, name):
+        return int(name[len(SegmentPrefix):-len(SegmentSuffix)])
+
+    def _list_segments(self):
+        names = [n for n in os.listdir(self.directory) if n.startswith(SegmentPrefix) and n.endswith(SegmentSuffix)]
+        return sorted(names, key=self._segment_index)
+
+    def _read_segment(self, name):
+        """Yield the records of one segment, skipping a torn trailing line"""
+        try:
+            with open(self._segment_path(name), "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def _load_sizes(self):
+        try:
+            with open(self._segment_path(SegmentSizesName), "r", encoding="utf-8") as f:
+                sizes = json.load(f)
+        except (OSError, ValueError):
+            sizes = {}
+        self._sizes = sizes if isinstance(sizes, dict) else {}
+
+    def _save_sizes(self):
+        path = self._segment_path(SegmentSizesName)
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self._sizes, f)
+        os.replace(temp, path)
+
+    def _segment_records(self, name):
+        """Record count of a segment, from the sizes file while the file size still matches"""
+        try:
+            size = os.path.getsize(self._segment_path(name))
+        except OSError:
+            return 0
+        known = self._sizes.get(name)
+        if known and known[0] == size:
+            return known[1]
+        count = sum(1 for _ in self._read_segment(name))
+        self._sizes[name] = [size, count]
+        return count
+
+    def _current_fingerprint(self):
+        if not self._segments:
+            return None
+        active = self._segments[-1]
+        try:
+            size = os.path.getsize(self._segment_path(active))
+        except OSError:
+            size = -1
+        return (tuple(self._list_segments()), size)
+
+    def _load(self):
+        """(Re)build the tail index from the newest segments only"""
+        with self._locked():
+            self._segments = self._list_segments()
+            self._load_sizes()
+
+            if not self._segments:
+                self._segments = [self._segment_name(1)]
+                open(self._segment_path(self._segments[0]), "a", encoding="utf-8").close()
+                self._import_legacy()
+
+            self._tail.clear()
+            self._next_id = 0
+            self._active_lines = 0
+
+            #Walk segments newest-first until the tail is full
+            collected = []
+            for position, name in enumerate(reversed(self._segments)):
+                records = list(self._read_segment(name))
+                if position == 0:
+                    self._active_lines = len(records)
+                    if records:
+                        self._next_id = records[-1]["id"] + 1
+                elif not self._next_id and records:
+                    self._next_id = records[-1]["id"] + 1
+                collected = records + collected
+                if len(collected) >= self._tail.maxlen:
+                    break
+
+            self._tail.extend(collected[-self._tail.maxlen:])
+            self._fingerprint = self._current_fingerprint()
+
+    def _import_legacy(self):
+        """One-time migration of the old single-file Data\\ChatLog.json"""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except ValueError:
+            return
+        if isinstance(legacy, list) and legacy:
+            self._write_records([{"role": m["role"], "content": m["content"]} for m in legacy], start_id=0)
+
+    def _refresh_if_changed(self):
+        #Another process (e.g. the API server) may have appended to the log
+        if self._current_fingerprint() != self._fingerprint:
+            self._load()
+
+    def _write_records(self, messages, start_id):
+        """Append records to the active segment, rolling segments as they fill up"""
+        written = []
+        next_id = start_id
+        pending = list(messages)
+
+        while pending:
+            if self._active_lines >= self.segment_size:
+                new_index = self._segment_index(self._segments[-1]) + 1
+                self._segments.append(self._segment_name(new_index))
+                self._active_lines = 0
+
+            room = self.segment_size - self._active_lines
+            batch, pending = pending[:room], pending[room:]
+            path = self._segment_path(self._segments[-1])
+
+            with open(path, "a+b") as f:
+                #Repair a torn last line left by a crash before appending after it
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                lines = []
+                for message in batch:
+                    record = {"id": next_id, "role": message["role"], "content": message["content"]}
+                    next_id += 1
+                    lines.append(json.dumps(record, ensure_ascii=False))
+                    written.append(record)
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+            self._active_lines += len(batch)
+
+        return written
+
+    #----- public API -----
+
+    def append(self, role: str, content: str) -> dict:
+        """Append a single message and return the stored record"""
+        return self.extend([{"role": role, "content": content}])[0]
+
+    def extend(self, messages) -> list:
+        """Append several messages in one write and return the stored records"""
+        with self._locked():
+            self._refresh_if_changed()
+            written = self._write_records(messages, start_id=self._next_id)
+            self._next_id += len(written)
+            self._tail.extend(written)
+            self._appends_since_compact += len(written)
+            self._fingerprint = self._current_fingerprint()
+
+            if self._appends_since_compact >= self.compact_every:
+                self._appends_since_compact = 0
+                self.compact()
+            return written
+
+    def tail(self, limit: int = None) -> list:
+        """Return the most recent messages (role/content only) from memory"""
+        with self._locked():
+            self._refresh_if_changed()
+            records = list(self._tail)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return [{"role": r["role"], "content": r["content"]} for r in records]
+
+    def tail_entries(self) -> list:
+        """Return the in-memory tail as full records (with ids)"""
+        with self._locked():
+            self._refresh_if_changed()
+            return [dict(r) for r in self._tail]
+
+    def entries_since(self, last_id: int = -1) -> list:
+        """Return full records newer than ``last_id`` (falls back to disk if they left the tail)"""
+        with self._locked():
+            self._refresh_if_changed()
+            if self._tail and self._tail[0]["id"] <= last_id + 1:
+                return [dict(r) for r in self._tail if r["id"] > last_id]
+        return [r for r in self.iter_entries() if r["id"] > last_id]
+
+    def iter_entries(self):
+        """Stream every record from disk, oldest first"""
+        with self._locked():
+            self._refresh_if_changed()
+            segments = list(self._segments)
+        for name in segments:
+            yield from self._read_segment(name)
+
+    def read_all(self) -> list:
+        """Return the whole history as role/content messages (reads every segment)"""
+        return [{"role": r["role"], "content": r["content"]} for r in self.iter_entries()]
+
+    def last_id(self) -> int:
+        with self._locked():
+            self._refresh_if_changed()
+            return self._next_id - 1
+
+    def __len__(self):
+        with self._locked():
+            self._refresh_if_changed()
+            return self._next_id
+
+    def clear(self):
+        """Drop the whole history and start over with one empty segment"""
+        with self._locked():
+            for name in self._list_segments():
+                try:
+                    os.remove(self._segment_path(name))
+                except FileNotFoundError:
+                    pass
+            try:
+                os.remove(self._segment_path(SegmentSizesName))
+            except FileNotFoundError:
+                pass
+            self._sizes = {}
+            self._segments = [self._segment_name(1)]
+            open(self._segment_path(self._segments[0]), "a", encoding="utf-8").close()
+            self._tail.clear()
+            self._next_id = 0
+            self._active_lines = 0
+            self._appends_since_compact = 0
+            self._fingerprint = self._current_fingerprint()
+
+    def compact(self):
+        """Merge runs of small closed segments so the segment count stays bounded.
+
+        Only closed segments are rewritten and each merged file is capped at
+        ``compacted_size`` records, so a compaction never rewrites
+        the entire history. Merges are planned from the record counts in
+        the sizes file; segments that are already full are never read, and
+        nothing is read when no two adjacent segments fit in one file.
+        """
+        with self._locked():
+            self._refresh_if_changed()
+            closed = self._segments[:-1]
+            if len(closed) <= self.max_segments:
+                return
+
+            limit = self.compacted_size
+            known = dict(self._sizes)
+            self._sizes = {name: size for name, size in self._sizes.items() if name in closed}
+            groups, current, current_count = [], [], 0
+            for name in closed:
+                count = self._segment_records(name)
+                if current and (count >= limit or current_count + count > limit):
+                    groups.append(current)
+                    current, current_count = [], 0
+                if count >= limit:
+                    continue  #Full already, nothing to merge it with
+                current.append(name)
+                current_count += count
+            if current:
+                groups.append(current)
+
+            merges = [names for names in groups if len(names) >= 2]
+            for names in merges:
+                #Keep the first segment's name so ordering by index is preserved
+                target = self._segment_path(names[0])
+                temp = target + ".tmp"
+                count = 0
+                with open(temp, "w", encoding="utf-8") as f:
+                    for name in names:
+                        for record in self._read_segment(name):
+                            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                            count += 1
+                os.replace(temp, target)
+                for name in names[1:]:
+                    os.remove(self._segment_path(name))
+                    self._sizes.pop(name, None)
+                self._sizes[names[0]] = [os.path.getsize(target), count]
+
+            if merges:
+                self._segments = self._list_segments()
+                self._fingerprint = self._current_fingerprint()
+            if merges or self._sizes != known:
+                self._save_sizes()
+
+
+#Shared store used by the chatbot, the search engine and the GUI integration
+_DefaultStore = None
+_DefaultStoreLock = threading.Lock()
+
+def GetChatLogStore() -> ChatLogStore:
+    global _DefaultStore
+    with _DefaultStoreLock:
+        if _DefaultStore is None:
+            _DefaultStore = ChatLogStore()
+        return _DefaultStore
+
+
+if __name__ == "__main__":
+    store = GetChatLogStore()
+    print(f"{len(store)} messages in {len(store._segments)} segment(s)")
+    for message in store.tail(10):
+        print(f"{message['role']}: {message['content'][:80]}")
@@ -1,9 +1,12 @@
 #It implements a chatbot using the Groq API with real-time information integration, chat log persistence, and response formatting.
 
-from groq import Groq  #Groq Library to use its API
-from json import load,dump  #Functions to read, write JSON fles
 import datetime  #Module for real-time date & time info
 from dotenv import dotenv_values  
+from Backend.ChatLogStore import GetChatLogStore  #Append-only chat log shared with the search engine and GUI
+from Backend.ContextWindow import GetContextWindow  #Token-budgeted prompt assembly
+from Backend.ConversationSummary import GetRollingSummary  #Background summary of turns that no longer fit
+from Backend.Resilience import ResilientCall, ResilientStream, AsyncResilientCall, AsyncResilientStream  #Bounded retries, backoff and circuit breaker for provider calls
+from Backend.Providers import GetGroqClient, GetAsyncProviders  #Shared Groq clients on pooled connections
 
 env_vars = dotenv_values(".env")
 
@@ -12,8 +15,11 @@ Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-#Initialize Groq client
-client = Groq(api_key=GroqAPIKey)
+#Shared Groq client (retries are handled by ResilientCall)
+client = GetGroqClient()
+
+#Reply used when the provider keeps failing, instead of retrying forever
+ErrorAnswer = "Sorry, I couldn't reach my language model just now. Please try again in a moment."
 
 messages=[]
 
@@ -31,14 +37,14 @@ SystemChatBot = [
     {"role": "system", "content": System}
 ]
 
-#Attempt to load the chat log from a JSON file
-try:
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)  #Load existing messages from the chat log
-except FileNotFoundError:
-    #If file doesn't exist, create an empty JSON file to store chat logs
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([], f)
+#Open the chat log store (creates it, or migrates Data\ChatLog.json, on first run)
+ChatLog = GetChatLogStore()
+
+#Shared context window that keeps the prompt within the model's token budget
+Context = GetContextWindow()
+
+#Running summary of the turns that fell out of the context window
+Summary = GetRollingSummary(ChatLog)
 
 #Function to get real-time date and time info
 def RealTimeInformation():
@@ -64,54 +70,125 @@ def AnswerModifier(Answer):
     modified_answer = '\n'.join(non_empty_lines)
     return modified_answer
 
+#Build the prompt for a query: the running summary and recent chat log, or the caller's History
+def PrepareMessages(Query, History=None):
+    UserMessage = {"role": "user", "content": f"{Query}"}
+    SystemMessages = SystemChatBot + [{"role": "system", "content": RealTimeInformation()}]
+
+    if History is None:
+        #Recent turns plus the running summary of older ones, within the token budget
+        messages = Summary.build(Context, ChatLog, SystemMessages, [UserMessage])
+    else:
+        messages = Context.build(SystemMessages, list(History) + [UserMessage])
+    return UserMessage, messages
+
+#Completion parameters shared by the blocking and async chatbot
+def CompletionRequest(messages):
+    return dict(
+        model = "llama3-70b-8192",
+        messages = messages,
+        max_tokens = 1024,
+        temperature=0.7,
+        top_p=1,
+        stream=True,
+        stop = None
+    )
+
+#Clean up the raw answer and append the turn to the chat log
+def FinishAnswer(UserMessage, Answer, History=None):
+    Answer = Answer.replace("</s>", "")  #Clean up any unwanted tokens from the response
+
+    #Append this turn to the chat log (one small append, not a full rewrite)
+    if History is None:
+        ChatLog.extend([UserMessage, {"role": "assistant", "content": Answer}])
+
+    #Return the formatted response
+    return AnswerModifier(Answer = Answer)
+
 #Main chatbot function to handle user queries
-def ChatBot(Query):
-    """ This functiokn sends the user's query to the chatbot and returns the AI's response """
+def ChatBot(Query, History=None):
+    """ This functiokn sends the user's query to the chatbot and returns the AI's response.
+    If History is given (e.g. an API chat session), it is used instead of the local chat log and nothing is persisted. """
 
     try:
-        with open(r"Data\ChatLog.json", "r") as f:
-            messages = load(f)
-        
-        #Append the user's query to the messages list
-        messages.append({"role": "user", "content": f"{Query}"})
-
-        #Make a request to the Groq API for a response
-        completion = client.chat.completions.create(
-            model = "llama3-70b-8192",
-            messages = SystemChatBot + [{"role": "system", "content": RealTimeInformation()}] + messages,
-            max_tokens = 1024,
-            temperature=0.7,
-            top_p=1,
-            stream=True,
-            stop = None
-        )
-
-        Answer = ""   #Initialize empty string to store AI's response
-
-
-        #Process the streamed response chunks
-        for chunk in completion:
-            if chunk.choices[0].delta.content:   #Check if there's content in the current chunk
-                Answer += chunk.choices[0].delta.content   #Append the content from the response
-
-        Answer = Answer.replace("</s>", "")  #Clean up any unwanted tokens from the response
-
-        #Append the chatbot's response to the message list
-        messages.append({"role": "assistant", "content": Answer})
-
-        #Save the updated chat log to the JSON file
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump(messages,f,indent=4)
-    
-        #Return the formatted response
-        return AnswerModifier(Answer = Answer)
+        UserMessage, messages = PrepareMessages(Query, History)
+
+        #Make a request to the Groq API and collect the streamed response
+        def Complete():
+            completion = client.chat.completions.create(**CompletionRequest(messages))
+
+            Answer = ""   #Initialize empty string to store AI's response
+
+            #Process the streamed response chunks
+            for chunk in completion:
+                if chunk.choices[0].delta.content:   #Check if there's content in the current chunk
+                    Answer += chunk.choices[0].delta.content   #Append the content from the response
+            return Answer
+
+        #Capped attempts with backoff; fails fast while the Groq circuit is open
+        Answer = ResilientCall("groq", Complete)
+        return FinishAnswer(UserMessage, Answer, History)
     
     except Exception as e:
-        #Handle errors by printing the exception and resetting the chat log
+        #Retries are exhausted (or the circuit is open); keep the chat log intact and report the failure
+        print(f"Error: {e}")
+        return ErrorAnswer
+
+#Streaming version for the voice assistant: yields tokens as they arrive so speech can start early
+def ChatBotStream(Query, History=None):
+    UserMessage, messages = PrepareMessages(Query, History)
+    Answer = ""
+
+    try:
+        for chunk in ResilientStream("groq", lambda: client.chat.completions.create(**CompletionRequest(messages))):
+            if chunk.choices and chunk.choices[0].delta.content:
+                Answer += chunk.choices[0].delta.content
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        print(f"Error: {e}")
+        if not Answer:
+            yield ErrorAnswer
+        return
+
+    FinishAnswer(UserMessage, Answer, History)
+
+#Async version for the API server: awaits Groq on the shared connection pool instead of blocking the event loop
+async def ChatBotAsync(Query, History=None):
+    try:
+        UserMessage, messages = PrepareMessages(Query, History)
+        providers = GetAsyncProviders()
+
+        async def Complete():
+            async with providers.limit:
+                completion = await providers.groq.chat.completions.create(**CompletionRequest(messages))
+
+                Answer = ""
+                async for chunk in completion:
+                    if chunk.choices[0].delta.content:
+                        Answer += chunk.choices[0].delta.content
+                return Answer
+
+        Answer = await AsyncResilientCall("groq", Complete)
+        return FinishAnswer(UserMessage, Answer, History)
+
+    except Exception as e:
         print(f"Error: {e}")
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump([],f,indent = 4)
-        return ChatBot(Query)   #Retry the query after resetting the log
+        return ErrorAnswer
+
+#Streaming version: yields the answer token by token as Groq produces it, then records the finished turn
+async def ChatBotStreamAsync(Query, History=None):
+    UserMessage, messages = PrepareMessages(Query, History)
+    providers = GetAsyncProviders()
+    Answer = ""
+
+    #Only the request is retried; once tokens have been sent a retry would repeat them.
+    #A failure is raised to the caller, so a partial or missing answer is never stored as a reply
+    async for chunk in AsyncResilientStream("groq", lambda: providers.groq.chat.completions.create(**CompletionRequest(messages)), Limit=providers.limit):
+        if chunk.choices and chunk.choices[0].delta.content:
+            Answer += chunk.choices[0].delta.content
+            yield chunk.choices[0].delta.content
+
+    FinishAnswer(UserMessage, Answer, History)
     
 
 #Main program entry point
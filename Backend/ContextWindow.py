@@ -0,0 +1,121 @@
+#It assembles the prompt sent to the Groq chat models: the system messages plus as many of the most recent turns as fit in a token budget, with cached per-message token counts. Counts are an offline estimate, not the llama3 tokenizer, so the budget keeps headroom below the model's context.
+
+import re
+import threading
+from collections import OrderedDict
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+
+#Prompt budget for llama3-70b-8192: 8192 context minus the 1024 completion tokens, with some headroom
+DefaultTokenBudget = int(env_vars.get("ContextTokenBudget") or 6000)
+
+#Rough per-message cost of the chat template (role markers, separators)
+MessageOverhead = 4
+
+
+class ApproximateTokenizer:
+    """Offline tokenizer estimate: ~1 token per short word or symbol, ~4 characters per token for long words"""
+
+    pattern = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+    def count(self, text: str) -> int:
+        total = 0
+        for piece in self.pattern.findall(text or ""):
+            total += max(1, -(-len(piece) // 4))
+        return total
+
+
+class TiktokenTokenizer:
+    """BPE counts from the optional ``tiktoken`` package, for ``ContextWindow.set_tokenizer``.
+
+    Not the default: cl100k_base is OpenAI's vocabulary rather than llama3's, so
+    it is an estimate too, and tiktoken downloads the encoding on first use.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+        self.encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text or "", disallowed_special=()))
+
+
+def DefaultTokenizer():
+    #Works offline and never touches the network; DefaultTokenBudget leaves room for its error
+    return ApproximateTokenizer()
+
+
+class ContextWindow:
+    """Builds token-budgeted message lists for chat completions.
+
+    Token counts are cached per (role, content), so rebuilding the window
+    every turn only tokenizes the messages that were not seen before.
+    """
+
+    def __init__(self, budget: int = DefaultTokenBudget, tokenizer=None, cache_size: int = 8192):
+        self.budget = budget
+        self.tokenizer = tokenizer or DefaultTokenizer()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_tokenizer(self, tokenizer):
+        """Swap the tokenizer (any object with ``count(text) -> int``) and drop cached counts"""
+        with self._lock:
+            self.tokenizer = tokenizer
+            self._cache.clear()
+
+    def count(self, message: dict) -> int:
+        """Token cost of one chat message, including the template overhead"""
+        key = (message["role"], message["content"])
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        tokens = self.tokenizer.count(message["content"]) + MessageOverhead
+
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def total(self, messages) -> int:
+        return sum(self.count(m) for m in messages)
+
+    def fit(self, history, budget: int) -> int:
+        """Return the index of the oldest history message that still fits in ``budget``.
+
+        The newest message is always kept, even if it alone exceeds the budget.
+        """
+        used = 0
+        start = len(history)
+        for index in range(len(history) - 1, -1, -1):
+            cost = self.count(history[index])
+            if used + cost > budget and start < len(history):
+                break
+            used += cost
+            start = index
+        return start
+
+    def build(self, system_messages, history, budget: int = None) -> list:
+        """Return ``system_messages`` followed by the most recent turns of ``history`` that fit"""
+        budget = self.budget if budget is None else budget
+        remaining = max(budget - self.total(system_messages), 0)
+        start = self.fit(history, remaining)
+        return list(system_messages) + list(history[start:])
+
+
+#Shared window so all chat modules reuse the same token-count cache
+_DefaultWindow = None
+_DefaultWindowLock = threading.Lock()
+
+def GetContextWindow() -> ContextWindow:
+    global _DefaultWindow
+    with _DefaultWindowLock:
+        if _DefaultWindow is None:
+            _DefaultWindow = ContextWindow()
+        return _DefaultWindow
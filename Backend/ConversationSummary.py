@@ -0,0 +1,235 @@
+#It keeps a running summary of old conversation turns: turns that fall out of the token budget are folded into the summary by a background worker, so prompts stay small while long-term context is preserved.
+
+import os
+import json
+import threading
+from dotenv import dotenv_values
+from Backend.ContextWindow import ApproximateTokenizer
+from Backend.Resilience import ResilientCall
+from Backend.Providers import GetGroqClient
+
+env_vars = dotenv_values(".env")
+
+#Upper bound on the stored summary, so it cannot grow back into the prompt budget
+SummaryTokenLimit = int(env_vars.get("SummaryTokenLimit") or 400)
+
+SummaryPrompt = """You maintain a running summary of a conversation between a user and an AI assistant.
+*** Merge the new turns into the existing summary. ***
+*** Keep names, preferences, decisions, open questions and facts the assistant may need later; drop small talk. ***
+*** Write plain sentences, no headings, and stay under 150 words. ***"""
+
+
+def TrimToTokens(Text, Limit, Tokenizer=None):
+    """Keep the most recent part of a summary that fits in ``Limit`` tokens"""
+    Tokenizer = Tokenizer or ApproximateTokenizer()
+    Sentences = [s.strip() for s in Text.split(". ") if s.strip()]
+    Kept = []
+    Used = 0
+    for Sentence in reversed(Sentences):
+        Cost = Tokenizer.count(Sentence)
+        if Used + Cost > Limit:
+            break
+        Kept.insert(0, Sentence)
+        Used += Cost
+    return ". ".join(Kept)
+
+
+def FormatTurns(Turns):
+    return "\n".join(f"{t['role']}: {t['content']}" for t in Turns)
+
+
+def GroqSummarizer(PreviousSummary: str, Turns: list) -> str:
+    """Fold ``Turns`` into ``PreviousSummary`` with the Groq chat model"""
+    completion = ResilientCall("groq", GetGroqClient().chat.completions.create,
+        model="llama3-70b-8192",
+        messages=[
+            {"role": "system", "content": SummaryPrompt},
+            {"role": "user", "content": f"Existing summary:\n{PreviousSummary or '(none)'}\n\nNew turns:\n{FormatTurns(Turns)}"}
+        ],
+        max_tokens=SummaryTokenLimit,
+        temperature=0.3,
+        stream=False
+    )
+    return completion.choices[0].message.content.strip()
+
+
+def ExtractiveSummarizer(PreviousSummary: str, Turns: list) -> str:
+    """Offline stand-in: keep the first sentence of every folded turn"""
+    Parts = [PreviousSummary] if PreviousSummary else []
+    for Turn in Turns:
+        First = Turn["content"].strip().split(". ")[0].rstrip(".")
+        if First:
+            Parts.append(f"{Turn['role']} said {First}")
+    return ". ".join(Parts)
+
+
+class RollingSummary:
+    """Running summary of the turns older than ``covered_upto`` in a ChatLogStore.
+
+    ``build()`` is called on the request path and only reads the current
+    summary; folding new turns into it happens on a background thread.
+    """
+
+    def __init__(self, path: str, summarizer=None, max_tokens: int = SummaryTokenLimit):
+        self.path = path
+        self.summarizer = summarizer or GroqSummarizer
+        self.max_tokens = max_tokens
+
+        self.summary = ""
+        self.covered_upto = 0  #Records with id < covered_upto are already in the summary
+        self._target = 0
+        self._store = None
+        self._busy = False
+        self._cond = threading.Condition()
+        self._worker = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.summary = state.get("summary", "")
+            self.covered_upto = state.get("covered_upto", 0)
+        except (FileNotFoundError, ValueError):
+            pass
+        self._target = self.covered_upto
+
+    def _save(self):
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary, "covered_upto": self.covered_upto}, f, ensure_ascii=False)
+        os.replace(temp, self.path)
+
+    def reset(self):
+        with self._cond:
+            self.summary = ""
+            self.covered_upto = 0
+            self._target = 0
+            self._save()
+
+    def message(self):
+        """The summary as a system message, or None before anything was folded"""
+        with self._cond:
+            if not self.summary:
+                return None
+            return {"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}
+
+    def request_fold(self, store, upto_id: int):
+        """Ask the background worker to fold every record with id < ``upto_id``"""
+        with self._cond:
+            if upto_id <= max(self._target, self.covered_upto):
+                return
+            self._store = store
+            self._target = upto_id
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._target <= self.covered_upto:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                self._busy = True
+                start, target, store, previous = self.covered_upto, self._target, self._store, self.summary
+
+            turns = [e for e in store.entries_since(start - 1) if e["id"] < target]
+            try:
+                summary = self.summarizer(previous, turns) if turns else previous
+            except Exception as e:
+                print(f"Error updating conversation summary: {e}")
+                with self._cond:
+                    #Give up on this range for now; the next request will retry it
+                    self._target = self.covered_upto
+                continue
+
+            with self._cond:
+                self.summary = TrimToTokens(summary, self.max_tokens)
+                self.covered_upto = target
+                self._save()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until all requested folds are done (used by the benchmark)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._busy and self._target <= self.covered_upto, timeout)
+
+    def build(self, context, store, system_messages, new_messages) -> list:
+        """Return the prompt for a turn and schedule folding of whatever no longer fits.
+
+        The prompt is ``system_messages``, the summary, and the most recent
+        unsummarized turns of ``store`` followed by ``new_messages``.
+        """
+        entries = store.tail_entries()
+        if self.covered_upto > store.last_id() + 1:
+            #The log was cleared underneath us
+            self.reset()
+
+        history_entries = [e for e in entries if e["id"] >= self.covered_upto]
+        history = [{"role": e["role"], "content": e["content"]} for e in history_entries] + list(new_messages)
+
+        summary = self.message()
+        system = list(system_messages) + ([summary] if summary else [])
+        window = context.build(system, history)
+
+        #Everything older than the first turn that made it into the window gets folded
+        dropped = min(len(history) - (len(window) - len(system)), len(history_entries))
+        if dropped > 0:
+            self.request_fold(store, history_entries[dropped - 1]["id"] + 1)
+        elif entries and entries[0]["id"] > self.covered_upto:
+            #Turns that already left the in-memory tail are not in the prompt either
+            self.request_fold(store, entries[0]["id"])
+
+        return window
+
+
+_DefaultSummary = None
+_DefaultSummaryLock = threading.Lock()
+
+def GetRollingSummary(store) -> RollingSummary:
+    """Shared running summary stored next to the chat log segments"""
+    global _DefaultSummary
+    with _DefaultSummaryLock:
+        if _DefaultSummary is None:
+            _DefaultSummary = RollingSummary(os.path.join(store.directory, "summary.json"))
+        return _DefaultSummary
+
+
+def Benchmark(Turns: int = 1000, Budget: int = 1500):
+    """Simulate a long conversation and report prompt tokens per turn"""
+    import tempfile
+    import random
+    from Backend.ChatLogStore import ChatLogStore
+    from Backend.ContextWindow import ContextWindow
+
+    Words = "the assistant user python music weather meeting project idea travel plan question answer".split()
+    Random = random.Random(7)
+
+    def Sentence(Length):
+        return " ".join(Random.choice(Words) for _ in range(Length)).capitalize() + "."
+
+    with tempfile.TemporaryDirectory() as Directory:
+        Store = ChatLogStore(directory=Directory, legacy_path=None)
+        Context = ContextWindow(budget=Budget, tokenizer=ApproximateTokenizer())
+        Summary = RollingSummary(os.path.join(Directory, "summary.json"), summarizer=ExtractiveSummarizer)
+        System = [{"role": "system", "content": "You are a helpful assistant."}]
+
+        PromptTokens = []
+        for Turn in range(Turns):
+            Query = {"role": "user", "content": Sentence(Random.randint(5, 30))}
+            Prompt = Summary.build(Context, Store, System, [Query])
+            PromptTokens.append(Context.total(Prompt))
+            Store.extend([Query, {"role": "assistant", "content": " ".join(Sentence(12) for _ in range(Random.randint(1, 6)))}])
+            Summary.wait_idle(5)
+
+        print(f"{'turns':>12} {'min':>6} {'mean':>8} {'max':>6}")
+        for Start in range(0, Turns, Turns // 10):
+            Window = PromptTokens[Start:Start + Turns // 10]
+            print(f"{Start + 1:>5}-{Start + len(Window):<6} {min(Window):>6} {sum(Window) / len(Window):>8.1f} {max(Window):>6}")
+        print(f"Summary covers {Summary.covered_upto} of {len(Store)} messages, {ApproximateTokenizer().count(Summary.summary)} tokens")
+
+
+if __name__ == "__main__":
+    Benchmark()
@@ -0,0 +1,141 @@
+#It implements a bounded LRU/TTL cache of FirstLayerDMM decisions keyed on a normalized query, optionally persisted to disk so repeated commands skip the Cohere call across restarts.
+
+import os
+import re
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+
+DecisionCacheSize = int(env_vars.get("DecisionCacheSize") or 512)
+DecisionCacheTTL = float(env_vars.get("DecisionCacheTTL") or 24 * 60 * 60)  #Seconds
+DecisionCachePersist = str(env_vars.get("DecisionCachePersist") or "True").lower() == "true"
+DecisionCachePath = os.path.join("Data", "DecisionCache.json")
+
+#Queries longer than this carry one-off context (e.g. the API's memory preamble) and are not worth caching
+MaxCachedQueryLength = 300
+
+
+def NormalizeQuery(Query: str) -> str:
+    """Cache key for a query: case, punctuation and whitespace are ignored.
+
+    QueryModifier only lowercases, capitalizes and adds a trailing '.' or '?',
+    so a raw utterance and its QueryModifier output map to the same key.
+    """
+    Text = Query.lower().strip()
+    Text = re.sub(r"[^\w\s']", " ", Text)
+    return re.sub(r"\s+", " ", Text).strip()
+
+
+class DecisionCache:
+    """LRU cache of decisions with a per-entry time-to-live"""
+
+    def __init__(self, max_size: int = DecisionCacheSize, ttl: float = DecisionCacheTTL, path: str = None, save_interval: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()  #key -> (decision, expires_at)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+
+        if self.path:
+            self._load()
+            atexit.register(self.save)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        now = time.time()
+        for key, decision, expires_at in stored:
+            if expires_at > now:
+                self._entries[key] = (decision, expires_at)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Write the live entries to disk (atomic replace)"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            stored = [[k, d, e] for k, (d, e) in self._entries.items() if e > now]
+            self._dirty = False
+            self._last_save = now
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(temp, self.path)
+
+    def get(self, query: str):
+        """Return a cached decision (a new list) or None"""
+        key = NormalizeQuery(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            decision, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(decision)
+
+    def put(self, query: str, decision: list):
+        if not decision or len(query) > MaxCachedQueryLength:
+            return
+        key = NormalizeQuery(query)
+        with self._lock:
+            self._entries[key] = (list(decision), time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+            due = time.time() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+        self.save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+Cache = DecisionCache(path=DecisionCachePath if DecisionCachePersist else None)
+
+def GetDecisionCacheStats() -> dict:
+    return Cache.stats()
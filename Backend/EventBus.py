@@ -0,0 +1,89 @@
+#It implements the in-process publish/subscribe bus between the assistant thread and the GUI: the latest value of each topic is kept in memory, subscribers are called once per change, and waiters block until a value they care about is published, so neither side polls files.
+
+import threading
+
+#Topics and the type of value published on them
+MicrophoneTopic = "mic"         #str: "True" while the assistant is listening, "False" when the mic is off
+StatusTopic = "status"          #str: assistant status line, e.g. "Listening..."
+ChatTopic = "chat"              #ChatEvent: a change to the chat transcript (see Frontend/ChatTranscript)
+
+Defaults = {
+    MicrophoneTopic: "False",
+    StatusTopic: "",
+}
+
+
+class EventBus:
+    """Thread-safe latest-value pub/sub.
+
+    ``publish()`` stores the value and calls every subscriber of the topic
+    on the publishing thread, but only when the value actually changed
+    (``force=True`` delivers it anyway). Subscribers that touch widgets must
+    hop to their own thread themselves; the GUI does that with a Qt signal.
+    """
+
+    def __init__(self, defaults: dict = None):
+        self.published = 0
+        self.delivered = 0
+
+        self._values = dict(Defaults if defaults is None else defaults)
+        self._subscribers = {}  #topic -> [callback]
+        self._changed = threading.Condition()
+
+    def get(self, topic: str, default=None):
+        with self._changed:
+            return self._values.get(topic, default)
+
+    def publish(self, topic: str, value, force: bool = False) -> bool:
+        """Set ``topic`` to ``value``; returns whether subscribers were notified"""
+        with self._changed:
+            if not force and topic in self._values and self._values[topic] == value:
+                return False
+            self._values[topic] = value
+            self.published += 1
+            callbacks = list(self._subscribers.get(topic, ()))
+            self._changed.notify_all()
+
+        for callback in callbacks:
+            try:
+                callback(value)
+                self.delivered += 1
+            except Exception as e:
+                print(f"Error delivering '{topic}' event: {e}")
+        return True
+
+    def subscribe(self, topic: str, callback, replay: bool = False):
+        """Call ``callback(value)`` on every change of ``topic``; returns a function that unsubscribes.
+        With ``replay`` the current value is delivered right away."""
+        with self._changed:
+            self._subscribers.setdefault(topic, []).append(callback)
+            current = self._values.get(topic)
+        if replay and current is not None:
+            callback(current)
+
+        def unsubscribe():
+            with self._changed:
+                callbacks = self._subscribers.get(topic, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+        return unsubscribe
+
+    def wait_for(self, topic: str, predicate, timeout: float = None) -> bool:
+        """Block until ``predicate(value)`` holds for ``topic`` (or ``timeout`` passes); returns whether it holds"""
+        with self._changed:
+            return self._changed.wait_for(lambda: predicate(self._values.get(topic)), timeout)
+
+    def stats(self) -> dict:
+        with self._changed:
+            return {
+                "topics": len(self._values),
+                "subscribers": sum(len(callbacks) for callbacks in self._subscribers.values()),
+                "published": self.published,
+                "delivered": self.delivered,
+            }
+
+
+Bus = EventBus()
+
+def GetEventBus() -> EventBus:
+    return Bus
@@ -0,0 +1,326 @@
+#It implements a deterministic local classifier in front of FirstLayerDMM: a compiled keyword/regex grammar that resolves unambiguous commands (open, close, play, system, searches, reminders, image generation, exit) without calling Cohere.
+
+import re
+import queue
+import threading
+
+#Filler that does not change the meaning of a command
+PolitePrefix = re.compile(r"^(?:(?:hey|hi|ok|okay)\s+)?(?:spectre[\s,]+)?(?:please\s+|kindly\s+)?(?:(?:can|could|would|will)\s+you\s+(?:please\s+)?)?(?:i\s+want\s+you\s+to\s+|i\s+want\s+to\s+|let's\s+)?")
+PoliteSuffix = re.compile(r"(?:\s+(?:please|for\s+me|right\s+now|now|spectre))+$")
+
+#Clause separators for multi-command utterances ("open chrome and brave, then play music")
+ClauseSplit = re.compile(r"\s*,\s*(?:and\s+|then\s+)?|\s+and\s+then\s+|\s+and\s+|\s+then\s+")
+
+#Words that make an "open"/"close" target too vague to act on locally
+VagueTargets = {"it", "that", "this", "them", "file", "a file", "the file", "something", "app", "an app", "the app"}
+
+#"open"/"close" act on a short name ("chrome", "visual studio code"), never on a sentence
+TargetPattern = re.compile(r"^[a-z0-9][a-z0-9.+&'-]*(?:\s[a-z0-9][a-z0-9.+&'-]*){0,2}$")
+#Words that do not occur in app or site names but do in conversation ("close enough", "open to ideas")
+NonTargetWords = {"is", "are", "was", "were", "be", "been", "am", "isn't", "aren't", "do", "does", "did", "have", "has",
+                  "can", "will", "would", "should", "not", "enough", "too", "very", "so", "than", "if", "because",
+                  "to", "by", "with", "about", "of", "in", "at", "for", "from", "into", "up", "down", "out", "off",
+                  "i", "me", "you", "we", "us", "he", "him", "she", "her", "they", "their", "your", "our", "a", "an"}
+
+#"play" targets that are an activity rather than a song or video ("play a game with me", "play along")
+NotMedia = re.compile(r"^(?:a|an|some|any|with|along|around|again|it|that|this|something|music|a\s+song)\b"
+                      r"|\b(?:games?|with\s+(?:me|us|you|him|her|them))\b")
+
+
+def AppTarget(Target: str):
+    """``Target`` if it looks like the name of an app or website, else None"""
+    if Target in VagueTargets or not TargetPattern.match(Target) or NonTargetWords & set(Target.split()):
+        return None
+    return Target
+
+
+def MediaTitle(Title: str):
+    """``Title`` if it looks like something to play, else None"""
+    return None if NotMedia.search(Title) else Title
+
+Months = r"(?:january|february|march|april|may|june|july|august|september|october|november|december)"
+TimePattern = re.compile(r"\b(\d{1,2}(?::\d{2})?\s?(?:am|pm))\b|\b(\d{1,2}:\d{2})\b")
+DatePattern = re.compile(rf"\b(\d{{1,2}}(?:st|nd|rd|th)?\s+{Months}|{Months}\s+\d{{1,2}}(?:st|nd|rd|th)?|today|tomorrow|tonight)\b")
+
+#Each rule maps a clause to a DMM-style task string, or returns None if it does not apply
+Rules = [
+    ("exit", re.compile(r"^(?:bye|goodbye|good\s+bye|bye\s+bye|see\s+you(?:\s+later)?|exit|quit|shut\s+down|that's\s+all)$"),
+        lambda m: "exit"),
+    ("system", re.compile(r"^(?:turn\s+|set\s+)?(?:the\s+)?(volume|brightness)\s+(up|down)(?:\s+by)?(?:\s+(\d{1,3})\s*(?:%|percent))?$"),
+        lambda m: f"system {m.group(1)} {m.group(2)}" + (f" {m.group(3)}%" if m.group(3) else "")),
+    ("system", re.compile(r"^(increase|raise|decrease|lower|reduce)\s+(?:the\s+)?(volume|brightness)(?:\s+by)?(?:\s+(\d{1,3})\s*(?:%|percent))?$"),
+        lambda m: f"system {m.group(2)} {'up' if m.group(1) in ('increase', 'raise') else 'down'}" + (f" {m.group(3)}%" if m.group(3) else "")),
+    ("system", re.compile(r"^(mute|unmute)\s+(?:the\s+|my\s+)?mic(?:rophone)?$"),
+        lambda m: f"system {m.group(1)} mic"),
+    ("generate image", re.compile(r"^(?:generate|create|make|draw)\s+(?:me\s+)?(?:an?\s+)?(?:image|picture|photo|pic)s?\s+((?:of\s+)?.+)$"),
+        lambda m: f"generate image {m.group(1)}"),
+    ("youtube search", re.compile(r"^(?:youtube\s+search|search\s+youtube\s+for|search\s+(?:for\s+)?(.+?)\s+on\s+youtube$)\s*(.*)$"),
+        lambda m: f"youtube search {m.group(1) or m.group(2)}" if (m.group(1) or m.group(2)) else None),
+    ("google search", re.compile(r"^(?:google\s+search|search\s+google\s+for|search\s+(?:for\s+)?(.+?)\s+on\s+google$)\s*(.*)$"),
+        lambda m: f"google search {m.group(1) or m.group(2)}" if (m.group(1) or m.group(2)) else None),
+    ("play", re.compile(r"^play\s+(.+?)(?:\s+on\s+youtube)?$"),
+        lambda m: MediaTitle(m.group(1)) and f"play {m.group(1)}"),
+    ("open", re.compile(r"^(?:open|launch)\s+(?:the\s+|up\s+)?(.+?)(?:\s+app(?:lication)?|\s+website)?$"),
+        lambda m: AppTarget(m.group(1)) and f"open {m.group(1)}"),
+    ("close", re.compile(r"^(?:close|exit|terminate)\s+(?:the\s+)?(.+?)(?:\s+app(?:lication)?|\s+website)?$"),
+        lambda m: AppTarget(m.group(1)) and f"close {m.group(1)}"),
+]
+
+ReminderPattern = re.compile(r"^(?:set\s+(?:a\s+|an\s+)?(?:reminder|alarm)|remind\s+me)\b\s*(.*)$")
+ReminderFiller = re.compile(r"\b(?:at|on|for|to|about|that|i\s+have|i've\s+got)\b")
+
+#Verbs whose targets can be chained with "and" ("open chrome and brave")
+ChainableIntents = {"open", "close"}
+
+#Clause openers that start a new request rather than continue an argument ("play x and tell me about y")
+RequestWords = {"tell", "what", "what's", "who", "who's", "how", "why", "when", "where", "which", "is", "are", "do", "does",
+                "can", "could", "give", "show", "write", "explain", "open", "close", "play", "search", "set", "remind", "turn"}
+
+
+class FastPathStats:
+    """Hit/miss counters so we can see how many Cohere round-trips the fast path saves"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.intents = {}
+
+    def record(self, decision):
+        with self._lock:
+            if decision is None:
+                self.misses += 1
+                return
+            self.hits += 1
+            for task in decision:
+                intent = task if task == "exit" else next((r[0] for r in Rules if task.startswith(r[0])), "reminder")
+                self.intents[intent] = self.intents.get(intent, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "intents": dict(self.intents),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.intents = {}
+
+
+Stats = FastPathStats()
+
+
+def NormalizeUtterance(Query: str) -> str:
+    Text = Query.lower().strip()
+    Text = re.sub(r"[?!.;]+$", "", Text).strip()
+    Text = re.sub(r"\s+", " ", Text)
+    Text = PolitePrefix.sub("", Text)
+    Text = PoliteSuffix.sub("", Text)
+    return Text.strip(" ,")
+
+
+def ParseReminder(Clause: str):
+    Match = ReminderPattern.match(Clause)
+    if not Match:
+        return None
+    Body = Match.group(1)
+    Time = TimePattern.search(Body)
+    if not Time:
+        return None  #Without a time the remote model has to work out what is meant
+    Date = DatePattern.search(Body)
+
+    Message = Body
+    for Part in (Time, Date):
+        if Part:
+            Message = Message.replace(Part.group(0), " ")
+    Message = re.sub(r"\s+", " ", ReminderFiller.sub(" ", Message)).strip(" ,")
+    if not Message:
+        return None
+
+    Parts = [Time.group(0).replace(" ", "")]
+    if Date:
+        Parts.append(Date.group(0))
+    Parts.append(Message)
+    return "reminder " + " ".join(Parts)
+
+
+def ClassifyClause(Clause: str):
+    """Return (intent, task) for one clause, or None if no rule matches unambiguously"""
+    Reminder = ParseReminder(Clause)
+    if Reminder:
+        return "reminder", Reminder
+    for Intent, Pattern, Build in Rules:
+        Match = Pattern.match(Clause)
+        if Match:
+            Task = Build(Match)
+            return (Intent, Task) if Task else None
+    return None
+
+
+def LocalDecision(Query: str, Record: bool = True):
+    """Classify ``Query`` locally. Returns a FirstLayerDMM-style task list, or None to fall back to the remote model."""
+    Text = NormalizeUtterance(Query or "")
+    if not Text:
+        if Record:
+            Stats.record(None)
+        return None
+
+    #Reminders carry free text ("... for my meeting and lunch"), so never split them
+    Clauses = [Text] if ReminderPattern.match(Text) else [c for c in ClauseSplit.split(Text) if c]
+
+    Decision = []
+    PreviousIntent = None
+    for Clause in Clauses:
+        Result = ClassifyClause(Clause)
+
+        if Result is None and PreviousIntent in ChainableIntents and Clause not in VagueTargets and " " not in Clause.strip():
+            #"open chrome and brave" -> the verb carries over to a bare target
+            Result = ClassifyClause(f"{PreviousIntent} {Clause}")
+        elif (Result is None and PreviousIntent and PreviousIntent not in ChainableIntents | {"system", "exit"}
+              and len(Clause.split()) <= 2 and Clause.split()[0] not in RequestWords):
+            #"play rock and roll" -> a short trailing clause is part of the previous argument
+            Decision[-1] = f"{Decision[-1]} and {Clause}"
+            continue
+
+        if Result is None:
+            if Record:
+                Stats.record(None)
+            return None
+
+        PreviousIntent, Task = Result
+        Decision.append(Task)
+
+    if Record:
+        Stats.record(Decision)
+    return Decision
+
+
+class RemoteSpeculation:
+    """A remote decision started on a partial transcript; its tasks are queued as they arrive"""
+
+    def __init__(self, Text: str):
+        self.text = Text
+        self.cancelled = threading.Event()
+        self.tasks = queue.Queue()
+
+    def run(self, Remote, Query: str):
+        try:
+            for Task in Remote(Query, self.cancelled):
+                if self.cancelled.is_set():
+                    break
+                self.tasks.put(Task)
+        except Exception as e:
+            print(f"Error in speculative decision: {e}")
+        finally:
+            self.tasks.put(None)
+
+    def __iter__(self):
+        while True:
+            Task = self.tasks.get()
+            if Task is None:
+                return
+            yield Task
+
+
+class Speculator:
+    """Starts deciding while the user is still speaking.
+
+    ``feed()`` every partial transcript; ``resolve()`` the final one. The fast
+    path runs on each partial, so when the final transcript is the last
+    partial (the usual case) a local decision is already made.
+
+    With ``Remote(Query, Cancelled)`` (a task generator such as
+    model.SpeculativeDecisionStream), a partial the fast path cannot decide
+    that stays unchanged for ``Settle`` seconds is sent to the remote model
+    right away. ``take()`` hands that request over when the final transcript
+    matches; a request for words the user went on to change is cancelled.
+    """
+
+    def __init__(self, Remote=None, Settle: float = 0.35):
+        self.Remote = Remote
+        self.Settle = Settle
+        self._lock = threading.Lock()
+        self._timer = None
+        self._speculation = None
+        self.text = None
+        self.decision = None
+        self.partials = 0
+        self.hits = 0
+        self.misses = 0
+        self.remote_started = 0
+        self.remote_used = 0
+        self.remote_cancelled = 0
+
+    def _discard(self, Text: str):
+        """Stop waiting to speculate and cancel a remote request for anything but ``Text`` (caller holds the lock)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._speculation is not None and self._speculation.text != Text:
+            self._speculation.cancelled.set()
+            self._speculation = None
+            self.remote_cancelled += 1
+
+    def feed(self, Partial: str):
+        Text = NormalizeUtterance(Partial or "")
+        with self._lock:
+            self.partials += 1
+            if Text == self.text:
+                return
+        Decision = LocalDecision(Partial, Record=False)
+        with self._lock:
+            self.text, self.decision = Text, Decision
+            self._discard(Text)
+            if Decision is None and Text and self.Remote is not None:
+                self._timer = threading.Timer(self.Settle, self._speculate, (Partial, Text))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _speculate(self, Partial: str, Text: str):
+        with self._lock:
+            if Text != self.text or self._speculation is not None:
+                return
+            self._timer = None
+            Speculation = self._speculation = RemoteSpeculation(Text)
+            self.remote_started += 1
+        Speculation.run(self.Remote, Partial)
+
+    def resolve(self, Query: str):
+        """Same result as ``LocalDecision(Query)``, reusing the speculative decision when it matches"""
+        Text = NormalizeUtterance(Query or "")
+        with self._lock:
+            self._discard(Text)
+            Matched = Text == self.text
+            Decision = list(self.decision) if Matched and self.decision is not None else None
+        if not Matched:
+            self.misses += 1
+            return LocalDecision(Query)
+        self.hits += 1
+        Stats.record(Decision)
+        return Decision
+
+    def take(self, Query: str):
+        """The tasks of the remote request already started for ``Query``, or None if there is none"""
+        Text = NormalizeUtterance(Query or "")
+        with self._lock:
+            self._discard(Text)
+            Speculation, self._speculation = self._speculation, None
+            if Speculation is None:
+                return None
+            self.remote_used += 1
+        return iter(Speculation)
+
+
+def GetFastPathStats() -> dict:
+    return Stats.snapshot()
+
+
+if __name__ == "__main__":
+    while True:
+        print(LocalDecision(input(">>> ")), GetFastPathStats())
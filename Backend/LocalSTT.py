@@ -0,0 +1,177 @@
+#It implements an offline streaming speech recognizer: PCM audio is fed in small chunks to a local engine (Vosk when installed) that reports partial transcripts while the user is speaking and a final transcript at the end of the utterance.
+
+import io
+import json
+import time
+import wave
+import threading
+from dotenv import dotenv_values
+from Backend.stt import Recognizer
+
+env_vars = dotenv_values(".env")
+LocalSTTModel = env_vars.get("LocalSTTModel")  #Path to an unpacked Vosk model
+
+SampleRate = 16000
+ChunkMs = 100  #Audio handed to the engine per step; also the partial-transcript cadence
+
+
+class VoskEngine:
+    """Vosk/Kaldi streaming recognizer (16-bit mono PCM in)"""
+
+    def __init__(self, model_path: str = LocalSTTModel, sample_rate: int = SampleRate):
+        from vosk import Model, KaldiRecognizer
+        self.recognizer = KaldiRecognizer(Model(model_path), sample_rate)
+
+    def accept(self, pcm: bytes):
+        """Feed one chunk; returns (text, final)"""
+        if self.recognizer.AcceptWaveform(pcm):
+            return json.loads(self.recognizer.Result()).get("text", ""), True
+        return json.loads(self.recognizer.PartialResult()).get("partial", ""), False
+
+    def flush(self) -> str:
+        return json.loads(self.recognizer.FinalResult()).get("text", "")
+
+    def reset(self):
+        self.recognizer.Reset()
+
+
+class ScriptedEngine:
+    """Offline stand-in for tests: reveals a fixed transcript one word per ``chunks_per_word`` chunks as partials,
+    then reports it as final one word-length later (the end-of-utterance pause)"""
+
+    def __init__(self, transcript: str, chunks_per_word: int = 1):
+        self.words = transcript.split()
+        self.chunks_per_word = chunks_per_word
+        self.reset()
+
+    def accept(self, pcm: bytes):
+        self.chunks += 1
+        step = self.chunks // self.chunks_per_word
+        text = " ".join(self.words[:step])
+        return text, step > len(self.words)
+
+    def flush(self) -> str:
+        return " ".join(self.words)
+
+    def reset(self):
+        self.chunks = 0
+
+
+class PcmSource:
+    """Chunks of an in-memory 16-bit mono PCM buffer; ``realtime`` paces them like a live microphone"""
+
+    def __init__(self, pcm: bytes, sample_rate: int = SampleRate, chunk_ms: int = ChunkMs, realtime: bool = False):
+        self.pcm = pcm
+        self.chunk_bytes = int(sample_rate * chunk_ms / 1000) * 2
+        self.chunk_seconds = chunk_ms / 1000
+        self.realtime = realtime
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for offset in range(0, len(self.pcm), self.chunk_bytes):
+            if self.closed.is_set():
+                return
+            if self.realtime:
+                self.closed.wait(self.chunk_seconds)
+            yield self.pcm[offset:offset + self.chunk_bytes]
+
+    def close(self):
+        self.closed.set()
+
+
+class WavFileSource(PcmSource):
+    """A 16-bit mono WAV file as a chunked PCM source"""
+
+    def __init__(self, path, chunk_ms: int = ChunkMs, realtime: bool = False):
+        with wave.open(path if isinstance(path, str) else io.BytesIO(path), "rb") as clip:
+            rate = clip.getframerate()
+            pcm = clip.readframes(clip.getnframes())
+        super().__init__(pcm, rate, chunk_ms, realtime)
+
+
+class MicrophoneSource:
+    """Live microphone through sounddevice, in ``chunk_ms`` blocks"""
+
+    def __init__(self, sample_rate: int = SampleRate, chunk_ms: int = ChunkMs):
+        import sounddevice
+        self.stream = sounddevice.RawInputStream(samplerate=sample_rate, blocksize=int(sample_rate * chunk_ms / 1000),
+                                                 channels=1, dtype="int16")
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        self.stream.start()
+        try:
+            while not self.closed.is_set():
+                data, _ = self.stream.read(self.stream.blocksize)
+                yield bytes(data)
+        finally:
+            self.stream.stop()
+
+    def close(self):
+        self.closed.set()
+
+
+class LocalRecognizer(Recognizer):
+    """Streams audio from ``source_factory()`` through ``engine`` and reports partial and final transcripts.
+
+    Recognition latency only depends on the local engine: partials arrive
+    every chunk, and the final transcript as soon as the engine detects the
+    end of the utterance.
+    """
+
+    def __init__(self, engine=None, source_factory=None):
+        super().__init__()
+        self.engine = engine or VoskEngine()
+        self.source_factory = source_factory or MicrophoneSource
+        self.source = None
+        self.stopped = threading.Event()
+        self.worker = None
+        self.first_partial_at = None
+        self.final_at = None
+        self.started_at = None
+
+    def start(self):
+        if self.worker is not None:
+            self.worker.join()
+        self.stopped.clear()
+        self.started_at = time.perf_counter()
+        self.first_partial_at = None
+        self.final_at = None
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.source is not None:
+            self.source.close()
+
+    def _final(self, Text):
+        self.final_at = time.perf_counter()
+        self.on_result(Text, True)
+
+    def _run(self):
+        try:
+            self.engine.reset()
+            self.source = self.source_factory()
+            Last = ""
+            for Chunk in self.source:
+                if self.stopped.is_set():
+                    return
+                Text, Final = self.engine.accept(Chunk)
+                if Final and Text:
+                    self._final(Text)
+                    return
+                if Text and Text != Last:
+                    Last = Text
+                    if self.first_partial_at is None:
+                        self.first_partial_at = time.perf_counter()
+                    self.on_result(Text, False)
+            #The audio ended mid-utterance
+            Text = self.engine.flush()
+            if Text and not self.stopped.is_set():
+                self._final(Text)
+        except Exception as e:
+            print(f"Error in local speech recognition: {e}")
+        finally:
+            if self.source is not None:
+                self.source.close()
@@ -0,0 +1,103 @@
+#It provides the shared Groq/Cohere clients for the whole backend: blocking clients for the desktop assistant, and async clients on one pooled keep-alive HTTP connection pool with a concurrency limit for the API server.
+
+import asyncio
+import threading
+import weakref
+import httpx
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+
+GroqAPIKey = env_vars.get("GroqAPIKey")
+CohereAPIKey = env_vars.get("CohereAPIKey")
+
+MaxConnections = int(env_vars.get("ProviderMaxConnections") or 20)
+MaxKeepAlive = int(env_vars.get("ProviderKeepAlive") or 10)  #Idle connections kept open for reuse
+MaxConcurrency = int(env_vars.get("ProviderConcurrency") or 16)  #In-flight provider calls per event loop
+RequestTimeout = float(env_vars.get("ProviderTimeout") or 60.0)  #Seconds
+
+
+def PoolLimits() -> httpx.Limits:
+    return httpx.Limits(max_connections=MaxConnections, max_keepalive_connections=MaxKeepAlive, keepalive_expiry=30.0)
+
+
+_Clients = {}
+_ClientsLock = threading.Lock()
+
+def _shared(name: str, factory):
+    with _ClientsLock:
+        if name not in _Clients:
+            _Clients[name] = factory()
+        return _Clients[name]
+
+
+def GetGroqClient():
+    """Blocking Groq client shared by every module (retries are handled by ResilientCall)"""
+    from groq import Groq
+    return _shared("groq", lambda: Groq(
+        api_key=GroqAPIKey,
+        max_retries=0,
+        http_client=httpx.Client(limits=PoolLimits(), timeout=RequestTimeout)
+    ))
+
+
+def GetCohereClient():
+    """Blocking Cohere client shared by every module (retries are handled by ResilientCall)"""
+    import cohere
+    return _shared("cohere", lambda: cohere.Client(
+        api_key=CohereAPIKey,
+        max_retries=0,
+        httpx_client=httpx.Client(limits=PoolLimits(), timeout=RequestTimeout)
+    ))
+
+
+class AsyncProviders:
+    """Async Groq and Cohere clients for one event loop.
+
+    Both SDKs send their requests through the same ``httpx.AsyncClient``, so
+    connections are pooled and kept alive across chats. ``limit`` caps how
+    many provider calls run at once; callers hold it for the duration of a
+    single attempt.
+    """
+
+    def __init__(self):
+        self.http = httpx.AsyncClient(limits=PoolLimits(), timeout=RequestTimeout)
+        self.limit = asyncio.Semaphore(MaxConcurrency)
+        self._groq = None
+        self._cohere = None
+
+    @property
+    def groq(self):
+        if self._groq is None:
+            from groq import AsyncGroq
+            self._groq = AsyncGroq(api_key=GroqAPIKey, max_retries=0, http_client=self.http)
+        return self._groq
+
+    @property
+    def cohere(self):
+        if self._cohere is None:
+            import cohere
+            self._cohere = cohere.AsyncClient(api_key=CohereAPIKey, max_retries=0, httpx_client=self.http)
+        return self._cohere
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+#httpx.AsyncClient and asyncio.Semaphore belong to the loop they were created on
+_AsyncProviders = weakref.WeakKeyDictionary()
+
+def GetAsyncProviders() -> AsyncProviders:
+    """The async clients of the running event loop (created on first use)"""
+    loop = asyncio.get_running_loop()
+    providers = _AsyncProviders.get(loop)
+    if providers is None:
+        providers = _AsyncProviders[loop] = AsyncProviders()
+    return providers
+
+
+async def CloseAsyncProviders():
+    """Close the pooled connections of the running event loop (e.g. on server shutdown)"""
+    providers = _AsyncProviders.pop(asyncio.get_running_loop(), None)
+    if providers is not None:
+        await providers.aclose()
@@ -1,10 +1,14 @@
 #It implements a real-time search engine that performs Google searches, integrates results into a chatbot conversation using the Groq API, and returns formatted answers. It also manages chat logs and real-time date/time info.
 
 from googlesearch import search
-from groq import Groq
-from json import load, dump
+import asyncio
 import datetime
 from dotenv import dotenv_values
+from Backend.ChatLogStore import GetChatLogStore
+from Backend.ContextWindow import GetContextWindow
+from Backend.ConversationSummary import GetRollingSummary
+from Backend.Resilience import ResilientCall, ResilientStream, AsyncResilientCall, AsyncResilientStream
+from Backend.Providers import GetGroqClient, GetAsyncProviders
 
 env_vars = dotenv_values(".env")
 
@@ -12,18 +16,17 @@ Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-client = Groq(api_key = GroqAPIKey)
+client = GetGroqClient()
+
+ErrorAnswer = "Sorry, I couldn't fetch an answer right now. Please try again in a moment."
 
 System = f"""Hello, I am {Username}, You are a very accurate and advanced AI chatbot named {Assistantname} which has real-time up-to-date information from the internet.
 *** Provide Answers In a Professional Way, make sure to add full stops, commas, question marks, and use proper grammar.***
 *** Just answer the question from the provided data in a professional way. ***"""
 
-try:
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)
-except:
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([],f)
+ChatLog = GetChatLogStore()
+Context = GetContextWindow()
+Summary = GetRollingSummary(ChatLog)
 
 def GoogleSearch(query):
     results = list(search(query, advanced=True, num_results=5))
@@ -64,48 +67,124 @@ def Information():
     data += f"Time: {hour} hours: {minute} minutes: {second} seconds.\n"
     return data
 
-#Function to handle reaal-time search and response generation.
-def RealtimeSearchEngine(prompt):
-    global SystemChatBot, messages
-
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)
-    messages.append({"role": "user", "content": f"{prompt}"})
-
-    #Add Google search result to the system chatbot messages.
-    SystemChatBot.append({"role": "system", "content": GoogleSearch(prompt)})
-
-    completion = client.chat.completions.create(
-            model = "llama3-70b-8192",
-            messages = SystemChatBot + [{"role": "system", "content": Information()}] + messages,
-            max_tokens = 1024,
-            temperature=0.7,
-            top_p=1,
-            stream=True,
-            stop = None
-        )
-        
-    Answer = ""   #Initialize empty string to store AI's response
-
-
-    #Process the streamed response chunks
-    for chunk in completion:
-        if chunk.choices[0].delta.content:   #Check if there's content in the current chunk
-            Answer += chunk.choices[0].delta.content   #Append the content from the response
-
+#Build the prompt from the search results and either the local chat log or the caller's History
+def PrepareMessages(prompt, Results, History=None):
+    UserMessage = {"role": "user", "content": f"{prompt}"}
+
+    #Add Google search result to this request's system messages (a copy, so a failed call leaves nothing behind)
+    SystemMessages = SystemChatBot + [{"role": "system", "content": Results}, {"role": "system", "content": Information()}]
+
+    if History is None:
+        messages = Summary.build(Context, ChatLog, SystemMessages, [UserMessage])
+    else:
+        messages = Context.build(SystemMessages, list(History) + [UserMessage])
+    return UserMessage, messages
+
+def CompletionRequest(messages):
+    return dict(
+        model = "llama3-70b-8192",
+        messages = messages,
+        max_tokens = 1024,
+        temperature=0.7,
+        top_p=1,
+        stream=True,
+        stop = None
+    )
+
+def FinishAnswer(UserMessage, Answer, History=None):
     Answer = Answer.strip().replace("</s>", "")  #Clean up any unwanted tokens from the response
 
-    #Append the chatbot's response to the message list
-    messages.append({"role": "assistant", "content": Answer})
-
-    #Save the updated chat log to the JSON file
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump(messages,f,indent=4)
+    #Append this turn to the chat log
+    if History is None:
+        ChatLog.extend([UserMessage, {"role": "assistant", "content": Answer}])
     
-    #Remove the most recent system message from the  chatbot conversation
-    SystemChatBot.pop()
     return AnswerModifier(Answer = Answer)
 
+#Function to handle reaal-time search and response generation.
+#If History is given (e.g. an API chat session) it replaces the local chat log and nothing is persisted.
+def RealtimeSearchEngine(prompt, History=None):
+    UserMessage, messages = PrepareMessages(prompt, GoogleSearch(prompt), History)
+
+    def Complete():
+        completion = client.chat.completions.create(**CompletionRequest(messages))
+            
+        Answer = ""   #Initialize empty string to store AI's response
+
+        #Process the streamed response chunks
+        for chunk in completion:
+            if chunk.choices[0].delta.content:   #Check if there's content in the current chunk
+                Answer += chunk.choices[0].delta.content   #Append the content from the response
+        return Answer
+
+    try:
+        Answer = ResilientCall("groq", Complete)
+    except Exception as e:
+        print(f"Error: {e}")
+        return ErrorAnswer
+
+    return FinishAnswer(UserMessage, Answer, History)
+
+#Streaming version for the voice assistant: yields tokens as they arrive so speech can start early
+def RealtimeSearchEngineStream(prompt, History=None):
+    UserMessage, messages = PrepareMessages(prompt, GoogleSearch(prompt), History)
+    Answer = ""
+
+    try:
+        for chunk in ResilientStream("groq", lambda: client.chat.completions.create(**CompletionRequest(messages))):
+            if chunk.choices and chunk.choices[0].delta.content:
+                Answer += chunk.choices[0].delta.content
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        print(f"Error: {e}")
+        if not Answer:
+            yield ErrorAnswer
+        return
+
+    FinishAnswer(UserMessage, Answer, History)
+
+#Async version for the API server; the blocking Google search runs on a worker thread
+async def RealtimeSearchEngineAsync(prompt, History=None):
+    try:
+        Results = await asyncio.to_thread(GoogleSearch, prompt)
+    except Exception as e:
+        print(f"Error: {e}")
+        return ErrorAnswer
+    UserMessage, messages = PrepareMessages(prompt, Results, History)
+    providers = GetAsyncProviders()
+
+    async def Complete():
+        async with providers.limit:
+            completion = await providers.groq.chat.completions.create(**CompletionRequest(messages))
+
+            Answer = ""
+            async for chunk in completion:
+                if chunk.choices[0].delta.content:
+                    Answer += chunk.choices[0].delta.content
+            return Answer
+
+    try:
+        Answer = await AsyncResilientCall("groq", Complete)
+    except Exception as e:
+        print(f"Error: {e}")
+        return ErrorAnswer
+
+    return FinishAnswer(UserMessage, Answer, History)
+
+#Streaming version: yields the answer token by token, then records the finished turn.
+#A failed search or provider call is raised to the caller, so a partial or missing answer is never stored as a reply
+async def RealtimeSearchEngineStreamAsync(prompt, History=None):
+    Results = await asyncio.to_thread(GoogleSearch, prompt)
+    UserMessage, messages = PrepareMessages(prompt, Results, History)
+    providers = GetAsyncProviders()
+    Answer = ""
+
+    async for chunk in AsyncResilientStream("groq", lambda: providers.groq.chat.completions.create(**CompletionRequest(messages)), Limit=providers.limit):
+        if chunk.choices and chunk.choices[0].delta.content:
+            Answer += chunk.choices[0].delta.content
+            yield chunk.choices[0].delta.content
+
+    FinishAnswer(UserMessage, Answer, History)
+
 
 if __name__ == "__main__":
     while True:
@@ -0,0 +1,74 @@
+#It turns a FirstLayerDMM reminder task ("reminder 9:00pm 25th june business meeting") into the date, time and message a calendar event needs.
+
+import re
+from datetime import datetime, timedelta
+from Backend.FastPath import Months, TimePattern, DatePattern, ReminderFiller
+
+MonthNumbers = {Month: Number for Number, Month in enumerate(
+    ("january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"), start=1)}
+
+
+def ParseTime(Text: str):
+    """(hour, minute) of "5pm", "9:30 am" or "17:30"; None if it is not a valid time"""
+    Match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s?(am|pm)?", Text.strip())
+    if not Match:
+        return None
+    Hour, Minute, Half = int(Match.group(1)), int(Match.group(2) or 0), Match.group(3)
+    if Half:
+        if not 1 <= Hour <= 12:
+            return None
+        Hour = Hour % 12 + (12 if Half == "pm" else 0)
+    if Hour > 23 or Minute > 59:
+        return None
+    return Hour, Minute
+
+
+def ParseDate(Text: str, Now: datetime):
+    """The date of "25th june", "june 25", "today", "tonight" or "tomorrow"; None if it is not a valid date"""
+    if Text in ("today", "tonight"):
+        return Now.date()
+    if Text == "tomorrow":
+        return (Now + timedelta(days=1)).date()
+    Day = int(re.search(r"\d{1,2}", Text).group(0))
+    Month = MonthNumbers[re.search(Months, Text).group(0)]
+    for Year in (Now.year, Now.year + 1):
+        try:
+            Date = datetime(Year, Month, Day).date()
+        except ValueError:
+            return None
+        if Date >= Now.date():
+            return Date
+    return None
+
+
+def ParseReminderTask(Task: str, Now: datetime = None):
+    """(when, message) for a "reminder <time> [<date>] <message>" task, or None if it has no usable time.
+
+    Without a date the next occurrence of the time is used (today, or tomorrow
+    if it has passed); a day and month that have passed this year mean next year.
+    """
+    Now = Now or datetime.now()
+    Body = Task.lower().removeprefix("reminder").strip()
+
+    TimeMatch = TimePattern.search(Body)
+    Time = ParseTime(TimeMatch.group(0)) if TimeMatch else None
+    if Time is None:
+        return None
+    DateMatch = DatePattern.search(Body)
+    if DateMatch:
+        Date = ParseDate(DateMatch.group(0), Now)
+        if Date is None:
+            return None
+        When = datetime.combine(Date, datetime.min.time()).replace(hour=Time[0], minute=Time[1])
+    else:
+        When = Now.replace(hour=Time[0], minute=Time[1], second=0, microsecond=0)
+        if When <= Now:
+            When += timedelta(days=1)
+
+    Message = Body
+    for Part in (TimeMatch, DateMatch):
+        if Part:
+            Message = Message.replace(Part.group(0), " ", 1)
+    Message = re.sub(r"\s+", " ", ReminderFiller.sub(" ", Message)).strip(" ,")
+    return When, Message or "Reminder"
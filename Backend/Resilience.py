@@ -0,0 +1,269 @@
+#It wraps every Groq/Cohere call in a shared resilience layer: a capped number of attempts, exponential backoff with jitter, a circuit breaker per provider, and latency/failure metrics.
+
+import time
+import random
+import asyncio
+import inspect
+import threading
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+
+MaxAttempts = int(env_vars.get("ProviderMaxAttempts") or 3)
+BaseDelay = float(env_vars.get("ProviderBaseDelay") or 0.5)  #Seconds
+MaxDelay = float(env_vars.get("ProviderMaxDelay") or 8.0)
+FailureThreshold = int(env_vars.get("ProviderFailureThreshold") or 5)  #Consecutive failures that open the circuit
+ResetTimeout = float(env_vars.get("ProviderResetTimeout") or 30.0)  #Seconds before a trial call is let through
+
+
+class ProviderUnavailable(Exception):
+    """Raised without calling the provider while its circuit is open"""
+
+
+def IsRetryable(error) -> bool:
+    """Client errors (bad request, auth, ...) will not succeed on retry; timeouts, rate limits and 5xx might"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in (408, 409, 429)
+    return True
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures -> half-open after ``reset_timeout``"""
+
+    def __init__(self, failure_threshold: int = FailureThreshold, reset_timeout: float = ResetTimeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+            if self.state == "half-open" and not self._trial_running:
+                #Let exactly one trial call through
+                self._trial_running = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class ProviderMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, error=None):
+        with self._lock:
+            self.calls += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if error is None:
+                self.successes += 1
+            else:
+                self.failures += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+
+    def count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "successes": self.successes,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "avg_latency": self.total_latency / self.calls if self.calls else 0.0,
+                "max_latency": self.max_latency,
+                "last_error": self.last_error,
+            }
+
+
+_Breakers = {}
+_Metrics = {}
+_RegistryLock = threading.Lock()
+
+def _provider(name: str):
+    with _RegistryLock:
+        if name not in _Breakers:
+            _Breakers[name] = CircuitBreaker()
+            _Metrics[name] = ProviderMetrics()
+        return _Breakers[name], _Metrics[name]
+
+
+def BackoffDelay(attempt: int, base: float = BaseDelay, cap: float = MaxDelay) -> float:
+    """Full-jitter exponential backoff for the given (0-based) retry number"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def ResilientCall(Provider: str, Function, *args, Attempts: int = MaxAttempts, **kwargs):
+    """Call ``Function(*args, **kwargs)`` with retries, backoff and the provider's circuit breaker"""
+    breaker, metrics = _provider(Provider)
+    error = None
+
+    for attempt in range(Attempts):
+        if not breaker.allow():
+            metrics.count("rejected")
+            raise ProviderUnavailable(f"{Provider} circuit is open") from error
+
+        started = time.perf_counter()
+        try:
+            result = Function(*args, **kwargs)
+        except Exception as e:
+            error = e
+            metrics.record(time.perf_counter() - started, e)
+            if not IsRetryable(e):
+                #The request itself is wrong; the provider is healthy
+                breaker.success()
+                raise
+            breaker.failure()
+            if attempt + 1 < Attempts:
+                metrics.count("retries")
+                time.sleep(BackoffDelay(attempt))
+            continue
+
+        metrics.record(time.perf_counter() - started)
+        breaker.success()
+        return result
+
+    raise error
+
+
+def ResilientStream(Provider: str, Factory, Attempts: int = MaxAttempts):
+    """Yield the items of ``Factory()`` (a streaming response), retrying until the first item arrives.
+
+    Once an item has been handed to the caller a retry would duplicate it, so
+    later errors are recorded and re-raised instead.
+    """
+    def Open():
+        iterator = iter(Factory())
+        try:
+            return iterator, next(iterator)
+        except StopIteration:
+            return iterator, None
+
+    iterator, first = ResilientCall(Provider, Open, Attempts=Attempts)
+    if first is None:
+        return
+    yield first
+
+    breaker, metrics = _provider(Provider)
+    started = time.perf_counter()
+    try:
+        yield from iterator
+    except Exception as e:
+        metrics.record(time.perf_counter() - started, e)
+        breaker.failure()
+        raise
+
+
+async def AsyncResilientCall(Provider: str, Function, *args, Attempts: int = MaxAttempts, **kwargs):
+    """Async ``ResilientCall``: awaits ``Function(*args, **kwargs)`` and sleeps between attempts without blocking the loop"""
+    breaker, metrics = _provider(Provider)
+    error = None
+
+    for attempt in range(Attempts):
+        if not breaker.allow():
+            metrics.count("rejected")
+            raise ProviderUnavailable(f"{Provider} circuit is open") from error
+
+        started = time.perf_counter()
+        try:
+            result = await Function(*args, **kwargs)
+        except Exception as e:
+            error = e
+            metrics.record(time.perf_counter() - started, e)
+            if not IsRetryable(e):
+                breaker.success()
+                raise
+            breaker.failure()
+            if attempt + 1 < Attempts:
+                metrics.count("retries")
+                await asyncio.sleep(BackoffDelay(attempt))
+            continue
+
+        metrics.record(time.perf_counter() - started)
+        breaker.success()
+        return result
+
+    raise error
+
+
+async def AsyncResilientStream(Provider: str, Factory, Attempts: int = MaxAttempts, Limit=None):
+    """Async ``ResilientStream``: ``Factory()`` returns (or resolves to) an async iterable.
+
+    ``Limit`` (e.g. the providers' semaphore) is held only while an attempt
+    opens the stream, not during backoff or while the caller consumes items.
+    """
+    async def OpenStream():
+        stream = Factory()
+        if inspect.isawaitable(stream):
+            stream = await stream
+        iterator = stream.__aiter__()
+        try:
+            return iterator, await iterator.__anext__()
+        except StopAsyncIteration:
+            return iterator, None
+
+    async def Open():
+        if Limit is None:
+            return await OpenStream()
+        async with Limit:
+            return await OpenStream()
+
+    iterator, first = await AsyncResilientCall(Provider, Open, Attempts=Attempts)
+    if first is None:
+        return
+    yield first
+
+    breaker, metrics = _provider(Provider)
+    started = time.perf_counter()
+    try:
+        async for item in iterator:
+            yield item
+    except Exception as e:
+        metrics.record(time.perf_counter() - started, e)
+        breaker.failure()
+        raise
+
+
+def GetProviderMetrics() -> dict:
+    """Per-provider call metrics and circuit state"""
+    with _RegistryLock:
+        names = list(_Breakers)
+    report = {}
+    for name in names:
+        breaker, metrics = _provider(name)
+        report[name] = dict(metrics.snapshot(), circuit=breaker.state)
+    return report
@@ -0,0 +1,202 @@
+#It implements a content-addressed cache of synthesized speech: audio is stored under a hash of (text, voice, pitch, rate) in memory and on disk, both bounded by size with LRU eviction, so repeated phrases play without calling the synthesizer.
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+
+SpeechCacheDirectory = os.path.join("Data", "SpeechCache")
+SpeechCacheSize = int(float(env_vars.get("SpeechCacheSize") or 64) * 1024 * 1024)  #Disk budget, given in MB
+SpeechMemorySize = 8 * 1024 * 1024  #Bytes of audio kept in memory
+
+
+def SpeechKey(Text: str, Voice: str, Pitch: str, Rate: str) -> str:
+    Material = "\x1f".join([Text.strip(), Voice or "", Pitch or "", Rate or ""])
+    return hashlib.sha256(Material.encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    """Two-level LRU cache of audio clips: an in-memory dict in front of one file per clip"""
+
+    def __init__(self, directory: str = SpeechCacheDirectory, max_bytes: int = SpeechCacheSize,
+                 memory_bytes: int = SpeechMemorySize, extension: str = "mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.extension = extension
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._memory = OrderedDict()  #key -> audio
+        self._memory_used = 0
+        self._disk = OrderedDict()  #key -> size, least recently used first
+        self._disk_used = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{self.extension}")
+
+    def _scan(self):
+        """Rebuild the disk index, oldest access first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(f".{self.extension}"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len(self.extension) - 1], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._disk
+
+    def get(self, key: str):
+        """Return the cached audio for ``key`` or None"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.hits += 1
+                return audio
+            if key not in self._disk:
+                self.misses += 1
+                return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+            os.utime(self._path(key))  #Keep the LRU order across restarts
+        except OSError:
+            with self._lock:
+                self._disk_used -= self._disk.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, audio)
+            self.hits += 1
+            self.disk_hits += 1
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        temp = self._path(key) + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(audio)
+        os.replace(temp, self._path(key))
+
+        evicted = []
+        with self._lock:
+            self._disk_used += len(audio) - self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            self._remember(key, audio)
+            while self._disk_used > self.max_bytes and len(self._disk) > 1:
+                old, size = self._disk.popitem(last=False)
+                self._disk_used -= size
+                self._memory_used -= len(self._memory.pop(old, b""))
+                self.evictions += 1
+                evicted.append(old)
+
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "clips": len(self._disk),
+                "disk_bytes": self._disk_used,
+                "memory_bytes": self._memory_used,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class CachedSynthesizer:
+    """Wraps a synthesizer (e.g. EdgeSynthesizer) so every clip is looked up in a SpeechCache first"""
+
+    def __init__(self, synthesizer, cache: SpeechCache = None):
+        self.synthesizer = synthesizer
+        self.cache = cache or GetSpeechCache()
+        self.format = getattr(synthesizer, "format", "mp3")
+
+    def key(self, text: str) -> str:
+        return SpeechKey(
+            text,
+            getattr(self.synthesizer, "voice", type(self.synthesizer).__name__),
+            getattr(self.synthesizer, "pitch", ""),
+            getattr(self.synthesizer, "rate", "")
+        )
+
+    def synthesize(self, text: str) -> bytes:
+        key = self.key(text)
+        audio = self.cache.get(key)
+        if audio is None:
+            audio = self.synthesizer.synthesize(text)
+            self.cache.put(key, audio)
+        return audio
+
+    def prewarm(self, texts) -> int:
+        """Synthesize every text that is not cached yet; returns how many were synthesized"""
+        made = 0
+        for text in texts:
+            key = self.key(text)
+            if key in self.cache:
+                continue
+            try:
+                self.cache.put(key, self.synthesizer.synthesize(text))
+                made += 1
+            except Exception as e:
+                print(f"Error prewarming speech for '{text}': {e}")
+        return made
+
+
+_DefaultCache = None
+_DefaultCacheLock = threading.Lock()
+
+def GetSpeechCache() -> SpeechCache:
+    global _DefaultCache
+    with _DefaultCacheLock:
+        if _DefaultCache is None:
+            _DefaultCache = SpeechCache()
+        return _DefaultCache
+
+def GetSpeechCacheStats() -> dict:
+    return GetSpeechCache().stats()
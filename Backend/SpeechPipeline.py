@@ -0,0 +1,264 @@
+#It implements a pipelined speech stage: answer text is cut into sentences as it streams in, sentence N+1 is synthesized while sentence N plays, and audio is played from an in-memory queue, so speaking starts after the first sentence instead of after the whole answer.
+
+import io
+import re
+import time
+import wave
+import queue
+import asyncio
+import threading
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+AssistantVoice = env_vars.get("AssistantVoice")
+
+VoicePitch = '+5Hz'
+VoiceRate = '+13%'
+
+#Sentence boundary: terminal punctuation followed by whitespace, or a line break
+SentenceEnd = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def IsLongText(Text: str) -> bool:
+    """The rule TextToSpeech has always used for 'only read the start, the rest is on the chat screen'"""
+    return len(Text.split(".")) > 4 and len(Text) >= 250
+
+
+class SentenceSplitter:
+    """Turns a token stream into sentences; fragments shorter than ``min_chars`` are joined to the next one"""
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str):
+        self.buffer += text
+        parts = SentenceEnd.split(self.buffer)
+        #The last part has no boundary after it yet
+        self.buffer = parts.pop()
+        pending = ""
+        for part in parts:
+            pending = f"{pending} {part}".strip() if pending else part.strip()
+            if len(pending) >= self.min_chars:
+                yield pending
+                pending = ""
+        if pending:
+            self.buffer = f"{pending} {self.buffer}"
+
+    def close(self):
+        rest = self.buffer.strip()
+        self.buffer = ""
+        if rest:
+            yield rest
+
+
+class EdgeSynthesizer:
+    """edge_tts voice; returns MP3 bytes without going through a file"""
+
+    format = "mp3"
+
+    def __init__(self, voice: str = AssistantVoice, pitch: str = VoicePitch, rate: str = VoiceRate):
+        self.voice = voice
+        self.pitch = pitch
+        self.rate = rate
+
+    async def synthesize_async(self, text: str) -> bytes:
+        import edge_tts
+        communicate = edge_tts.Communicate(text, self.voice, pitch=self.pitch, rate=self.rate)
+        audio = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio += chunk["data"]
+        return bytes(audio)
+
+    def synthesize(self, text: str) -> bytes:
+        return asyncio.run(self.synthesize_async(text))
+
+
+class SilenceSynthesizer:
+    """Offline stand-in for testing: WAV silence as long as the text would take to say, after a fake synthesis delay"""
+
+    format = "wav"
+
+    def __init__(self, seconds_per_word: float = 0.25, latency: float = 0.0, sample_rate: int = 8000):
+        self.seconds_per_word = seconds_per_word
+        self.latency = latency
+        self.sample_rate = sample_rate
+
+    def synthesize(self, text: str) -> bytes:
+        time.sleep(self.latency)
+        frames = int(len(text.split()) * self.seconds_per_word * self.sample_rate)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+            out.writeframes(b"\x00\x00" * frames)
+        return buffer.getvalue()
+
+
+class WavClockPlayer:
+    """Offline stand-in player: 'plays' a WAV by waiting for its duration (or until stopped)"""
+
+    def play(self, audio: bytes, stop: threading.Event):
+        with wave.open(io.BytesIO(audio), "rb") as clip:
+            duration = clip.getnframes() / clip.getframerate()
+        stop.wait(duration)
+
+
+class SpeechPipeline:
+    """Speaks text as it arrives.
+
+    ``feed()`` text (e.g. LLM tokens), then ``close()``. A synthesis thread
+    turns sentences into audio up to ``lookahead`` sentences ahead of a
+    playback thread that hands each clip to ``player.play(audio, stop)``.
+
+    With ``long_reply`` set, long answers keep the TextToSpeech behaviour:
+    the first two sentences are spoken, then ``long_reply()`` instead of the
+    rest.
+    """
+
+    def __init__(self, synthesizer=None, player=None, lookahead: int = 2, long_reply=None):
+        self.synthesizer = synthesizer or EdgeSynthesizer()
+        self.player = player or WavClockPlayer()
+        self.long_reply = long_reply
+
+        self.started_at = time.perf_counter()
+        self.first_audio_at = None
+        self.sentences = 0
+        self.synthesis_time = 0.0
+
+        self.stopped = threading.Event()
+        self._done = threading.Event()
+        self._splitter = SentenceSplitter()
+        self._text = ""
+        self._queued = 0
+        self._held = []
+        self._long = False
+        self._closed = False
+
+        self._pending = queue.Queue()
+        self._audio = queue.Queue(maxsize=max(1, lookahead))
+        threading.Thread(target=self._synthesize_loop, daemon=True).start()
+        threading.Thread(target=self._play_loop, daemon=True).start()
+
+    def _queue(self, sentence: str):
+        self._queued += 1
+        self._pending.put(sentence)
+
+    def _sentence(self, sentence: str):
+        if self._long:
+            return
+        if self.long_reply is None or self._queued < 2:
+            self._queue(sentence)
+            return
+        #Hold the rest back until we know whether the answer is long
+        self._held.append(sentence)
+        if IsLongText(self._text):
+            self._long = True
+            self._held = []
+            self._queue(self.long_reply())
+
+    def feed(self, text: str):
+        if self._closed or self.stopped.is_set():
+            return
+        self._text += text
+        for sentence in self._splitter.feed(text):
+            self._sentence(sentence)
+
+    def close(self):
+        """No more text; speak whatever is left"""
+        if self._closed:
+            return
+        self._closed = True
+        for sentence in self._splitter.close():
+            self._sentence(sentence)
+        if self.long_reply is not None and not self._long and IsLongText(self._text):
+            self._long = True
+            self._held = []
+            self._queue(self.long_reply())
+        for sentence in self._held:
+            self._queue(sentence)
+        self._held = []
+        self._pending.put(None)
+
+    def speak(self, text: str):
+        self.feed(text)
+        self.close()
+
+    def stop(self):
+        """Stop speaking now and drop everything not yet played"""
+        self.stopped.set()
+        self._pending.put(None)
+        cancel = getattr(self.player, "cancel", None)  #A PlaybackEngine has to be woken to notice
+        if cancel is not None:
+            cancel(self.stopped)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until everything has been spoken (or the pipeline was stopped)"""
+        return self._done.wait(timeout)
+
+    @property
+    def time_to_first_audio(self):
+        """Seconds from creating the pipeline to the first clip starting to play, or None"""
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.started_at
+
+    def _synthesize_loop(self):
+        while True:
+            sentence = self._pending.get()
+            if sentence is None or self.stopped.is_set():
+                break
+            started = time.perf_counter()
+            try:
+                audio = self.synthesizer.synthesize(sentence)
+            except Exception as e:
+                print(f"Error synthesizing speech: {e}")
+                continue
+            self.synthesis_time += time.perf_counter() - started
+            self.sentences += 1
+            self._audio.put(audio)
+        self._audio.put(None)
+
+    def _play_loop(self):
+        try:
+            while True:
+                audio = self._audio.get()
+                if audio is None:
+                    break
+                if self.stopped.is_set() or not audio:
+                    continue
+                if self.first_audio_at is None:
+                    self.first_audio_at = time.perf_counter()
+                try:
+                    self.player.play(audio, self.stopped)
+                except Exception as e:
+                    print(f"Error playing speech: {e}")
+        finally:
+            self._done.set()
+
+
+def Benchmark(Sentences: int = 6, TokenDelay: float = 0.02, Latency: float = 0.3):
+    """Compare time-to-first-audio of the pipeline with synthesizing the whole answer first"""
+    Text = " ".join(f"This is sentence number {i + 1} of a streamed answer." for i in range(Sentences))
+    Tokens = re.findall(r"\S+\s*", Text)
+    Synthesizer = SilenceSynthesizer(seconds_per_word=0.05, latency=Latency)
+
+    Started = time.perf_counter()
+    for Token in Tokens:
+        time.sleep(TokenDelay)
+    Synthesizer.synthesize(Text)
+    print(f"Whole answer: first audio after {(time.perf_counter() - Started) * 1000:.0f} ms")
+
+    Speech = SpeechPipeline(Synthesizer, WavClockPlayer())
+    for Token in Tokens:
+        time.sleep(TokenDelay)
+        Speech.feed(Token)
+    Speech.close()
+    Speech.wait()
+    print(f"Pipelined:    first audio after {Speech.time_to_first_audio * 1000:.0f} ms ({Speech.sentences} sentences)")
+
+
+if __name__ == "__main__":
+    Benchmark()
@@ -0,0 +1,285 @@
+#It implements a cross-process channel for the assistant's status: the assistant process publishes every status change over a local authenticated socket, and web servers keep a subscriber connection that always holds the latest status and wakes their streaming clients the moment it changes.
+
+import os
+import json
+import time
+import queue
+import secrets
+import threading
+from pathlib import Path
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from dotenv import dotenv_values
+from Backend.EventBus import Bus, StatusTopic
+
+env_vars = dotenv_values(".env")
+
+StatusChannelHost = "127.0.0.1"
+StatusChannelPort = int(env_vars.get("StatusChannelPort") or 6001)
+StatusChannelAddress = (StatusChannelHost, StatusChannelPort)
+#Resolved from the project root, so the assistant and web servers started from other directories share one key
+StatusChannelKeyPath = Path(__file__).resolve().parents[1] / "Data" / "StatusChannel.key"
+MaxMessageBytes = 64 * 1024
+
+#Shared secret for the channel: StatusChannelKey from .env, or a random key generated once per install
+def LoadStatusChannelKey(KeyPath=StatusChannelKeyPath) -> bytes:
+    if env_vars.get("StatusChannelKey"):
+        return env_vars["StatusChannelKey"].encode("utf-8")
+    KeyPath = Path(KeyPath)
+    try:
+        Key = KeyPath.read_text().strip()
+        if Key:
+            return Key.encode("utf-8")
+    except OSError:
+        pass
+    KeyPath.parent.mkdir(parents=True, exist_ok=True)
+    Key = secrets.token_hex(32)
+    try:
+        #Only readable by this user; O_EXCL so two processes starting together agree on one key
+        Descriptor = os.open(KeyPath, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return KeyPath.read_text().strip().encode("utf-8")
+    with os.fdopen(Descriptor, "w") as f:
+        f.write(Key)
+    return Key.encode("utf-8")
+
+_Key = None
+
+#Loaded on first use rather than at import, so importing this module never touches the disk
+def GetStatusChannelKey() -> bytes:
+    global _Key
+    if _Key is None:
+        _Key = LoadStatusChannelKey()
+    return _Key
+
+#Messages travel as JSON bytes; Connection.send()/recv() would pickle, and unpickling runs code
+def SendMessage(connection, message: dict):
+    connection.send_bytes(json.dumps(message).encode("utf-8"))
+
+def ReceiveMessage(connection) -> dict:
+    return json.loads(connection.recv_bytes(MaxMessageBytes).decode("utf-8"))
+
+DefaultStatus = "Available..."
+
+
+def DescribeStatus(Status: str) -> dict:
+    """The status fields the web fronts have always returned"""
+    return {
+        'status': Status,
+        'isListening': Status == 'Listening...',
+        'isThinking': Status == 'Thinking...',
+        'isAnswering': Status == 'Answering...'
+    }
+
+
+class StatusPublisher:
+    """Serves status changes to any number of subscriber processes.
+
+    Every new connection first receives the current status, then each change
+    as a ``{"status", "version", "time"}`` dict. Sending happens on a
+    background thread, so ``publish()`` never blocks the assistant.
+    """
+
+    def __init__(self, address=StatusChannelAddress, authkey: bytes = None):
+        self.address = address
+        self.authkey = authkey or GetStatusChannelKey()
+        self.status = DefaultStatus
+        self.version = 0
+
+        self._connections = []
+        self._outbox = queue.Queue()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def start(self):
+        self._listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._send_loop, daemon=True).start()
+        return self
+
+    def _message(self) -> dict:
+        return {"status": self.status, "version": self.version, "time": time.time()}
+
+    def publish(self, status: str):
+        with self._lock:
+            self.status = status
+            self.version += 1
+            self._outbox.put(self._message())
+
+    def _accept_loop(self):
+        listener = self._listener
+        while True:
+            try:
+                connection = listener.accept()
+            except Exception:
+                if self._listener is None:
+                    return
+                continue  #A client that failed the handshake
+            if self._listener is None:
+                #Closed while accept() was blocked
+                connection.close()
+                return
+            with self._lock:
+                message = self._message()
+                self._connections.append(connection)
+            try:
+                SendMessage(connection, message)
+            except OSError:
+                self._drop(connection)
+
+    def _send_loop(self):
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                return
+            with self._lock:
+                connections = list(self._connections)
+            for connection in connections:
+                try:
+                    SendMessage(connection, message)
+                except OSError:
+                    self._drop(connection)
+
+    def _drop(self, connection):
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+    @property
+    def subscribers(self) -> int:
+        with self._lock:
+            return len(self._connections)
+
+    def close(self):
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+        self._outbox.put(None)
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+
+class StatusSubscriber:
+    """Keeps a connection to the StatusPublisher and the latest status it sent.
+
+    Reconnects every ``retry`` seconds while the assistant is not running;
+    until then ``get()`` reports ``DefaultStatus`` with ``connected`` False.
+    """
+
+    def __init__(self, address=StatusChannelAddress, authkey: bytes = None, retry: float = 1.0):
+        self.address = address
+        self.authkey = authkey or GetStatusChannelKey()
+        self.retry = retry
+
+        self._snapshot = {"status": DefaultStatus, "version": 0, "time": None, "connected": False}
+        self._callbacks = []
+        self._changed = threading.Condition()
+        self._closed = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _update(self, **fields):
+        with self._changed:
+            self._snapshot = dict(self._snapshot, **fields)
+            snapshot = self._snapshot
+            callbacks = list(self._callbacks)
+            self._changed.notify_all()
+        for callback in callbacks:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error delivering status: {e}")
+
+    def _run(self):
+        Rejected = False
+        while not self._closed.is_set():
+            try:
+                connection = Client(self.address, authkey=self.authkey)
+            except AuthenticationError as e:
+                #The assistant runs with another key (e.g. a different StatusChannelKey); keep retrying
+                if not Rejected:
+                    print(f"Status channel rejected the key, retrying every {self.retry} s: {e}")
+                    Rejected = True
+                self._closed.wait(self.retry)
+                continue
+            except OSError:
+                self._closed.wait(self.retry)
+                continue
+            Rejected = False
+            try:
+                while not self._closed.is_set():
+                    message = ReceiveMessage(connection)
+                    #Counted here rather than taken from the publisher, whose count restarts with the assistant
+                    self._update(status=message["status"], version=self._snapshot["version"] + 1,
+                                 time=message["time"], connected=True)
+            except (EOFError, OSError, ValueError, KeyError):
+                pass  #Disconnected, or sent something that is not a status message
+            finally:
+                connection.close()
+            self._update(connected=False)
+
+    def get(self) -> dict:
+        with self._changed:
+            return dict(self._snapshot)
+
+    def wait_for_change(self, version: int, timeout: float = None) -> dict:
+        """Block until the version differs from ``version`` (or ``timeout``); returns the latest snapshot"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._snapshot["version"] != version, timeout)
+            return dict(self._snapshot)
+
+    def subscribe(self, callback):
+        """Call ``callback(snapshot)`` on every update (from the subscriber thread); returns a function that unsubscribes"""
+        with self._changed:
+            self._callbacks.append(callback)
+
+        def unsubscribe():
+            with self._changed:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return unsubscribe
+
+    def close(self):
+        self._closed.set()
+
+
+_Publisher = None
+_Subscriber = None
+_Lock = threading.Lock()
+
+#Publish the assistant's status from this process (called once by the assistant)
+def StartStatusChannel():
+    global _Publisher
+    with _Lock:
+        if _Publisher is None:
+            try:
+                _Publisher = StatusPublisher().start()
+            except OSError as e:
+                print(f"Error starting status channel on port {StatusChannelPort}: {e}")
+                return None
+            Bus.subscribe(StatusTopic, _Publisher.publish)
+            if Bus.get(StatusTopic):
+                _Publisher.publish(Bus.get(StatusTopic))
+        return _Publisher
+
+#The shared subscriber used by the web servers
+def GetStatusSubscriber() -> StatusSubscriber:
+    global _Subscriber
+    with _Lock:
+        if _Subscriber is None:
+            _Subscriber = StatusSubscriber().start()
+        return _Subscriber
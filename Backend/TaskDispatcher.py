@@ -0,0 +1,115 @@
+#It starts the work for each FirstLayerDMM task as soon as the task is decided: automation and image generation run right away on background threads, and conversational tasks are answered in order on a single worker thread (realtime questions are merged into one search, as before streaming).
+
+import time
+import queue
+import threading
+
+#Task prefixes executed by Backend.Automation
+AutomationPrefixes = ("open", "close", "play", "content", "google search", "youtube search", "system", "reminder")
+
+#Task prefixes answered by the chatbot / search engine, in the order they were decided
+ConversationPrefixes = ("general", "realtime", "exit")
+
+
+class TaskDispatcher:
+    """Routes streamed tasks to their handlers without waiting for the full decision.
+
+    ``on_automation(task)`` and ``on_image(task)`` each run on their own
+    thread. ``on_conversation(task)`` runs on one worker thread so answers
+    are shown and spoken one at a time, in decision order.
+
+    A realtime task waits for the rest of the decision, then is answered as
+    one ``realtime`` query together with every general and realtime task
+    still queued behind it, so a search is made once per utterance.
+    """
+
+    def __init__(self, on_automation, on_image, on_conversation):
+        self.on_automation = on_automation
+        self.on_image = on_image
+        self.on_conversation = on_conversation
+
+        self.dispatched = []
+        self.started_at = time.perf_counter()
+        self.first_action_at = None
+
+        self._threads = []
+        self._conversations = None
+        self._worker = None
+        self._decided = threading.Event()  #Set once the decision stream has ended
+
+    def _start(self, handler, task):
+        thread = threading.Thread(target=self._call, args=(handler, task), daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _call(self, handler, task):
+        try:
+            handler(task)
+        except Exception as e:
+            print(f"Error running task '{task}': {e}")
+
+    def _converse(self):
+        pending = []
+        while True:
+            task = pending.pop(0) if pending else self._conversations.get()
+            if task is None:
+                return
+            if task.startswith("realtime"):
+                task, pending = self._merge_realtime(task, pending)
+            self._call(self.on_conversation, task)
+
+    def _merge_realtime(self, task: str, pending: list):
+        """``task`` merged with the general/realtime tasks after it; returns it and the tasks left to run"""
+        self._decided.wait()
+        while True:
+            try:
+                pending.append(self._conversations.get_nowait())
+            except queue.Empty:
+                break
+        queries = [task.removeprefix("realtime").strip()]
+        rest = []
+        for later in pending:
+            if later is not None and later.startswith(("general", "realtime")):
+                queries.append(later.split(" ", 1)[1] if " " in later else "")
+            else:
+                rest.append(later)
+        return "realtime " + " and ".join(query for query in queries if query), rest
+
+    def dispatch(self, task: str):
+        """Start ``task`` immediately (or queue it behind earlier conversational tasks)"""
+        if self.first_action_at is None:
+            self.first_action_at = time.perf_counter()
+        self.dispatched.append(task)
+
+        if task.startswith("generate"):
+            self._start(self.on_image, task)
+        elif task.startswith(AutomationPrefixes):
+            self._start(self.on_automation, task)
+        elif task.startswith(ConversationPrefixes):
+            if self._worker is None:
+                self._conversations = queue.Queue()
+                self._worker = threading.Thread(target=self._converse, daemon=True)
+                self._worker.start()
+            self._conversations.put(task)
+        else:
+            print(f"No handler for task: {task}")
+
+    @property
+    def time_to_first_action(self):
+        """Seconds from creating the dispatcher to dispatching the first task, or None"""
+        if self.first_action_at is None:
+            return None
+        return self.first_action_at - self.started_at
+
+    @property
+    def has_conversation(self) -> bool:
+        return self._worker is not None
+
+    def wait(self):
+        """Call once the decision is complete; blocks until every dispatched task has finished"""
+        self._decided.set()
+        if self._worker is not None:
+            self._conversations.put(None)
+            self._worker.join()
+        for thread in self._threads:
+            thread.join()
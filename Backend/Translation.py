@@ -0,0 +1,132 @@
+#It implements the translation layer for non-English speech: an LRU cache keyed by (text, source language), one shared request for identical concurrent inputs, and a timeout that falls back to the untranslated text instead of keeping the assistant stuck on "Translating...".
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+
+TranslationTimeout = float(env_vars.get("TranslationTimeout") or 3.0)  #Seconds
+TranslationCacheSize = int(env_vars.get("TranslationCacheSize") or 256)
+
+
+class MTranslateTranslator:
+    """Google Translate through mtranslate; the language is detected by the service, so ``source`` only partitions the cache"""
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        import mtranslate as mt
+        return mt.translate(text, target, "auto")
+
+
+class DictionaryTranslator:
+    """Offline stand-in for tests: looks phrases up in a dict (unknown text is returned as is) after an optional delay"""
+
+    def __init__(self, phrases: dict = None, delay: float = 0.0):
+        self.phrases = dict(phrases or {})
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return self.phrases.get(text, text)
+
+
+class TranslationLayer:
+    """Caching, coalescing front for a translator backend.
+
+    ``translate()`` never raises and never waits longer than ``timeout``: on
+    a timeout or error the original text is returned, and a late result
+    still lands in the cache for the next time.
+    """
+
+    def __init__(self, backend=None, max_size: int = TranslationCacheSize, timeout: float = TranslationTimeout, workers: int = 4):
+        self.backend = backend or MTranslateTranslator()
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+        self._cache = OrderedDict()  #(text, source, target) -> translation
+        self._inflight = {}  #(text, source, target) -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+
+    def _fetch(self, key):
+        text, source, target = key
+        try:
+            result = self.backend.translate(text, source, target)
+            with self._lock:
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def translate(self, text: str, source: str = "auto", target: str = "en") -> str:
+        key = (text.strip(), source or "auto", target)
+        if not key[0]:
+            return text
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = self._executor.submit(self._fetch, key)
+            else:
+                #Someone is already translating exactly this; wait for their answer
+                self.coalesced += 1
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            print(f"Translation timed out after {self.timeout}s, using the original text")
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Error translating text: {e}")
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+Translator = TranslationLayer()
+
+def Translate(Text: str, Source: str = "auto", Target: str = "en") -> str:
+    return Translator.translate(Text, Source, Target)
+
+#Swap the translator backend (e.g. a DictionaryTranslator in tests)
+def SetTranslatorBackend(Backend):
+    global Translator
+    Translator = TranslationLayer(Backend)
+
+def GetTranslationStats() -> dict:
+    return Translator.stats()
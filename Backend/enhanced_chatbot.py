@@ -1,9 +1,11 @@
-from groq import Groq
 from json import load, dump
 import datetime
 from dotenv import dotenv_values
 import requests
 from typing import Optional, Dict, Any
+from Backend.ContextWindow import GetContextWindow
+from Backend.Resilience import ResilientCall
+from Backend.Providers import GetGroqClient
 
 env_vars = dotenv_values(".env")
 
@@ -11,7 +13,8 @@ Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-client = Groq(api_key=GroqAPIKey)
+client = GetGroqClient()
+context_window = GetContextWindow()
 
 class EnhancedChatBot:
     def __init__(self, user_data: Dict[str, Any], access_token: str, api_base_url: str = "http://localhost:8000"):
@@ -98,43 +101,72 @@ You have persistent memory about this user and can remember previous conversatio
             # Get memory context
             memory_context = self.get_user_memories()
             
-            # Prepare messages
-            messages = [
-                {"role": "system", "content": self.system_message},
-                {"role": "system", "content": memory_context},
-                {"role": "user", "content": query}
-            ]
-            
-            completion = client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=messages,
-                max_tokens=1024,
-                temperature=0.7,
-                top_p=1,
-                stream=True,
-                stop=None
+            # Prepare messages within the shared token budget
+            messages = context_window.build(
+                [
+                    {"role": "system", "content": self.system_message},
+                    {"role": "system", "content": memory_context}
+                ],
+                [{"role": "user", "content": query}]
             )
             
-            answer = ""
-            for chunk in completion:
-                if chunk.choices[0].delta.content:
-                    answer += chunk.choices[0].delta.content
+            def complete():
+                completion = client.chat.completions.create(
+                    model="llama3-70b-8192",
+                    messages=messages,
+                    max_tokens=1024,
+                    temperature=0.7,
+                    top_p=1,
+                    stream=True,
+                    stop=None
+                )
+                
+                answer = ""
+                for chunk in completion:
+                    if chunk.choices[0].delta.content:
+                        answer += chunk.choices[0].delta.content
+                return answer
+            
+            # Bounded retries with backoff, shared circuit breaker for Groq
+            answer = ResilientCall("groq", complete)
             
             return answer.replace("</s>", "").strip()
             
         except Exception as e:
             return f"Error: {str(e)}"
     
-    def get_chat_sessions(self):
-        """Get user's chat sessions"""
+    def get_chat_sessions(self, limit: int = 50):
+        """Get user's most recent chat sessions (id, title, updated_at and message_count, without messages)"""
         try:
-            response = requests.get(f"{self.api_base_url}/chat/sessions", headers=self.headers)
+            response = requests.get(f"{self.api_base_url}/chat/sessions", params={"limit": limit}, headers=self.headers)
             if response.status_code == 200:
-                return response.json()
+                return response.json()["sessions"]
             return []
         except Exception as e:
             print(f"Error fetching chat sessions: {e}")
             return []
+    
+    def get_session_messages(self, session_id: int, page_size: int = 200):
+        """Get every message of a chat session, oldest first, fetched a page at a time"""
+        messages = []
+        cursor = None
+        try:
+            while True:
+                params = {"limit": page_size}
+                if cursor:
+                    params["cursor"] = cursor
+                response = requests.get(f"{self.api_base_url}/chat/sessions/{session_id}/messages", params=params, headers=self.headers)
+                if response.status_code != 200:
+                    break
+                page = response.json()
+                # Pages go from newest to oldest; each page is oldest first
+                messages[:0] = page["messages"]
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+        except Exception as e:
+            print(f"Error fetching chat messages: {e}")
+        return messages
 
 def RealTimeInformation():
     current_date_time = datetime.datetime.now()
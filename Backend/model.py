@@ -1,6 +1,9 @@
-import cohere  #Library for AI Services
 from rich import print  #Library to enhance terminal outputs
 from dotenv import dotenv_values #To load environment variables from .env file
+from Backend.FastPath import LocalDecision  #Local classifier for unambiguous commands
+from Backend.DecisionCache import Cache as DecisionCache  #Memoized remote decisions
+from Backend.Resilience import ResilientStream, AsyncResilientStream  #Bounded retries, backoff and circuit breaker for provider calls
+from Backend.Providers import GetCohereClient, GetAsyncProviders  #Shared Cohere clients on pooled connections
 
 #Load environment variables from .env file
 env_vars = dotenv_values(".env")
@@ -8,17 +11,14 @@ env_vars = dotenv_values(".env")
 #Retrieve API Key
 CohereAPIKey = env_vars.get("CohereAPIKey")
 
-#Create a Cohere client using provided API KEy
-co = cohere.Client(api_key = CohereAPIKey)
+#Shared Cohere client
+co = GetCohereClient()
 
 #Define a list of recognized function keywords for task categorization
 funcs = [
     "exit","general","realtime","open","close","play","generate image","system","content","google search","youtube search","reminder"
 ]
 
-#Initialize an empty list to store user messages
-messages=[]
-
 #Define the preamble that guides the AI model on how to categorize queries
 preamble = """
 You are a very accurate Decision-Making Model, which decides what kind of a query is given to you.
@@ -56,13 +56,40 @@ ChatHistory = [
     {"role": "Chatbot", "message": "general chat with me"}
 ]
 
-#Define the main function for decision making on queries.
-def FirstLayerDMM(prompt: str = "test"):
-    #Add the user's query
-    messages.append({"role": "user", "content": f"{prompt}"})
-
-    #Create a streaming chat session with the Cohere model
-    stream = co.chat_stream(
+#Incremental parser that turns the streamed DMM text into tasks as soon as each comma arrives
+class DecisionStreamParser:
+    def __init__(self):
+        self.buffer = ""
+
+    def _task(self, text):
+        task = text.strip()
+        #An echoed "(query)" placeholder is not a usable task
+        if "(query)" in task:
+            return None
+        #Keep only tasks that start with a recognized function keyword
+        if any(task.startswith(func) for func in funcs):
+            return task
+        return None
+
+    def feed(self, text):
+        """Add streamed text and yield every task completed by it"""
+        self.buffer += text.replace("\n", "")
+        *complete, self.buffer = self.buffer.split(",")
+        for part in complete:
+            task = self._task(part)
+            if task:
+                yield task
+
+    def close(self):
+        """Yield the last task once the stream has ended"""
+        task = self._task(self.buffer)
+        self.buffer = ""
+        if task:
+            yield task
+
+#Cohere chat parameters shared by the blocking and async decision model
+def DecisionRequest(prompt):
+    return dict(
         model = 'command-r-plus', #Specify the Cohere model to use
         message = prompt, #Pass the user's query
         temperature = 0.7, #Set the creativity level of the model
@@ -71,39 +98,113 @@ def FirstLayerDMM(prompt: str = "test"):
         preamble=preamble #Pass the detailed instruction preamble
     )
 
-    #Initialize an empty string and capture text generation events
-    response = ""
-
-    #Iterate over events in the stream and capture text generation events
-    for event in stream:
-        if event.event_type == "text-generation":
-            response += event.text  #Append generated text to the response
-
-    #Remove newline characters and split responses into individual tasks
-    response = response.replace("\n","")
-    response = response.split(",")
-
-    #Strip leading and trailing whitespaces from each task
-    response = [i.strip() for i in response]
-
-    #nitialize an empty list for filtered valid task
-    temp = []
-
-    #Filter the tasks based on recognized function keywords
-    for task in response:
-        for func in funcs:
-            if task.startswith(func):
-                temp.append(task)  #Add valid tasks to the filtered list
-
-    #Update the response with the filtered list of tasks
-    response = temp
+#Fast path or cached decision for a prompt, or None if the remote model has to decide
+def KnownDecision(prompt, speculation=None):
+    #Resolve unambiguous commands locally and skip the Cohere round-trip (possibly already done on a partial transcript)
+    decision = speculation.resolve(prompt) if speculation is not None else LocalDecision(prompt)
+    if decision is None:
+        #Repeated queries reuse the remote model's earlier decision
+        decision = DecisionCache.get(prompt)
+    return decision
+
+#The remote model's tasks for a prompt, streamed as each one is decided
+#cancelled is an optional threading.Event that abandons the request (used for speculative requests on partial transcripts)
+def RemoteDecisionStream(prompt: str, cancelled=None):
+    #Create a streaming chat session with the Cohere model
+    def OpenStream():
+        return co.chat_stream(**DecisionRequest(prompt))
+
+    parser = DecisionStreamParser()
+    response = []
+    complete = True
+
+    try:
+        #Retried with backoff until the first event arrives; fails fast while the Cohere circuit is open
+        events = ResilientStream("cohere", OpenStream)
+        try:
+            for event in events:
+                if cancelled is not None and cancelled.is_set():
+                    return
+                if event.event_type == "text-generation":
+                    #Hand out each task the moment its trailing comma arrives
+                    for task in parser.feed(event.text):
+                        response.append(task)
+                        yield task
+        finally:
+            events.close()  #Closes the HTTP stream when the request is abandoned
+
+        for task in parser.close():
+            response.append(task)
+            yield task
+    except Exception as e:
+        print(f"Error in decision model: {e}")
+        complete = False
+
+    if not response:
+        #Undecidable (or unreachable model): treat it as a general query, as the preamble instructs
+        yield f"general {prompt}"
+    elif complete:
+        DecisionCache.put(prompt, response)
+
+#Remote decision started on a partial transcript that has stopped changing (see FastPath.Speculator)
+def SpeculativeDecisionStream(prompt: str, cancelled):
+    decision = DecisionCache.get(prompt)
+    if decision is not None:
+        yield from decision
+        return
+    yield from RemoteDecisionStream(prompt, cancelled)
+
+#Generator version of the decision model: yields each task as soon as it is decided
+#speculation is an optional FastPath.Speculator that was fed the partial transcripts of this prompt
+def FirstLayerDMMStream(prompt: str = "test", speculation=None):
+    decision = KnownDecision(prompt, speculation)
+    if decision is not None:
+        yield from decision
+        return
+
+    #The remote decision may already be under way on the last partial transcript
+    early = speculation.take(prompt) if speculation is not None else None
+    yield from early if early is not None else RemoteDecisionStream(prompt)
 
-    #If (query) is in the response, recursively call the function for further clarification
-    if "(query)" in response:
-        newresponse = FirstLayerDMM(prompt=prompt)
-        return newresponse #Returns the clarified response
-    else:
-        return response #Return the filtered response
+#Define the main function for decision making on queries.
+def FirstLayerDMM(prompt: str = "test"):
+    #Collect the streamed tasks into the filtered task list
+    return list(FirstLayerDMMStream(prompt))
+
+#Async generator version for the API server: streams from Cohere on the shared connection pool
+async def FirstLayerDMMStreamAsync(prompt: str = "test"):
+    decision = KnownDecision(prompt)
+    if decision is not None:
+        for task in decision:
+            yield task
+        return
+
+    providers = GetAsyncProviders()
+    parser = DecisionStreamParser()
+    response = []
+    complete = True
+
+    try:
+        async for event in AsyncResilientStream("cohere", lambda: providers.cohere.chat_stream(**DecisionRequest(prompt)), Limit=providers.limit):
+            if event.event_type == "text-generation":
+                for task in parser.feed(event.text):
+                    response.append(task)
+                    yield task
+
+        for task in parser.close():
+            response.append(task)
+            yield task
+    except Exception as e:
+        print(f"Error in decision model: {e}")
+        complete = False
+
+    if not response:
+        yield f"general {prompt}"
+    elif complete:
+        DecisionCache.put(prompt, response)
+
+async def FirstLayerDMMAsync(prompt: str = "test"):
+    return [task async for task in FirstLayerDMMStreamAsync(prompt)]
 
 #Entry point for the script
 if __name__ == "___main__":
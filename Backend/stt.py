@@ -1,13 +1,12 @@
 #It implements speech-to-text functionality using Selenium with a Chrome WebDriver to run a local HTML speech recognition interface. It supports language translation and query formatting.
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import dotenv_values
 import os
-import mtranslate as mt
+import time
+import queue
+import threading
+from Backend.Translation import Translate  #Cached translation with a timeout fallback
+from Backend.EventBus import Bus, StatusTopic
 
 
 env_vars = dotenv_values(".env")
@@ -27,24 +26,67 @@ HtmlCode = '''<!DOCTYPE html>
     <script>
         const output = document.getElementById('output');
         let recognition;
+        let listening = false;
+
+        //Results wait here until Python collects them with nextResults()
+        let pending = [];
+        let waiter = null;
+
+        function deliver(result) {
+            if (waiter) {
+                const w = waiter;
+                waiter = null;
+                clearTimeout(w.timer);
+                w.done([result]);
+            } else {
+                pending.push(result);
+            }
+        }
+
+        //Long-poll used through execute_async_script: answers as soon as a result arrives, or with [] after timeoutMs
+        function nextResults(done, timeoutMs) {
+            if (pending.length) {
+                done(pending.splice(0));
+                return;
+            }
+            waiter = {done: done, timer: setTimeout(function() { waiter = null; done([]); }, timeoutMs)};
+        }
 
         function startRecognition() {
+            pending = [];
+            listening = true;
             recognition = new webkitSpeechRecognition() || new SpeechRecognition();
             recognition.lang = '';
             recognition.continuous = true;
+            recognition.interimResults = true;
 
+            //Interim results are passed on as partial transcripts, finished phrases as final ones
             recognition.onresult = function(event) {
-                const transcript = event.results[event.results.length - 1][0].transcript;
-                output.textContent += transcript;
+                let interim = '';
+                for (let i = event.resultIndex; i < event.results.length; i++) {
+                    const transcript = event.results[i][0].transcript;
+                    if (event.results[i].isFinal) {
+                        output.textContent += transcript;
+                        deliver({text: transcript, final: true});
+                    } else {
+                        interim += transcript;
+                    }
+                }
+                if (interim) {
+                    deliver({text: interim, final: false});
+                }
             };
 
             recognition.onend = function() {
-                recognition.start();
+                if (listening) {
+                    recognition.start();
+                }
             };
             recognition.start();
         }
 
         function stopRecognition() {
+            listening = false;
             recognition.stop();
             output.innerHTML = "";
         }
@@ -52,35 +94,136 @@ HtmlCode = '''<!DOCTYPE html>
 </body>
 </html>'''
 
+#Script for execute_async_script: blocks in the browser until a result arrives (no polling from Python)
+WaitForResultsScript = "nextResults(arguments[arguments.length - 1], arguments[0]);"
+LongPollTimeout = 10  #Seconds a single long-poll waits in the browser before it is renewed
+PumpRetryMaxDelay = 30  #Longest wait (seconds) between attempts to restart a failed recognition browser
+
 #Replace  the language setting in the HTML code with the input language from the environment variables.
 HtmlCode = str(HtmlCode).replace("recognition.lang = '';", f"recognition.lang = '{InputLanguage}';")
 
-with open(r"Data\Voice.html", "w") as f:
-    f.write(HtmlCode)
-
 #Get the current working directory
 current_dir = os.getcwd()
 #Generate the file path for the HTML code
+VoiceHtmlPath = r"Data\Voice.html"
 Link = f"{current_dir}/Data/Voice.html"
 
-#Set chrome options for the WebDriver
-chrome_options = Options()
-user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.142.86 Safari/537.36"
-chrome_options.add_argument(f"user-agent={user_agent}")
-chrome_options.add_argument("--use-fake-ui-for-media-stream")
-chrome_options.add_argument("--use-fake-device-for-media-stream")
-chrome_options.add_argument("--headless=new")
-#Initialize the Chrome WebDriver using the ChromeDriverManager
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-#Define the path for temp files
-TempDirPath = rf"{current_dir}/Frontend/Files"
-
-#Function to set the assistant's status by writing it to a file
+#Write the recognition page only when it is missing or out of date, instead of on every import
+def WriteVoiceHtml():
+    try:
+        with open(VoiceHtmlPath, "r") as f:
+            if f.read() == HtmlCode:
+                return False
+    except OSError:
+        pass
+    with open(VoiceHtmlPath, "w") as f:
+        f.write(HtmlCode)
+    return True
+
+#chromedriver location from the last ChromeDriverManager().install(), so warm starts skip its network check
+DriverPathCache = os.path.join("Data", "chromedriver.path")
+
+def ChromeDriverPath():
+    try:
+        with open(DriverPathCache, "r") as f:
+            Path = f.read().strip()
+        if Path and os.path.exists(Path):
+            return Path
+    except OSError:
+        pass
+    from webdriver_manager.chrome import ChromeDriverManager
+    Path = ChromeDriverManager().install()
+    with open(DriverPathCache, "w") as f:
+        f.write(Path)
+    return Path
+
+#Create a headless Chrome with the recognition page's permissions
+def CreateChromeDriver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    #Set chrome options for the WebDriver
+    chrome_options = Options()
+    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.142.86 Safari/537.36"
+    chrome_options.add_argument(f"user-agent={user_agent}")
+    chrome_options.add_argument("--use-fake-ui-for-media-stream")
+    chrome_options.add_argument("--use-fake-device-for-media-stream")
+    chrome_options.add_argument("--headless=new")
+    service = Service(ChromeDriverPath())
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+class DriverPool:
+    """Keeps one warm Chrome for speech recognition.
+
+    The driver is created on first use (or by ``warm()`` in the background at
+    startup), health-checked before every lease and replaced if it died.
+    """
+
+    def __init__(self, factory=CreateChromeDriver):
+        self.factory = factory
+        self.driver = None
+        self.page_loaded = False
+        self.cold_start = None  #Seconds the last driver launch took
+        self.restarts = 0
+        self.lock = threading.RLock()
+
+    def _healthy(self):
+        try:
+            self.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Return a live driver, launching or relaunching Chrome if needed"""
+        with self.lock:
+            if self.driver is not None and not self._healthy():
+                print("Speech recognition browser stopped responding, restarting it")
+                self.restarts += 1
+                self.discard()
+            if self.driver is None:
+                Started = time.perf_counter()
+                WriteVoiceHtml()
+                self.driver = self.factory()
+                self.page_loaded = False
+                self.cold_start = time.perf_counter() - Started
+                print(f"Speech recognition browser started in {self.cold_start * 1000:.0f} ms")
+            return self.driver
+
+    def load_page(self):
+        """Open the recognition page once per driver"""
+        with self.lock:
+            Driver = self.acquire()
+            if not self.page_loaded:
+                Driver.get("file:///" + Link)
+                Driver.set_script_timeout(LongPollTimeout + 5)
+                self.page_loaded = True
+            return Driver
+
+    def discard(self):
+        """Drop the current driver (e.g. after an error); the next acquire() starts a new one"""
+        with self.lock:
+            if self.driver is not None:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+            self.driver = None
+            self.page_loaded = False
+
+    def warm(self):
+        """Start Chrome and load the page on a background thread so the first listen does not pay for it"""
+        def Warm():
+            try:
+                self.load_page()
+            except Exception as e:
+                print(f"Error starting speech recognition browser: {e}")
+        threading.Thread(target=Warm, daemon=True).start()
+
+#Function to set the assistant's status; the GUI is notified through the event bus
 def SetAssistantStatus(Status):
-    with open(rf'{TempDirPath}/Status.data', "w", encoding = 'utf-8') as file:
-        file.write(Status)
+    Bus.publish(StatusTopic, Status)
 
 #Function to modify a query to ensure proper punctuations and formatting
 def QueryModifier(Query):
@@ -102,37 +245,153 @@ def QueryModifier(Query):
             new_query += "."
     return new_query.capitalize()
 
-#Function to translate text into english using mtranslate library
+#Function to translate text into english (cached per input language; falls back to the original text on timeout)
 def UniversalTranslator(Text):
-    english_translation = mt.translate(Text, "en", "auto")
+    english_translation = Translate(Text, InputLanguage, "en")
     return english_translation.capitalize()
 
-#Function to perform speech recognition using WebDriver
-def SpeechRecognition():
-    #Open the HTML file in the browser
-    driver.get("file:///" + Link)
-    #Start Speech recognition by clicking the start button
-    driver.find_element(by=By.ID, value = "start").click()
 
-    while True:
+class Recognizer:
+    """Speech source that pushes transcripts through on_result(); listen() blocks on a queue until a final one arrives"""
+
+    def __init__(self):
+        self.results = queue.Queue()
+
+    def on_result(self, Text, Final=True):
+        self.results.put((Text, Final))
+
+    def start(self):
+        """Begin capturing; results are reported with on_result()"""
+
+    def stop(self):
+        """Stop capturing"""
+
+    def listen(self, timeout=None, on_partial=None):
+        """Return the next final transcript, or None after ``timeout`` seconds.
+        Partial transcripts heard on the way are passed to ``on_partial(text)``."""
+        while not self.results.empty():
+            self.results.get_nowait()  #Anything heard before we started listening is stale
+        self.start()
         try:
-            #Get the recognized text from the HTML output element
-            Text = driver.find_element(by=By.ID, value="output").text
-
-            if Text:
-                #Stop recognition by clicking the stop button
-                driver.find_element(by=By.ID, value="end").click()
-
-                #If the input language is English, return the modified query
-                if InputLanguage.lower() == "en" or "en" in InputLanguage.lower():
-                    return QueryModifier(Text)
-                else:
-                    #If the input language is not english, translate
-                    SetAssistantStatus("Translating...")
-                    return QueryModifier(UniversalTranslator(Text))
-        
-        except Exception as e:
-            pass
+            while True:
+                Text, Final = self.results.get(timeout=timeout)
+                if Final and Text.strip():
+                    return Text
+                if not Final and on_partial is not None:
+                    on_partial(Text)
+        except queue.Empty:
+            return None
+        finally:
+            self.stop()
+
+class BrowserRecognizer(Recognizer):
+    """webkitSpeechRecognition in the Selenium-driven Chrome page; a pump thread long-polls the page for results"""
+
+    def __init__(self, Pool):
+        super().__init__()
+        self.pool = Pool
+        self.stopped = threading.Event()
+        self.pump = None
+
+    def start(self):
+        if self.pump is not None:
+            self.pump.join()  #Only one thread talks to the driver at a time
+        self.stopped.clear()
+        self.pump = threading.Thread(target=self._pump, daemon=True)
+        self.pump.start()
+
+    def stop(self):
+        #The pump owns the driver and stops recognition itself once it sees the flag
+        self.stopped.set()
+
+    def _pump(self):
+        Failures = 0
+        while not self.stopped.is_set():
+            try:
+                self._recognize()
+                return
+            except Exception as e:
+                Failures += 1
+                print(f"Error in speech recognition: {e}")
+                #Retry with a fresh browser, so listen() is not left waiting on a dead one
+                self.pool.discard()
+                self.stopped.wait(min(2 ** (Failures - 1), PumpRetryMaxDelay))
+
+    def _recognize(self):
+        #The page stays loaded between utterances; only recognition is restarted
+        Driver = self.pool.load_page()
+        Driver.execute_script("startRecognition();")
+
+        while not self.stopped.is_set():
+            #Blocks inside the browser until a result arrives or the long-poll expires
+            for Result in Driver.execute_async_script(WaitForResultsScript, LongPollTimeout * 1000) or []:
+                self.on_result(Result["text"], Result.get("final", True))
+                if Result.get("final", True):
+                    #Stop after the first utterance, as before, so the next one starts clean
+                    self.stopped.set()
+
+        Driver.execute_script("stopRecognition();")
+
+class ScriptedRecognizer(Recognizer):
+    """Offline source for tests: replays transcripts from a list or a text file (one utterance per line)"""
+
+    def __init__(self, Transcripts=None, Path=None, Delay=0.0):
+        super().__init__()
+        if Path:
+            with open(Path, "r", encoding="utf-8") as file:
+                Transcripts = [line.strip() for line in file if line.strip()]
+        self.transcripts = list(Transcripts or [])
+        self.delay = Delay
+        self.timer = None
+
+    def start(self):
+        if not self.transcripts:
+            return
+        Text = self.transcripts.pop(0)
+        self.timer = threading.Timer(self.delay, self.on_result, args=(Text, True))
+        self.timer.start()
+
+    def stop(self):
+        if self.timer:
+            self.timer.cancel()
+
+#Chrome is only launched when speech recognition is first needed (or warmed up by main.py)
+Pool = DriverPool()
+
+#"browser" (Chrome's webkitSpeechRecognition) or "local" (offline streaming engine, see Backend.LocalSTT)
+SpeechRecognizerName = (env_vars.get("SpeechRecognizer") or "browser").lower()
+
+def CreateRecognizer(Name=SpeechRecognizerName):
+    if Name == "local":
+        from Backend.LocalSTT import LocalRecognizer
+        return LocalRecognizer()
+    return BrowserRecognizer(Pool)
+
+ActiveRecognizer = CreateRecognizer()
+
+#Warm up the recognition browser in the background
+def WarmUpSpeechRecognition():
+    if isinstance(ActiveRecognizer, BrowserRecognizer):
+        ActiveRecognizer.pool.warm()
+
+#Swap the speech source (e.g. a ScriptedRecognizer in tests)
+def SetRecognizer(NewRecognizer):
+    global ActiveRecognizer
+    ActiveRecognizer = NewRecognizer
+
+#Function to perform speech recognition using WebDriver
+#on_partial(text) receives partial transcripts while the user is still speaking
+def SpeechRecognition(on_partial=None):
+    #Wait (without using the CPU) for the recognizer to deliver an utterance
+    Text = ActiveRecognizer.listen(on_partial=on_partial)
+
+    #If the input language is English, return the modified query
+    if InputLanguage.lower() == "en" or "en" in InputLanguage.lower():
+        return QueryModifier(Text)
+    else:
+        #If the input language is not english, translate
+        SetAssistantStatus("Translating...")
+        return QueryModifier(UniversalTranslator(Text))
 
 if __name__ == "__main__":
     while True:
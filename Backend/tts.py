@@ -1,95 +1,128 @@
 #It implements text-to-speech functionality using edge_tts for speech synthesis and pygame for audio playback. It also handles long text by splitting and adding predefined responses.
 
-import pygame  #For handling audio playback
 import random  #For generating random choices
-import asyncio  #For async operations
-import edge_tts  #for TTS functionality
-import os
 from dotenv import dotenv_values
+import threading
+from Backend.SpeechPipeline import SpeechPipeline, EdgeSynthesizer, VoicePitch, VoiceRate  #Sentence-by-sentence synthesis and playback
+from Backend.SpeechCache import CachedSynthesizer  #Repeated phrases are played from the cache instead of re-synthesized
+from Backend.AudioPlayback import PlaybackEngine, PygameBackend  #Long-lived mixer that plays clips from memory
 
 env_vars = dotenv_values(".env")
 AssistantVoice = env_vars.get("AssistantVoice")
+TTSAttempts = 3  #Tries per clip before TTS() gives up
 
-#Async function to convert text to an audio file
-async def TextToAudioFile(text) -> None:
-    file_path = r"Data\speech.mp3"   #Define the path where the speech file will be saved
+#Predefined responses for cases where the text is too long to read out
+responses = [
+    "The rest of the result has been printed to the chat screen, kindly check it out sir.",
+    "The rest of the text is now on the chat screen, sir, please check it.",
+    "You can see the rest of the text on the chat screen, sir.",
+    "The remaining part of the text is now on the chat screen, sir.",
+    "Sir, you'll find more text on the chat screen for you to see.",
+    "The rest of the answer is now on the chat screen, sir.",
+    "Sir, please look at the chat screen, the rest of the answer is there.",
+    "You'll find the complete answer on the chat screen, sir.",
+    "The next part of the text is on the chat screen, sir.",
+    "Sir, please check the chat screen for more information.",
+    "There's more text on the chat screen for you, sir.",
+    "Sir, take a look at the chat screen for additional text.",
+    "You'll find more to read on the chat screen, sir.",
+    "Sir, check the chat screen for the rest of the text.",
+    "The chat screen has the rest of the text, sir.",
+    "There's more to see on the chat screen, sir, please look.",
+    "Sir, the chat screen holds the continuation of the text.",
+    "You'll find the complete answer on the chat screen, kindly check it out sir.",
+    "Please review the chat screen for the rest of the text, sir.",
+    "Sir, look at the chat screen for the complete answer."
+]
 
-    if os.path.exists(file_path):  #check if the file already exist
-        os.remove(file_path)
+#Shared voice: every clip is looked up by hash(text, voice, pitch, rate) before calling edge_tts
+Voice = CachedSynthesizer(EdgeSynthesizer(AssistantVoice, VoicePitch, VoiceRate))
 
-    #Create the communicate object to generate speech
-    communicate = edge_tts.Communicate(text, AssistantVoice, pitch='+5Hz', rate='+13%')
-    await communicate.save(r'Data\speech.mp3')  #Save the generated speech as an MP# file
+#One playback engine for the whole process: the mixer is opened once and clips play from memory
+Playback = PlaybackEngine(PygameBackend())
 
 #Function to manage TTS functionality
 def TTS(Text, func=lambda r=None: True):
-    while True:
-        try:
-            #Convert text to audio file asynchronously
-            asyncio.run(TextToAudioFile(Text))
+    try:
+        for Attempt in range(1, TTSAttempts + 1):
+            try:
+                #Synthesize (or fetch from the cache) and hand the clip to the playback engine
+                Clip = Playback.submit(Voice.synthesize(Text))
 
-            #Initialize pygame mixer for audio playback
-            pygame.mixer.init()
+                #Block until the clip has played or StopSpeaking() cut it off
+                Clip.done.wait()
+                return True
+            except Exception as e:
+                print(f"Error in TTS (attempt {Attempt}/{TTSAttempts}): {e}")
+        return False
+    finally:
+        #Call the provided function with false to signal the end of TTS
+        func(False)
 
-            #Load the generated speech file into pygame mixer
-            pygame.mixer.music.load(r'Data\speech.mp3')
-            pygame.mixer.music.play()  #Play the audio
+#Speech pipeline with the assistant's voice and the long-answer responses
+def NewSpeechPipeline():
+    Speech = SpeechPipeline(Voice, Playback, long_reply=lambda: random.choice(responses))
+    with _ActiveLock:
+        _Active.add(Speech)
+    return Speech
 
-            #Loop until the audio is done playing or the function stops
-            while pygame.mixer.music.get_busy():
-                if func() == False:
-                    break
-                pygame.time.Clock().tick(10)
-            return True
-        except Exception as e:
-            print(f"Error in TTS: {e}")
-        
-        finally:
-            try:
-                #Call the provided function with false to signal the end of TTS
-                func(False)
-                pygame.mixer.music.stop()
-                pygame.mixer.quit()
+#Speech pipelines that are currently talking, so StopSpeaking() can reach them
+_Active = set()
+_ActiveLock = threading.Lock()
 
-            except Exception as e:
-                print("Error in finally block: {e}")
+#Barge-in: stop whatever is being said right now (safe to call from any thread)
+def StopSpeaking():
+    with _ActiveLock:
+        Active = list(_Active)
+    for Speech in Active:
+        Speech.stop()
+    Playback.interrupt()
 
-#Function to manage TTS with additional responses for long text
-def TextToSpeech(Text, func=lambda r=None: True):
-    Data = str(Text).split(".")
+#Synthesize the canned responses ahead of time so they never wait on edge_tts
+def PrewarmResponses(Background=True):
+    def Prewarm():
+        Made = Voice.prewarm(responses)
+        if Made:
+            print(f"Prewarmed {Made} speech clips")
+    if not Background:
+        return Prewarm()
+    threading.Thread(target=Prewarm, daemon=True).start()
+
+#Wait until the pipeline has finished (or was stopped by StopSpeaking), then signal the end of TTS
+def WaitForSpeech(Speech, func):
+    Speech.wait()
+    with _ActiveLock:
+        _Active.discard(Speech)
+    func(False)
+    if Speech.time_to_first_audio is not None:
+        print(f"Time to first audio: {Speech.time_to_first_audio * 1000:.0f} ms")
 
-    #List the predefined responses for cases where the text is too long
-    responses = [
-        "The rest of the result has been printed to the chat screen, kindly check it out sir.",
-        "The rest of the text is now on the chat screen, sir, please check it.",
-        "You can see the rest of the text on the chat screen, sir.",
-        "The remaining part of the text is now on the chat screen, sir.",
-        "Sir, you'll find more text on the chat screen for you to see.",
-        "The rest of the answer is now on the chat screen, sir.",
-        "Sir, please look at the chat screen, the rest of the answer is there.",
-        "You'll find the complete answer on the chat screen, sir.",
-        "The next part of the text is on the chat screen, sir.",
-        "Sir, please check the chat screen for more information.",
-        "There's more text on the chat screen for you, sir.",
-        "Sir, take a look at the chat screen for additional text.",
-        "You'll find more to read on the chat screen, sir.",
-        "Sir, check the chat screen for the rest of the text.",
-        "The chat screen has the rest of the text, sir.",
-        "There's more to see on the chat screen, sir, please look.",
-        "Sir, the chat screen holds the continuation of the text.",
-        "You'll find the complete answer on the chat screen, kindly check it out sir.",
-        "Please review the chat screen for the rest of the text, sir.",
-        "Sir, look at the chat screen for the complete answer."
-    ]
+#Speak a token stream (e.g. from ChatBotStream) while it is still being generated; returns the full text
+def SpeakStream(Tokens, func=lambda r=None: True, on_text=None):
+    Speech = NewSpeechPipeline()
+    Text = ""
+    try:
+        for Token in Tokens:
+            Text += Token
+            Speech.feed(Token)
+            if on_text:
+                on_text(Text)
+    finally:
+        Speech.close()
+    WaitForSpeech(Speech, func)
+    return Text
 
-    #If the textt is very long (more than 4 sentences and 250 characters), add a response message
-    if len(Data) > 4 and len(Text) >= 250:
-        TTS(" ".join(Text.split(".")[0:2]) + ". " + random.choice(responses), func)
-    
-    #Otherwise, just play the whole text
-    else:
-        TTS(Text,func)
+#Function to manage TTS with additional responses for long text
+def TextToSpeech(Text, func=lambda r=None: True):
+    #The first sentence plays while the following ones are synthesized
+    Speech = NewSpeechPipeline()
+    Speech.speak(str(Text))
+    WaitForSpeech(Speech, func)
 
 if __name__ == "__main__":
+    import sys
+    if "--prewarm" in sys.argv:
+        PrewarmResponses(Background=False)
+        sys.exit(0)
     while True:
         TextToSpeech(input("Enter the text: "))
\ No newline at end of file
@@ -0,0 +1,97 @@
+#It implements the chat transcript shown in the GUI: every message gets an id, and the GUI is sent only what changed (a new message, an updated message, or a fresh page after the history is loaded) instead of the whole conversation.
+
+import threading
+from itertools import count
+from Backend.EventBus import Bus, ChatTopic
+
+PageSize = 50  #Messages rendered after a reset and per lazy load of older history
+
+
+class ChatEvent:
+    """A change to the transcript.
+
+    ``kind`` is "append" (new message ``id`` with ``text``), "update"
+    (replace the text of message ``id``) or "reset" (drop everything and
+    render ``messages``, the latest page of ``(id, text)`` pairs).
+    """
+
+    def __init__(self, kind: str, id: int = None, text: str = None, messages: list = None):
+        self.kind = kind
+        self.id = id
+        self.text = text
+        self.messages = messages
+
+    def __repr__(self):
+        return f"ChatEvent({self.kind!r}, id={self.id!r})"
+
+
+class ChatTranscript:
+    """Ordered messages with stable ids; changes are published on ``ChatTopic``"""
+
+    def __init__(self, bus=Bus, page_size: int = PageSize):
+        self.bus = bus
+        self.page_size = page_size
+        self._ids = []
+        self._texts = {}
+        self._next_id = count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+    def append(self, text: str) -> int:
+        with self._lock:
+            id = next(self._next_id)
+            self._ids.append(id)
+            self._texts[id] = text
+        self.bus.publish(ChatTopic, ChatEvent("append", id, text), force=True)
+        return id
+
+    def update(self, id: int, text: str):
+        with self._lock:
+            if id not in self._texts or self._texts[id] == text:
+                return
+            self._texts[id] = text
+        self.bus.publish(ChatTopic, ChatEvent("update", id, text), force=True)
+
+    def load(self, texts):
+        """Replace the transcript with ``texts`` (oldest first); the GUI renders only the latest page"""
+        with self._lock:
+            self._ids = []
+            self._texts = {}
+            for text in texts:
+                id = next(self._next_id)
+                self._ids.append(id)
+                self._texts[id] = text
+        self.refresh()
+
+    def latest(self, limit: int = None) -> list:
+        """The newest ``limit`` messages as ``(id, text)``, oldest first"""
+        limit = limit or self.page_size
+        with self._lock:
+            return [(id, self._texts[id]) for id in self._ids[-limit:]]
+
+    def refresh(self):
+        """Have the GUI re-render the latest page"""
+        self.bus.publish(ChatTopic, ChatEvent("reset", messages=self.latest()), force=True)
+
+    def before(self, id: int, limit: int = None) -> list:
+        """Up to ``limit`` messages older than message ``id``, oldest first (for lazy loading)"""
+        limit = limit or self.page_size
+        with self._lock:
+            try:
+                end = self._ids.index(id)
+            except ValueError:
+                return []
+            return [(older, self._texts[older]) for older in self._ids[max(0, end - limit):end]]
+
+    def get(self, id: int):
+        with self._lock:
+            return self._texts.get(id)
+
+
+Transcript = ChatTranscript()
+
+def GetChatTranscript() -> ChatTranscript:
+    return Transcript
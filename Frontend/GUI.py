@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QApplication, QSizePolicy, QFrame, QWidget, QVBoxLayout, QPushButton, QLabel, QGridLayout, QFormLayout, QLineEdit, QMainWindow, QTextEdit, QStackedWidget, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QFormLayout, QLineEdit, QLabel, QComboBox, QSpinBox, QPushButton, QSpacerItem
-from PyQt5.QtGui import QIcon, QFont, QPainter, QMovie, QColor, QTextCharFormat, QPixmap, QTextBlockFormat
-from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QIcon, QFont, QPainter, QMovie, QColor, QTextCharFormat, QPixmap, QTextBlockFormat, QTextCursor
+from PyQt5.QtCore import Qt, QSize, QObject, pyqtSignal
+from Backend.EventBus import Bus, MicrophoneTopic, StatusTopic, ChatTopic
+from Frontend.ChatTranscript import Transcript
 from dotenv import dotenv_values
 import sys
 import os
@@ -8,7 +10,7 @@ import os
 env_vars = dotenv_values(".env")
 Assistantname = env_vars.get("Assistantname")
 current_dir= os.getcwd()
-old_chat_message = ""
+MaxChatBlocks = 200  #Messages kept in the chat section; older ones are loaded again on scroll
 TempDirPath = rf"{current_dir}\Frontend\Files"
 GraphicsDirPath = rf"{current_dir}\Frontend\Graphics"
 
@@ -36,22 +38,16 @@ def QueryModifier(Query):
     return new_query.capitalize()
 
 def SetMicrophoneStatus(Command):
-    with open(rf'{TempDirPath}\Mic.data', "w", encoding='utf-8') as file:
-        file.write(Command)
+    Bus.publish(MicrophoneTopic, Command)
 
 def GetMicrophoneStatus():
-    with open(rf'{TempDirPath}\Mic.data', "r", encoding='utf-8') as file:
-        Status = file.read()
-    return Status
+    return Bus.get(MicrophoneTopic)
 
 def SetAssistantStatus(Status):
-    with open(rf'{TempDirPath}\Status.data', "w", encoding='utf-8') as file:
-        file.write(Status)
+    Bus.publish(StatusTopic, Status)
         
 def GetAssistantStatus():
-    with open(rf'{TempDirPath}\Status.data', "r", encoding='utf-8') as file:
-        Status = file.read()
-    return Status
+    return Bus.get(StatusTopic)
 
 def MicButtonInitialed():
     SetMicrophoneStatus("False")
@@ -67,9 +63,29 @@ def TempDirectoryPath(Filename):
     Path = rf'{TempDirPath}\{Filename}'
     return Path
 
-def ShowTextToScreen(Text):
-    with open(rf'{TempDirPath}\Responses.data', "w", encoding='utf-8') as file:
-        file.write(Text)
+#Shows a new message and returns its id; with MessageId the text of that message is replaced instead
+def ShowTextToScreen(Text, MessageId=None):
+    if MessageId is not None:
+        Transcript.update(MessageId, Text)
+        return MessageId
+    if len(Text)<=1:
+        return None
+    return Transcript.append(Text)
+
+#Replaces the chat with the given messages (oldest first)
+def LoadChatHistory(Messages):
+    Transcript.load(Messages)
+
+
+class BusSignals(QObject):
+    """Re-emits bus events as a Qt signal, so widgets are updated on the GUI thread"""
+
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, *topics):
+        super().__init__()
+        for topic in topics:
+            Bus.subscribe(topic, lambda value, topic=topic: self.changed.emit(topic, value))
 
 
 class ChatSection(QWidget):
@@ -126,10 +142,12 @@ class ChatSection(QWidget):
 
         font = QFont()
         self.chat_text_edit.setFont(font)
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.loadMessages)
-        self.timer.timeout.connect(self.SpeechRecogText)
-        self.timer.start(5)
+        self.rendered = []  #Message ids, one document block each
+        self.chat_text_edit.verticalScrollBar().valueChanged.connect(self.loadOlderMessages)
+        self.events = BusSignals(ChatTopic, StatusTopic)
+        self.events.changed.connect(self.onEvent)
+        self.label.setText(GetAssistantStatus())
+        self.resetMessages(Transcript.latest())
         self.chat_text_edit.viewport().installEventFilter(self)
         self.setStyleSheet("""
                            QScrollBar:vertical {
@@ -178,39 +196,103 @@ class ChatSection(QWidget):
             MicButtonInitialed()
         self.micToggled = not self.micToggled
          
-    def loadMessages(self):
-         global old_chat_message
-
-         with open(TempDirectoryPath('Responses.data'), "r", encoding='utf-8') as file:
-            messages = file.read()
-
-            if messages is None:
-                pass
-            elif len(messages)<=1:
-                pass
-            elif str(old_chat_message) == str(messages):
-                pass
-            else:
-                self.addMessage(message=messages, color="White")
-                old_chat_message = messages
+    def onEvent(self, topic, value):
+        if topic == ChatTopic:
+            self.loadMessages(value)
+        elif topic == StatusTopic:
+            self.SpeechRecogText(value)
+
+    def loadMessages(self, event):
+        if event.kind == "append":
+            #Already rendered when it arrived before the initial page was drawn
+            if self.rendered and event.id <= self.rendered[-1]:
+                return
+            self.addMessage(message=event.text, color="White")
+            self.rendered.append(event.id)
+            self.trimMessages()
+        elif event.kind == "update":
+            self.updateMessage(event.id, event.text)
+        elif event.kind == "reset":
+            self.resetMessages(event.messages)
 
     
-    def SpeechRecogText(self):
-        with open(TempDirectoryPath('Status.data'), "r", encoding='utf-8') as file:
-            messages = file.read()
-            self.label.setText(messages)
-    
-    def addMessage(self,message,color):
-        cursor = self.chat_text_edit.textCursor()
+    def SpeechRecogText(self, messages):
+        self.label.setText(messages)
+
+    def messageFormats(self, color):
         format = QTextCharFormat()
         formatm = QTextBlockFormat()
         formatm.setTopMargin(10)
         formatm.setLeftMargin(10)
         format.setForeground(QColor(color))
-        cursor.setCharFormat(format)
+        return format, formatm
+
+    def blockText(self, message):
+        #Line separators keep a multi-line message in a single block
+        return message.replace("\n", "\u2028")
+
+    def addMessage(self,message,color,atStart=False):
+        format, formatm = self.messageFormats(color)
+        scrollbar = self.chat_text_edit.verticalScrollBar()
+        following = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.chat_text_edit.document())
+        cursor.movePosition(QTextCursor.Start if atStart else QTextCursor.End)
+        if self.rendered:
+            cursor.insertBlock(formatm, format)
+            if atStart:
+                cursor.movePosition(QTextCursor.Start)
         cursor.setBlockFormat(formatm)
-        cursor.insertText(message + "\n")
-        self.chat_text_edit.setTextCursor(cursor)
+        cursor.insertText(self.blockText(message), format)
+        if following and not atStart:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def updateMessage(self, id, message, color="White"):
+        if id not in self.rendered:
+            return
+        format, _ = self.messageFormats(color)
+        scrollbar = self.chat_text_edit.verticalScrollBar()
+        following = scrollbar.value() >= scrollbar.maximum() - 4
+        block = self.chat_text_edit.document().findBlockByNumber(self.rendered.index(id))
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText(self.blockText(message), format)
+        if following:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def trimMessages(self):
+        #Drop the oldest blocks so the document (and the cost of laying it out) stays bounded,
+        #unless the user has scrolled up to read them
+        scrollbar = self.chat_text_edit.verticalScrollBar()
+        if scrollbar.value() < scrollbar.maximum() - 4:
+            return
+        while len(self.rendered) > MaxChatBlocks:
+            cursor = QTextCursor(self.chat_text_edit.document().firstBlock())
+            cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+            self.rendered.pop(0)
+
+    def resetMessages(self, messages):
+        self.chat_text_edit.clear()
+        self.rendered = []
+        for id, message in messages:
+            self.addMessage(message=message, color="White")
+            self.rendered.append(id)
+        scrollbar = self.chat_text_edit.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def loadOlderMessages(self, value):
+        scrollbar = self.chat_text_edit.verticalScrollBar()
+        if value != scrollbar.minimum() or scrollbar.maximum() == 0 or not self.rendered:
+            return
+        older = Transcript.before(self.rendered[0])
+        if not older:
+            return
+        height = scrollbar.maximum()
+        for id, message in reversed(older):
+            self.addMessage(message=message, color="White", atStart=True)
+            self.rendered.insert(0, id)
+        #Keep the message that was at the top where it was
+        scrollbar.setValue(scrollbar.maximum() - height)
         
 
 class InitialScreen(QWidget):
@@ -249,14 +331,12 @@ class InitialScreen(QWidget):
         self.setFixedHeight(screen_height)
         self.setFixedWidth(screen_width)
         self.setStyleSheet("background-color: black;")
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.SpeechRecogText)
-        self.timer.start(5)
-
-    def SpeechRecogText(self):
-        with open(TempDirectoryPath('Status.data'), "r", encoding='utf-8') as file:
-            messages = file.read()
-            self.label.setText(messages)
+        self.events = BusSignals(StatusTopic)
+        self.events.changed.connect(lambda topic, value: self.SpeechRecogText(value))
+        self.SpeechRecogText(GetAssistantStatus())
+
+    def SpeechRecogText(self, messages):
+        self.label.setText(messages)
             
     def load_icon(self,path,width=60, height=60):
         pixmap = QPixmap(path)
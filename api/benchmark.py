@@ -0,0 +1,135 @@
+"""Load test for the API's database-bound endpoints.
+
+Run the API (``uvicorn api.main:app``), then::
+
+    python -m api.benchmark --url http://localhost:8000 --users 20 --requests 50
+
+Each virtual user registers, logs in and then repeatedly reads its profile,
+stores a memory, lists its memories and lists its chat sessions. While the
+load runs, a probe keeps calling ``/api/status`` (which never touches the
+database) to show how long other requests wait behind database work on the
+event loop.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def describe(name: str, latencies: List[float]) -> str:
+    if not latencies:
+        return f"{name:<18} no requests"
+    return (
+        f"{name:<18} n={len(latencies):<6} "
+        f"mean={statistics.mean(latencies) * 1000:7.1f} ms  "
+        f"p50={percentile(latencies, 0.50) * 1000:7.1f} ms  "
+        f"p95={percentile(latencies, 0.95) * 1000:7.1f} ms  "
+        f"max={max(latencies) * 1000:7.1f} ms"
+    )
+
+
+async def sign_up(client: httpx.AsyncClient, run_id: str, index: int) -> Dict[str, str]:
+    username = f"bench_{run_id}_{index}"
+    password = "benchmark-password"
+    response = await client.post("/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": password
+    })
+    response.raise_for_status()
+    response = await client.post("/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def virtual_user(client: httpx.AsyncClient, headers: Dict[str, str], requests: int,
+                       latencies: Dict[str, List[float]], errors: List[str]):
+    for i in range(requests):
+        step = i % 4
+        started = time.perf_counter()
+        if step == 0:
+            name, call = "GET /users/me", client.get("/users/me", headers=headers)
+        elif step == 1:
+            name, call = "POST /memories", client.post("/memories", headers=headers, json={
+                "memory_type": "fact",
+                "key": f"benchmark_{i}",
+                "value": f"value {i}",
+                "importance": i % 10 + 1
+            })
+        elif step == 2:
+            name, call = "GET /memories", client.get("/memories", headers=headers)
+        else:
+            name, call = "GET /chat/sessions", client.get("/chat/sessions", headers=headers)
+        try:
+            response = await call
+            if response.status_code >= 400:
+                errors.append(f"{name}: {response.status_code}")
+        except httpx.HTTPError as e:
+            errors.append(f"{name}: {e}")
+        latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await client.get("/api/status")
+            latencies.append(time.perf_counter() - started)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.01)
+
+
+async def run(url: str, users: int, requests: int):
+    limits = httpx.Limits(max_connections=users + 2, max_keepalive_connections=users + 2)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        run_id = uuid.uuid4().hex[:8]
+        print(f"Signing up {users} users...")
+        all_headers = [await sign_up(client, run_id, i) for i in range(users)]
+
+        latencies: Dict[str, List[float]] = {}
+        probe_latencies: List[float] = []
+        errors: List[str] = []
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(client, stop, probe_latencies))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            virtual_user(client, headers, requests, latencies, errors) for headers in all_headers
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await prober
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"\n{total} requests from {users} concurrent users in {elapsed:.2f} s "
+          f"-> {total / elapsed:.1f} requests/s ({len(errors)} errors)")
+    for name in sorted(latencies):
+        print(describe(name, latencies[name]))
+    print(describe("probe /api/status", probe_latencies))
+    if errors:
+        print(f"First errors: {errors[:5]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the Spectre AI API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--requests", type=int, default=50, help="requests per user")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.users, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
 import asyncio
+import json
+import os
 
-from database.database import get_db, create_tables
-from database.models import User, ChatSession, ChatMessage
+from database.database import get_db, create_tables_async, dispose_engines, AsyncSessionLocal
+from database.models import User, ChatSession, Memory
 from api.schemas import *
 from api.auth import *
 from api.memory_service import MemoryService
+from api.pagination import encode_cursor, session_list_query, session_messages_query
+from api.summary_service import SummaryService, fold_session_summary
+from api.write_behind import write_behind
 
 # Import your existing backend modules
-from Backend.model import FirstLayerDMM
-from Backend.Chatbot import ChatBot
-from Backend.RealtimeSearchEngine import RealtimeSearchEngine
+from Backend.model import FirstLayerDMMAsync
+from Backend.Chatbot import ChatBotAsync, ChatBotStreamAsync, AnswerModifier
+from Backend.RealtimeSearchEngine import RealtimeSearchEngineAsync, RealtimeSearchEngineStreamAsync
 from Backend.Automation import Automation
+from Backend.Providers import CloseAsyncProviders
+from Backend.StatusChannel import GetStatusSubscriber, DescribeStatus
 
 app = FastAPI(title="Spectre AI API", version="1.0.0")
 
+# Write the user's message before calling the model, so it survives a failed or interrupted answer
+# (one extra write per turn); otherwise everything a /chat turn writes is queued together at the end
+DURABLE_USER_MESSAGE = os.getenv("DURABLE_USER_MESSAGE", "false").lower() in ("1", "true", "yes")
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,22 +42,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create tables on startup
+# Create tables on startup, then start the batched writer (which first replays its journal)
 @app.on_event("startup")
 async def startup_event():
-    create_tables()
+    await create_tables_async()
+    await write_behind.start()
+
+# Close the pooled provider and database connections on shutdown, after queued writes are committed
+@app.on_event("shutdown")
+async def shutdown_event():
+    await CloseAsyncProviders()
+    await write_behind.close()
+    await dispose_engines()
 
 @app.post("/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    db_user = get_user(db, username=user.username)
+    db_user = await get_user(db, username=user.username)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Username already registered"
         )
     
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -51,21 +73,21 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @app.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,21 +104,14 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
-@app.post("/chat", response_model=ChatMessageResponse)
-async def chat(
-    chat_request: ChatRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    # Initialize memory service
-    memory_service = MemoryService(db, current_user)
-    
-    # Get or create chat session
+async def get_or_create_session(db: AsyncSession, current_user: User, chat_request: ChatRequest) -> ChatSession:
+    """Find the requested session or add a new one to ``db``; a new session is written with the caller's commit"""
     if chat_request.session_id:
-        session = db.query(ChatSession).filter(
+        result = await db.execute(select(ChatSession).where(
             ChatSession.id == chat_request.session_id,
             ChatSession.user_id == current_user.id
-        ).first()
+        ))
+        session = result.scalars().first()
         if not session:
             raise HTTPException(status_code=404, detail="Chat session not found")
     else:
@@ -106,50 +121,128 @@ async def chat(
             title=chat_request.message[:50] + "..." if len(chat_request.message) > 50 else chat_request.message
         )
         db.add(session)
-        db.commit()
-        db.refresh(session)
+    return session
+
+async def queue_turn(current_user: User, memory_service: MemoryService, writes: list,
+                     session_id: int, user_message: str, response: str) -> asyncio.Future:
+    """Queue the assistant's reply and the memories taken from the turn; returns the reply's write"""
+    assistant_write = await write_behind.submit("chat_message", dict(
+        session_id=session_id,
+        role="assistant",
+        content=response,
+        timestamp=datetime.utcnow()
+    ))
+    writes.append(assistant_write)
+    for memory in await memory_service.memories_from_conversation(user_message, response):
+        writes.append(await write_behind.submit("memory", dict(user_id=current_user.id, **memory)))
+    return assistant_write
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Assistant status, pushed from the assistant process over the status channel
+@app.get("/api/status")
+async def get_status():
+    return dict(success=True, **DescribeStatus(GetStatusSubscriber().get()["status"]))
+
+@app.get("/api/status/stream")
+async def stream_status():
+    """Server-sent events: the current status right away, then every change as it happens"""
+    subscriber = GetStatusSubscriber()
+    loop = asyncio.get_running_loop()
+    updates = asyncio.Queue()
+    unsubscribe = subscriber.subscribe(lambda snapshot: loop.call_soon_threadsafe(updates.put_nowait, snapshot))
+
+    async def events():
+        try:
+            snapshot = subscriber.get()
+            yield sse_event("status", DescribeStatus(snapshot["status"]))
+            while True:
+                try:
+                    latest = await asyncio.wait_for(updates.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keep idle connections open through proxies
+                    yield ": keep-alive\n\n"
+                    continue
+                if latest["version"] != snapshot["version"]:
+                    snapshot = latest
+                    yield sse_event("status", DescribeStatus(snapshot["status"]))
+        finally:
+            unsubscribe()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Batch sizes, flush latency and queue depth of the write-behind queue
+@app.get("/metrics/write-behind")
+async def write_behind_metrics():
+    return write_behind.stats()
+
+@app.post("/chat", response_model=ChatMessageResponse)
+async def chat(
+    chat_request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Initialize memory service
+    memory_service = MemoryService(db, current_user)
     
-    # Store user message
-    user_message = ChatMessage(
+    # Get or create chat session; queued messages refer to it by id, so a new session is committed right away
+    session = await get_or_create_session(db, current_user, chat_request)
+    if session.id is None:
+        await db.commit()
+    
+    # Recent history plus running summary; older turns are folded after the response is sent
+    summary_service = SummaryService(db, session)
+    history, fold_upto = await summary_service.build_history()
+    
+    # Messages and memories go through the write-behind queue, so concurrent turns share a commit
+    user_message = dict(
         session_id=session.id,
         role="user",
-        content=chat_request.message
+        content=chat_request.message,
+        timestamp=datetime.utcnow()
     )
-    db.add(user_message)
-    db.commit()
+    if DURABLE_USER_MESSAGE:
+        await write_behind.write("chat_message", user_message)
     
     # Get memory context
-    memory_context = memory_service.get_context_for_chat()
+    memory_context = await memory_service.get_context_for_chat()
     
     # Process message through your existing AI pipeline
     try:
         # Add memory context to the message
         enhanced_message = f"Context about {current_user.username}:\n{memory_context}\n\nUser message: {chat_request.message}"
         
-        decision = FirstLayerDMM(enhanced_message)
+        # Provider calls are awaited on the shared connection pool, so other chats keep being served meanwhile
+        decision = await FirstLayerDMMAsync(enhanced_message)
         
         # Determine response type
         if any(d.startswith('general') for d in decision):
-            response = ChatBot(enhanced_message)
+            response = await ChatBotAsync(enhanced_message, History=history)
         elif any(d.startswith('realtime') for d in decision):
-            response = RealtimeSearchEngine(chat_request.message)
+            response = await RealtimeSearchEngineAsync(chat_request.message, History=history)
         else:
             # Handle automation tasks
             await Automation(decision)
             response = "Task executed successfully."
         
-        # Store assistant response
-        assistant_message = ChatMessage(
-            session_id=session.id,
-            role="assistant",
-            content=response
-        )
-        db.add(assistant_message)
-        db.commit()
-        db.refresh(assistant_message)
+        # Store the user message (unless already written), the assistant response and the memories extracted from the conversation
+        writes = []
+        if not DURABLE_USER_MESSAGE:
+            writes.append(await write_behind.submit("chat_message", user_message))
+        assistant_write = await queue_turn(current_user, memory_service, writes, session.id, chat_request.message, response)
+        
+        # Reply once the batch holding this turn is committed
+        await asyncio.gather(*writes)
+        assistant_message = assistant_write.result()
         
-        # Extract and store memories from conversation
-        memory_service.extract_and_store_from_conversation(chat_request.message, response)
+        # Fold turns that no longer fit the prompt into the session summary, off the request path
+        background_tasks.add_task(fold_session_summary, session.id, fold_upto)
         
         # Add session_id to response for frontend
         assistant_message_dict = {
@@ -165,55 +258,168 @@ async def chat(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
-@app.get("/chat/sessions", response_model=List[ChatSessionResponse])
+@app.post("/chat/stream")
+async def chat_stream(
+    chat_request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Same pipeline as /chat, but the answer is sent as Server-Sent Events while it is generated.
+    
+    Events: ``session`` (session_id), ``token`` (content) for every chunk, then
+    ``done`` with the stored assistant message, or ``error`` with a detail.
+    """
+    session = await get_or_create_session(db, current_user, chat_request)
+    
+    summary_service = SummaryService(db, session)
+    history, fold_upto = await summary_service.build_history()
+    
+    # The session id is sent before the answer, so a new session is committed up front;
+    # the messages and memories go through the write-behind queue
+    if session.id is None:
+        await db.commit()
+    session_id = session.id
+    writes = [await write_behind.submit("chat_message", dict(
+        session_id=session_id,
+        role="user",
+        content=chat_request.message,
+        timestamp=datetime.utcnow()
+    ))]
+    
+    memory_context = await MemoryService(db, current_user).get_context_for_chat()
+    enhanced_message = f"Context about {current_user.username}:\n{memory_context}\n\nUser message: {chat_request.message}"
+    
+    async def automation_reply(decision):
+        await Automation(decision)
+        yield "Task executed successfully."
+    
+    async def events():
+        yield sse_event("session", {"session_id": session_id})
+        try:
+            decision = await FirstLayerDMMAsync(enhanced_message)
+            
+            if any(d.startswith('general') for d in decision):
+                tokens = ChatBotStreamAsync(enhanced_message, History=history)
+            elif any(d.startswith('realtime') for d in decision):
+                tokens = RealtimeSearchEngineStreamAsync(chat_request.message, History=history)
+            else:
+                tokens = automation_reply(decision)
+            
+            parts = []
+            async for token in tokens:
+                parts.append(token)
+                yield sse_event("token", {"content": token})
+            response = AnswerModifier("".join(parts).replace("</s>", "").strip())
+            
+            # The request's session may already be closed while the body streams, so read with our own
+            async with AsyncSessionLocal() as stream_db:
+                assistant_write = await queue_turn(current_user, MemoryService(stream_db, current_user), writes,
+                                                   session_id, chat_request.message, response)
+            await asyncio.gather(*writes)
+            assistant_message = assistant_write.result()
+            
+            done = {
+                "id": assistant_message.id,
+                "role": assistant_message.role,
+                "content": assistant_message.content,
+                "timestamp": assistant_message.timestamp.isoformat(),
+                "session_id": session_id
+            }
+            
+            background_tasks.add_task(fold_session_summary, session_id, fold_upto)
+            yield sse_event("done", done)
+            
+        except Exception as e:
+            # A failed or cut-off answer is not stored, and no memories are taken from it
+            yield sse_event("error", {"detail": f"Error processing message: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+@app.get("/chat/sessions", response_model=ChatSessionPage)
 async def get_chat_sessions(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    sessions = db.query(ChatSession).filter(
-        ChatSession.user_id == current_user.id
-    ).order_by(ChatSession.updated_at.desc()).all()
-    return sessions
+    """Most recently updated sessions first, with message counts but not the messages themselves"""
+    query = session_list_query(current_user.id, cursor)
+    
+    # One row past the page tells whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].updated_at, page[-1].id) if len(rows) > limit else None
+    return {"sessions": [row._asdict() for row in page], "next_cursor": next_cursor}
 
 @app.get("/chat/sessions/{session_id}", response_model=ChatSessionResponse)
 async def get_chat_session(
     session_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    session = db.query(ChatSession).filter(
+    result = await db.execute(select(ChatSession).where(
         ChatSession.id == session_id,
         ChatSession.user_id == current_user.id
-    ).first()
+    ).options(selectinload(ChatSession.messages)))
+    session = result.scalars().first()
     if not session:
         raise HTTPException(status_code=404, detail="Chat session not found")
     return session
 
+@app.get("/chat/sessions/{session_id}/messages", response_model=ChatMessagePage)
+async def get_chat_session_messages(
+    session_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """The latest ``limit`` messages of a session; ``next_cursor`` pages back through older ones"""
+    result = await db.execute(select(ChatSession.id).where(
+        ChatSession.id == session_id,
+        ChatSession.user_id == current_user.id
+    ))
+    if result.scalar() is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    
+    query = session_messages_query(session_id, cursor)
+    messages = (await db.execute(query.limit(limit + 1))).scalars().all()
+    page = messages[:limit]
+    next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if len(messages) > limit else None
+    return {"messages": page[::-1], "next_cursor": next_cursor}
+
 @app.delete("/chat/sessions/{session_id}")
 async def delete_chat_session(
     session_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    session = db.query(ChatSession).filter(
+    result = await db.execute(select(ChatSession).where(
         ChatSession.id == session_id,
         ChatSession.user_id == current_user.id
-    ).first()
+    ))
+    session = result.scalars().first()
     if not session:
         raise HTTPException(status_code=404, detail="Chat session not found")
     
-    db.delete(session)
-    db.commit()
+    await db.delete(session)
+    await db.commit()
     return {"message": "Chat session deleted successfully"}
 
 @app.post("/memories", response_model=MemoryResponse)
 async def create_memory(
     memory: MemoryCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     memory_service = MemoryService(db, current_user)
-    stored_memory = memory_service.store_memory(
+    stored_memory = await memory_service.store_memory(
         memory.memory_type,
         memory.key,
         memory.value,
@@ -225,27 +431,28 @@ async def create_memory(
 async def get_memories(
     memory_type: str = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     memory_service = MemoryService(db, current_user)
-    memories = memory_service.get_memories(memory_type)
+    memories = await memory_service.get_memories(memory_type)
     return memories
 
 @app.delete("/memories/{memory_id}")
 async def delete_memory(
     memory_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    memory = db.query(Memory).filter(
+    result = await db.execute(select(Memory).where(
         Memory.id == memory_id,
         Memory.user_id == current_user.id
-    ).first()
+    ))
+    memory = result.scalars().first()
     if not memory:
         raise HTTPException(status_code=404, detail="Memory not found")
     
-    db.delete(memory)
-    db.commit()
+    await db.delete(memory)
+    await db.commit()
     return {"message": "Memory deleted successfully"}
 
 if __name__ == "__main__":
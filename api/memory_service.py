@@ -1,28 +1,45 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import Memory, User
 from api.schemas import MemoryCreate
 from typing import List, Dict, Any
 import json
 
+# Statements shared with database.query_plans, which checks that they use their indexes
+def memory_lookup_query(user_id: int, key: str, memory_type: str):
+    """The memory a store_memory call upserts"""
+    return select(Memory).where(
+        Memory.user_id == user_id,
+        Memory.key == key,
+        Memory.memory_type == memory_type
+    )
+
+def memories_query(user_id: int, memory_type: str = None, limit: int = 50):
+    """A user's memories, most important first"""
+    query = select(Memory).where(Memory.user_id == user_id)
+    
+    if memory_type:
+        query = query.where(Memory.memory_type == memory_type)
+    
+    return query.order_by(Memory.importance.desc(), Memory.updated_at.desc()).limit(limit)
+
 class MemoryService:
-    def __init__(self, db: Session, user: User):
+    def __init__(self, db: AsyncSession, user: User):
         self.db = db
         self.user = user
     
-    def store_memory(self, memory_type: str, key: str, value: str, importance: int = 1):
-        """Store a memory for the user"""
+    async def store_memory(self, memory_type: str, key: str, value: str, importance: int = 1, commit: bool = True):
+        """Store a memory for the user; with ``commit=False`` it is written by the caller's commit"""
         # Check if memory already exists
-        existing_memory = self.db.query(Memory).filter(
-            Memory.user_id == self.user.id,
-            Memory.key == key,
-            Memory.memory_type == memory_type
-        ).first()
+        result = await self.db.execute(memory_lookup_query(self.user.id, key, memory_type))
+        existing_memory = result.scalars().first()
         
         if existing_memory:
             # Update existing memory
             existing_memory.value = value
             existing_memory.importance = importance
-            self.db.commit()
+            if commit:
+                await self.db.commit()
             return existing_memory
         else:
             # Create new memory
@@ -34,51 +51,41 @@ class MemoryService:
                 importance=importance
             )
             self.db.add(memory)
-            self.db.commit()
-            self.db.refresh(memory)
+            if commit:
+                await self.db.commit()
+                await self.db.refresh(memory)
             return memory
     
-    def get_memories(self, memory_type: str = None, limit: int = 50) -> List[Memory]:
+    async def get_memories(self, memory_type: str = None, limit: int = 50) -> List[Memory]:
         """Retrieve memories for the user"""
-        query = self.db.query(Memory).filter(Memory.user_id == self.user.id)
-        
-        if memory_type:
-            query = query.filter(Memory.memory_type == memory_type)
-        
-        return query.order_by(Memory.importance.desc(), Memory.updated_at.desc()).limit(limit).all()
+        result = await self.db.execute(memories_query(self.user.id, memory_type, limit))
+        return result.scalars().all()
     
-    def get_memory(self, key: str, memory_type: str = None) -> Memory:
+    async def get_memory(self, key: str, memory_type: str = None) -> Memory:
         """Get a specific memory"""
-        query = self.db.query(Memory).filter(
+        query = select(Memory).where(
             Memory.user_id == self.user.id,
             Memory.key == key
         )
         
         if memory_type:
-            query = query.filter(Memory.memory_type == memory_type)
+            query = query.where(Memory.memory_type == memory_type)
         
-        return query.first()
+        result = await self.db.execute(query)
+        return result.scalars().first()
     
-    def delete_memory(self, key: str, memory_type: str = None):
+    async def delete_memory(self, key: str, memory_type: str = None):
         """Delete a memory"""
-        query = self.db.query(Memory).filter(
-            Memory.user_id == self.user.id,
-            Memory.key == key
-        )
-        
-        if memory_type:
-            query = query.filter(Memory.memory_type == memory_type)
-        
-        memory = query.first()
+        memory = await self.get_memory(key, memory_type)
         if memory:
-            self.db.delete(memory)
-            self.db.commit()
+            await self.db.delete(memory)
+            await self.db.commit()
             return True
         return False
     
-    def get_context_for_chat(self) -> str:
+    async def get_context_for_chat(self) -> str:
         """Get relevant context for chat based on stored memories"""
-        memories = self.get_memories(limit=20)
+        memories = await self.get_memories(limit=20)
         
         context_parts = []
         context_parts.append(f"User's name: {self.user.username}")
@@ -105,27 +112,41 @@ class MemoryService:
         
         return "\n".join(context_parts)
     
-    def extract_and_store_from_conversation(self, user_message: str, assistant_response: str):
-        """Extract and store memories from conversation"""
+    async def memories_from_conversation(self, user_message: str, assistant_response: str) -> List[Dict[str, Any]]:
+        """Memories worth keeping from a conversation turn, as ``store_memory`` arguments"""
         # Simple keyword-based extraction (can be enhanced with NLP)
         user_lower = user_message.lower()
+        memories = []
         
         # Extract preferences
         if any(word in user_lower for word in ['like', 'prefer', 'favorite', 'love', 'enjoy']):
             if 'music' in user_lower:
-                self.store_memory('preference', 'music_preference', user_message, 3)
+                memories.append(dict(memory_type='preference', key='music_preference', value=user_message, importance=3))
             elif 'food' in user_lower:
-                self.store_memory('preference', 'food_preference', user_message, 3)
+                memories.append(dict(memory_type='preference', key='food_preference', value=user_message, importance=3))
             elif 'color' in user_lower:
-                self.store_memory('preference', 'color_preference', user_message, 2)
+                memories.append(dict(memory_type='preference', key='color_preference', value=user_message, importance=2))
         
         # Extract personal facts
         if any(word in user_lower for word in ['my name is', 'i am', 'i work', 'i live']):
             if 'work' in user_lower or 'job' in user_lower:
-                self.store_memory('fact', 'occupation', user_message, 4)
+                memories.append(dict(memory_type='fact', key='occupation', value=user_message, importance=4))
             elif 'live' in user_lower or 'from' in user_lower:
-                self.store_memory('fact', 'location', user_message, 3)
+                memories.append(dict(memory_type='fact', key='location', value=user_message, importance=3))
         
         # Store recent context
-        self.store_memory('context', f'conversation_{len(self.get_memories("context"))}', 
-                         f"User: {user_message[:100]}... Assistant: {assistant_response[:100]}...", 1)
\ No newline at end of file
+        memories.append(dict(
+            memory_type='context',
+            key=f'conversation_{len(await self.get_memories("context"))}',
+            value=f"User: {user_message[:100]}... Assistant: {assistant_response[:100]}...",
+            importance=1
+        ))
+        return memories
+    
+    async def extract_and_store_from_conversation(self, user_message: str, assistant_response: str, commit: bool = True):
+        """Extract and store memories from conversation, in a single commit (or none, with ``commit=False``)"""
+        for memory in await self.memories_from_conversation(user_message, assistant_response):
+            await self.store_memory(commit=False, **memory)
+        
+        if commit:
+            await self.db.commit()
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Keyset pagination for the chat listings.
+
+A cursor is the (time, id) of the last row of the previous page. The
+statements are built here so ``database.query_plans`` checks the same SQL
+the endpoints run.
+"""
+import base64
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select
+
+from database.models import ChatMessage, ChatSession
+
+
+def encode_cursor(moment: datetime, id: int) -> str:
+    return base64.urlsafe_b64encode(f"{moment.isoformat()}|{id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        moment, id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(moment), int(id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def older_than(time_column, id_column, cursor: str):
+    """Rows after ``cursor`` in (time, id) descending order"""
+    moment, id = decode_cursor(cursor)
+    # The plain upper bound on time lets a (..., time) index seek straight to the cursor
+    return and_(time_column <= moment, or_(time_column < moment, id_column < id))
+
+
+def session_list_query(user_id: int, cursor: Optional[str] = None):
+    """A user's sessions, most recently updated first, with their message counts"""
+    # Counted per listed session only, from an index on the message's session_id
+    message_count = select(func.count(ChatMessage.id)).where(
+        ChatMessage.session_id == ChatSession.id
+    ).correlate(ChatSession).scalar_subquery()
+    query = select(
+        ChatSession.id,
+        ChatSession.title,
+        ChatSession.updated_at,
+        message_count.label("message_count")
+    ).where(
+        ChatSession.user_id == user_id
+    ).order_by(ChatSession.updated_at.desc(), ChatSession.id.desc())
+    if cursor:
+        query = query.where(older_than(ChatSession.updated_at, ChatSession.id, cursor))
+    return query
+
+
+def session_messages_query(session_id: int, cursor: Optional[str] = None):
+    """A session's messages, newest first"""
+    query = select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(
+        ChatMessage.timestamp.desc(), ChatMessage.id.desc()
+    )
+    if cursor:
+        query = query.where(older_than(ChatMessage.timestamp, ChatMessage.id, cursor))
+    return query
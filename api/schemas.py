@@ -53,6 +53,19 @@ class ChatSessionResponse(ChatSessionBase):
     class Config:
         from_attributes = True
 
+class ChatSessionListItem(ChatSessionBase):
+    id: int
+    updated_at: datetime
+    message_count: int
+
+class ChatSessionPage(BaseModel):
+    sessions: List[ChatSessionListItem]
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` for the next page; None on the last page
+
+class ChatMessagePage(BaseModel):
+    messages: List[ChatMessageResponse]  # Oldest first within the page
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` for older messages; None when there are none
+
 class MemoryBase(BaseModel):
     memory_type: str
     key: str
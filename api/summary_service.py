@@ -0,0 +1,105 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import SessionLocal
+from database.models import ChatSession, ChatMessage, ConversationSummary
+from Backend.ContextWindow import GetContextWindow
+from Backend.ConversationSummary import GroqSummarizer, TrimToTokens, SummaryTokenLimit
+from typing import List, Dict, Tuple
+import threading
+
+# One fold at a time per chat session
+_session_locks: Dict[int, threading.Lock] = {}
+_session_locks_guard = threading.Lock()
+
+def _session_lock(session_id: int) -> threading.Lock:
+    with _session_locks_guard:
+        return _session_locks.setdefault(session_id, threading.Lock())
+
+def recent_messages_query(session_id: int, summarized_upto: int, limit: int):
+    """The newest ``limit`` messages of a session not yet folded into its summary, newest first"""
+    # Ordered by id, which is also what summarized_upto and the fold are keyed on; served by (session_id, id)
+    return select(ChatMessage).where(
+        ChatMessage.session_id == session_id,
+        ChatMessage.id > summarized_upto
+    ).order_by(ChatMessage.id.desc()).limit(limit)
+
+class SummaryService:
+    def __init__(self, db: AsyncSession, session: ChatSession, recent_limit: int = 64):
+        self.db = db
+        self.session = session
+        self.recent_limit = recent_limit
+        self.context = GetContextWindow()
+
+    async def get_summary(self) -> ConversationSummary:
+        """Get the stored running summary for the session, if any"""
+        result = await self.db.execute(select(ConversationSummary).where(
+            ConversationSummary.session_id == self.session.id
+        ))
+        return result.scalars().first()
+
+    async def build_history(self) -> Tuple[List[Dict[str, str]], int]:
+        """Return the prompt history for the session and the id up to which messages should be folded.
+
+        The history is the running summary followed by the newest unsummarized
+        messages that fit in half of the context budget (the other half is left
+        for the system prompt and memory context). Older messages are reported
+        through the returned id so the caller can fold them in the background.
+        """
+        if self.session.id is None:
+            # A session created in this request has no messages or summary yet
+            return [], 0
+
+        summary = await self.get_summary()
+        summarized_upto = summary.summarized_upto if summary else 0
+
+        # Only the newest messages are loaded; anything older is already summarized or about to be
+        result = await self.db.execute(recent_messages_query(self.session.id, summarized_upto, self.recent_limit))
+        rows = list(result.scalars().all())
+        rows.reverse()
+
+        system = []
+        if summary and summary.summary:
+            system.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary.summary}"})
+
+        turns = [{"role": row.role, "content": row.content} for row in rows]
+        window = self.context.build(system, turns, budget=self.context.budget // 2)
+        dropped = len(turns) - (len(window) - len(system))
+
+        fold_upto = summarized_upto
+        if len(rows) == self.recent_limit:
+            # The query hit its limit, so older unsummarized messages were not loaded; fold them too
+            fold_upto = rows[0].id - 1
+        if dropped > 0:
+            fold_upto = rows[dropped - 1].id
+        return window, fold_upto
+
+def fold_session_summary(session_id: int, upto_id: int, summarizer=GroqSummarizer):
+    """Fold messages of a session up to ``upto_id`` into its running summary (runs as a background task)"""
+    with _session_lock(session_id):
+        db = SessionLocal()
+        try:
+            summary = db.query(ConversationSummary).filter(
+                ConversationSummary.session_id == session_id
+            ).first()
+            if summary is None:
+                summary = ConversationSummary(session_id=session_id, summary="", summarized_upto=0)
+                db.add(summary)
+
+            if upto_id <= (summary.summarized_upto or 0):
+                return
+
+            rows = db.query(ChatMessage).filter(
+                ChatMessage.session_id == session_id,
+                ChatMessage.id > (summary.summarized_upto or 0),
+                ChatMessage.id <= upto_id
+            ).order_by(ChatMessage.id).all()
+            turns = [{"role": row.role, "content": row.content} for row in rows]
+
+            summary.summary = TrimToTokens(summarizer(summary.summary, turns), SummaryTokenLimit)
+            summary.summarized_upto = upto_id
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error updating summary for session {session_id}: {e}")
+        finally:
+            db.close()
@@ -0,0 +1,379 @@
+"""Write-behind queue for chat messages and memories.
+
+Request handlers hand their inserts to a single background writer instead
+of committing them themselves. The writer takes whatever is queued (up to
+``max_batch`` rows, waiting at most ``max_delay`` seconds for more) and
+writes it in one transaction, so concurrent requests share a commit.
+
+- Backpressure: the queue holds at most ``max_queue`` rows; ``submit()``
+  waits for room when the database falls behind.
+- Crash safety: every row is appended to a small journal as it is
+  queued, and a ``done`` marker is appended after each commit. Rows
+  without a marker are written again on the next start (at least once;
+  a replayed chat message that is already stored is skipped). Each
+  process journals to its own ``<name>.<pid><ext>`` file and holds an
+  exclusive lock on it, so several server workers never share a journal;
+  on start, journals no live process holds are replayed and removed.
+- Metrics: ``stats()`` reports batch sizes, flush latency and queue depth.
+"""
+import asyncio
+import glob
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from database.database import WriterSessionLocal
+from database.models import ChatMessage, Memory
+
+WRITE_BEHIND_BATCH = int(os.getenv("WRITE_BEHIND_BATCH", "64"))
+WRITE_BEHIND_DELAY_MS = float(os.getenv("WRITE_BEHIND_DELAY_MS", "5"))
+WRITE_BEHIND_QUEUE = int(os.getenv("WRITE_BEHIND_QUEUE", "1000"))
+WRITE_BEHIND_JOURNAL = os.getenv("WRITE_BEHIND_JOURNAL", "./write_behind.journal")
+# fsync the journal before each commit; without it the journal survives a crashed process but not a power loss
+WRITE_BEHIND_FSYNC = os.getenv("WRITE_BEHIND_FSYNC", "false").lower() in ("1", "true", "yes")
+
+# Journal is truncated once everything in it is committed and it has grown past this size
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+KINDS = ("chat_message", "memory")
+
+
+def memory_batch_query(identities):
+    """The stored memories for a batch's (user_id, memory_type, key) identities, in one query"""
+    return select(Memory).where(or_(*(
+        and_(Memory.user_id == user_id, Memory.memory_type == memory_type, Memory.key == key)
+        for user_id, memory_type, key in identities
+    )))
+
+
+class WriteItem:
+    """One queued row: ``kind`` is "chat_message" or "memory", ``values`` its columns"""
+
+    def __init__(self, seq: int, kind: str, values: Dict[str, Any], future: Optional[asyncio.Future]):
+        self.seq = seq
+        self.kind = kind
+        self.values = values
+        self.future = future
+
+
+def lock_file(file) -> bool:
+    """Take an exclusive lock on an open file without waiting; False if another process holds it"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def encode_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in values.items()}
+
+
+def decode_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(values.get("timestamp"), str):
+        values = dict(values, timestamp=datetime.fromisoformat(values["timestamp"]))
+    return values
+
+
+class WriteBehindQueue:
+    def __init__(self, session_factory=WriterSessionLocal, max_batch: int = WRITE_BEHIND_BATCH,
+                 max_delay: float = WRITE_BEHIND_DELAY_MS / 1000, max_queue: int = WRITE_BEHIND_QUEUE,
+                 journal_path: Optional[str] = WRITE_BEHIND_JOURNAL, fsync: bool = WRITE_BEHIND_FSYNC):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.journal_path = journal_path  # Base name; each process writes <name>.<pid><ext>
+        self.fsync = fsync
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._journal = None
+        self._journal_file = None  # This process's journal
+        self._seq = 0
+        self._pending = 0  # journaled but not yet committed
+        self._closing = False
+
+        self.batches = 0
+        self.items = 0
+        self.failed = 0
+        self.replayed = 0
+        self.producer_waits = 0
+        self.max_batch_seen = 0
+        self._flush_times = deque(maxlen=1000)
+
+    async def start(self):
+        """Write rows left in the journal by a previous run, then start the writer"""
+        if self._task is not None:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self.journal_path:
+            for path in self._leftover_journals():
+                await self._replay(path)
+            root, ext = os.path.splitext(self.journal_path)
+            self._journal_file = f"{root}.{os.getpid()}{ext}"
+            self._journal = open(self._journal_file, "w", encoding="utf-8")
+            lock_file(self._journal)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop taking new rows and wait until everything queued is committed"""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        # Rows from producers that were waiting for room when the queue closed
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                leftover.append(item)
+        if leftover:
+            await self._write_batch(leftover)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+            if self._pending == 0:
+                os.remove(self._journal_file)
+
+    async def submit(self, kind: str, values: Dict[str, Any]) -> asyncio.Future:
+        """Queue a row; the returned future resolves to the stored object once its batch is committed"""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown write kind: {kind}")
+        if self._task is None or self._closing:
+            raise RuntimeError("Write-behind queue is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        item = WriteItem(0, kind, values, future)
+        if self._queue.full():
+            self.producer_waits += 1
+        await self._queue.put(item)
+        # Numbered and journaled with no await after the put, so journal order is queue order
+        # and the writer cannot commit the row before it is journaled
+        self._seq += 1
+        item.seq = self._seq
+        self._pending += 1
+        self._journal_write({"seq": item.seq, "kind": kind, "values": encode_values(values)})
+        return future
+
+    async def write(self, kind: str, values: Dict[str, Any]):
+        """Queue a row and wait for its commit"""
+        return await (await self.submit(kind, values))
+
+    def stats(self) -> Dict[str, Any]:
+        flush_times = sorted(self._flush_times)
+
+        def flush_ms(fraction: float) -> float:
+            if not flush_times:
+                return 0.0
+            return round(flush_times[min(len(flush_times) - 1, int(len(flush_times) * fraction))] * 1000, 2)
+
+        return {
+            "running": self._task is not None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "producer_waits": self.producer_waits,
+            "batches": self.batches,
+            "items": self.items,
+            "failed": self.failed,
+            "replayed": self.replayed,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "flush_ms_p50": flush_ms(0.50),
+            "flush_ms_p95": flush_ms(0.95),
+            "flush_ms_max": flush_ms(1.0),
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[WriteItem]):
+        try:
+            await self._flush(batch)
+        except Exception as e:
+            # The writer must outlive a bad batch; its callers get the error
+            for item in batch:
+                if item.future is not None and not item.future.done():
+                    item.future.set_exception(e)
+        self._pending -= len(batch)
+        self._journal_write({"done": batch[-1].seq})
+        self._compact_journal()
+
+    async def _flush(self, batch: List[WriteItem], replay: bool = False):
+        """Write ``batch`` in one transaction; if that fails, write its rows one by one to isolate the bad ones"""
+        started = time.perf_counter()
+        if self.fsync and self._journal is not None:
+            await asyncio.to_thread(os.fsync, self._journal.fileno())
+        try:
+            async with self.session_factory() as db:
+                results = await self._apply(db, batch, replay)
+                await db.commit()
+            self._resolve(batch, results)
+        except Exception:
+            for item in batch:
+                try:
+                    async with self.session_factory() as db:
+                        results = await self._apply(db, [item], replay)
+                        await db.commit()
+                    self._resolve([item], results)
+                except Exception as e:
+                    self.failed += 1
+                    if item.future is not None and not item.future.done():
+                        item.future.set_exception(e)
+
+        self.batches += 1
+        self.items += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self._flush_times.append(time.perf_counter() - started)
+
+    async def _apply(self, db: AsyncSession, batch: List[WriteItem], replay: bool) -> list:
+        """Add ``batch`` to ``db``; returns the object each row is written to"""
+        # Memories are upserted by (user, type, key), like MemoryService.store_memory;
+        # the batch's existing memories are loaded with one query
+        identities = {
+            (item.values["user_id"], item.values["memory_type"], item.values["key"])
+            for item in batch if item.kind == "memory"
+        }
+        memories: Dict[tuple, Memory] = {}
+        if identities:
+            result = await db.execute(memory_batch_query(identities))
+            for memory in result.scalars():
+                memories.setdefault((memory.user_id, memory.memory_type, memory.key), memory)
+
+        results = []
+        for item in batch:
+            values = item.values
+            if item.kind == "chat_message":
+                message = None
+                if replay:
+                    # The batch may have been committed just before the crash, ahead of its done marker
+                    result = await db.execute(select(ChatMessage).where(
+                        ChatMessage.session_id == values["session_id"],
+                        ChatMessage.role == values["role"],
+                        ChatMessage.timestamp == values["timestamp"]
+                    ))
+                    message = result.scalars().first()
+                if message is None:
+                    message = ChatMessage(**values)
+                    db.add(message)
+                results.append(message)
+                continue
+
+            identity = (values["user_id"], values["memory_type"], values["key"])
+            memory = memories.get(identity)
+            if memory is None:
+                memory = memories[identity] = Memory(**values)
+                db.add(memory)
+            else:
+                memory.value = values["value"]
+                memory.importance = values.get("importance", 1)
+            results.append(memory)
+        return results
+
+    def _resolve(self, batch: List[WriteItem], results: list):
+        for item, result in zip(batch, results):
+            if item.future is not None and not item.future.done():
+                item.future.set_result(result)
+
+    def _leftover_journals(self) -> List[str]:
+        """Journals of this queue's base name, including one from before journals were per process"""
+        root, ext = os.path.splitext(self.journal_path)
+        paths = glob.glob(f"{glob.escape(root)}.*{ext}")
+        if os.path.exists(self.journal_path):
+            paths.append(self.journal_path)
+        return sorted(paths)
+
+    async def _replay(self, path: str):
+        """Write the rows left in ``path`` and remove it, unless a running process still owns it"""
+        try:
+            journal = open(path, "r+", encoding="utf-8")
+        except FileNotFoundError:
+            return  # Replayed and removed by another worker
+        with journal:
+            if not lock_file(journal):
+                return  # Another worker's live journal, or one being replayed
+            journal.seek(0)
+            leftover = self._read_journal(journal)
+            for start in range(0, len(leftover), self.max_batch):
+                await self._flush(leftover[start:start + self.max_batch], replay=True)
+            self.replayed += len(leftover)
+            if fcntl is not None:
+                os.remove(path)  # Still locked, so no other worker replays it again
+        if fcntl is None:
+            os.remove(path)  # Windows cannot remove an open file
+
+    def _read_journal(self, journal) -> List[WriteItem]:
+        """Rows journaled after the last done marker, oldest first"""
+        entries, done = [], 0
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by the crash
+            if "done" in entry:
+                done = max(done, entry["done"])
+            elif entry.get("kind") in KINDS:
+                entries.append(entry)
+        return [
+            WriteItem(entry["seq"], entry["kind"], decode_values(entry["values"]), None)
+            for entry in entries if entry["seq"] > done
+        ]
+
+    def _journal_write(self, entry: Dict[str, Any]):
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+
+    def _compact_journal(self):
+        if self._journal is None or self._pending or self._journal.tell() < JOURNAL_COMPACT_BYTES:
+            return
+        self._journal.seek(0)
+        self._journal.truncate()
+
+
+write_behind = WriteBehindQueue()
@@ -1,10 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import os
 import json
 from dotenv import load_dotenv, set_key
 import sys
 sys.path.append('..')
+from Backend.ChatLogStore import ChatLogStore
+from Backend.StatusChannel import GetStatusSubscriber, DescribeStatus
 try:
     from Backend.Chatbot import ChatBot
     from Backend.RealtimeSearchEngine import RealtimeSearchEngine
@@ -31,6 +33,12 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+#The assistant's chat log, relative to this server's working directory
+chat_log = ChatLogStore(
+    directory=os.path.join('..', 'Data', 'ChatLog'),
+    legacy_path=os.path.join('..', 'Data', 'ChatLog.json')
+)
+
 @app.route('/api/auth/login', methods=['POST'])
 def login():
     data = request.get_json()
@@ -89,14 +97,11 @@ def send_message():
 @app.route('/api/chat/history', methods=['GET'])
 def get_chat_history():
     try:
-        with open('../Data/ChatLog.json', 'r', encoding='utf-8') as f:
-            chat_log = json.load(f)
-        
         # Convert to frontend format
         messages = []
-        for entry in chat_log:
+        for entry in chat_log.iter_entries():
             messages.append({
-                'id': str(len(messages)),
+                'id': str(entry['id']),
                 'role': entry['role'],
                 'content': entry['content'],
                 'timestamp': '2024-01-01T00:00:00Z'  # You might want to add timestamps to your chat log
@@ -106,48 +111,46 @@ def get_chat_history():
             'success': True,
             'messages': messages
         })
-    except FileNotFoundError:
-        return jsonify({
-            'success': True,
-            'messages': []
-        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/chat/clear', methods=['POST'])
 def clear_chat_history():
     try:
-        with open('../Data/ChatLog.json', 'w', encoding='utf-8') as f:
-            json.dump([], f)
+        chat_log.clear()
         
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+#Live status pushed by the assistant process; no file is read per request
+status_channel = GetStatusSubscriber()
+
 @app.route('/api/status', methods=['GET'])
 def get_status():
     try:
-        # Read status from the existing status file
-        with open('../Frontend/Files/Status.data', 'r', encoding='utf-8') as f:
-            status = f.read().strip()
+        status = status_channel.get()['status']
         
-        return jsonify({
-            'success': True,
-            'status': status,
-            'isListening': status == 'Listening...',
-            'isThinking': status == 'Thinking...',
-            'isAnswering': status == 'Answering...'
-        })
-    except FileNotFoundError:
-        return jsonify({
-            'success': True,
-            'status': 'Available...',
-            'isListening': False,
-            'isThinking': False,
-            'isAnswering': False
-        })
+        return jsonify(dict(success=True, **DescribeStatus(status)))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/status/stream', methods=['GET'])
+def stream_status():
+    """Server-sent events: the current status right away, then every change as it happens"""
+    def events():
+        snapshot = status_channel.get()
+        yield f"event: status\ndata: {json.dumps(DescribeStatus(snapshot['status']))}\n\n"
+        while True:
+            latest = status_channel.wait_for_change(snapshot['version'], timeout=15)
+            if latest['version'] == snapshot['version']:
+                # Keep idle connections open through proxies
+                yield ": keep-alive\n\n"
+                continue
+            snapshot = latest
+            yield f"event: status\ndata: {json.dumps(DescribeStatus(snapshot['status']))}\n\n"
+    
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
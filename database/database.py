@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from typing import AsyncIterator
 import os
 from dotenv import load_dotenv
 
@@ -9,22 +11,67 @@ load_dotenv()
 # Database URL - using SQLite for simplicity, can be changed to PostgreSQL/MySQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./spectre_ai.db")
 
+# Async drivers for the request path, so a slow query never blocks the event loop
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_database_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    if "+" in scheme:
+        return url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
 engine = create_engine(
-    DATABASE_URL, 
+    DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+# The write-behind writer (api/write_behind.py) has a connection of its own: requests hold pooled
+# connections while they wait for its commit, so sharing their pool could leave it waiting on them
+writer_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=1, max_overflow=0)
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a write is in progress; wait for locks instead of failing
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+if "sqlite" in DATABASE_URL:
+    event.listen(engine, "connect", _configure_sqlite)
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+    event.listen(writer_engine.sync_engine, "connect", _configure_sqlite)
+
+# Background work that runs in worker threads (e.g. summary folding) keeps the sync session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request handlers use async sessions; objects stay readable after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+WriterSessionLocal = async_sessionmaker(writer_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def create_tables():
     from database.models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+
+async def create_tables_async():
+    from database.models import Base
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def dispose_engines():
+    await async_engine.dispose()
+    await writer_engine.dispose()
+    engine.dispose()
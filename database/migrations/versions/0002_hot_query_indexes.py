@@ -0,0 +1,33 @@
+"""Composite indexes for the hot lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:35:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chat_sessions_user_id_updated_at', 'chat_sessions', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_chat_messages_session_id_timestamp', 'chat_messages', ['session_id', 'timestamp'], unique=False)
+    op.create_index('ix_memories_user_id_key_memory_type', 'memories', ['user_id', 'key', 'memory_type'], unique=False)
+    op.create_index('ix_memories_user_id_importance_updated_at', 'memories', ['user_id', 'importance', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memories_user_id_importance_updated_at', table_name='memories')
+    op.drop_index('ix_memories_user_id_key_memory_type', table_name='memories')
+    op.drop_index('ix_chat_messages_session_id_timestamp', table_name='chat_messages')
+    op.drop_index('ix_chat_sessions_user_id_updated_at', table_name='chat_sessions')
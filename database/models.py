@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -21,6 +21,10 @@ class User(Base):
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # A user's sessions, most recently updated first
+        Index("ix_chat_sessions_user_id_updated_at", "user_id", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -31,9 +35,16 @@ class ChatSession(Base):
     # Relationships
     user = relationship("User", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="session")
+    summary = relationship("ConversationSummary", back_populates="session", uselist=False, cascade="all, delete-orphan")
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # A session's messages in order; also what a session's message count is read from
+        Index("ix_chat_messages_session_id_timestamp", "session_id", "timestamp"),
+        # A session's newest unsummarized messages, by id (SummaryService.build_history)
+        Index("ix_chat_messages_session_id_id", "session_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False)
@@ -44,8 +55,26 @@ class ChatMessage(Base):
     # Relationships
     session = relationship("ChatSession", back_populates="messages")
 
+class ConversationSummary(Base):
+    __tablename__ = "conversation_summaries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), unique=True, nullable=False)
+    summary = Column(Text, nullable=False, default="")
+    summarized_upto = Column(Integer, default=0)  # Messages with id <= this are folded into the summary
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    session = relationship("ChatSession", back_populates="summary")
+
 class Memory(Base):
     __tablename__ = "memories"
+    __table_args__ = (
+        # Upserts and lookups of one memory
+        Index("ix_memories_user_id_key_memory_type", "user_id", "key", "memory_type"),
+        # A user's memories, most important and most recent first
+        Index("ix_memories_user_id_importance_updated_at", "user_id", "importance", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
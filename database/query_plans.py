@@ -0,0 +1,170 @@
+"""Query-plan check for the API's hot lookups.
+
+Seeds a throwaway SQLite database (1M chat messages by default) with the
+schema from ``database.models``, then asks SQLite how it would run each hot
+query and fails if one of them does not use its index::
+
+    python -m database.query_plans --rows 1000000
+
+The statements are built by the same functions the API uses
+(``api/pagination.py``, ``api/memory_service.py``, ``api/summary_service.py``
+and ``api/write_behind.py``). Paged and limited queries also fail when
+SQLite would sort their rows in a temp B-tree instead of reading an index
+in order.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple, Union
+
+from sqlalchemy import create_engine
+
+from api.memory_service import memories_query, memory_lookup_query
+from api.pagination import encode_cursor, session_list_query, session_messages_query
+from api.summary_service import recent_messages_query
+from api.write_behind import memory_batch_query
+from database.models import Base
+
+MEMORY_TYPES = ("preference", "fact", "context")
+
+
+def seed(path: str, rows: int):
+    """Fill ``path`` with ``rows`` chat messages spread over users and sessions, plus memories"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    users = max(rows // 1000, 1)
+    sessions = max(rows // 50, 1)
+    memories = max(rows // 10, 1)
+    start = datetime(2024, 1, 1)
+    rng = random.Random(0)
+
+    def stamp(seconds: int) -> str:
+        return (start + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executemany(
+            "INSERT INTO users (id, username, email, hashed_password, created_at, is_active) VALUES (?, ?, ?, ?, ?, 1)",
+            ((i, f"user{i}", f"user{i}@example.com", "x", stamp(i)) for i in range(1, users + 1))
+        )
+        connection.executemany(
+            "INSERT INTO chat_sessions (id, user_id, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            ((i, rng.randint(1, users), f"Session {i}", stamp(i), stamp(i * 60)) for i in range(1, sessions + 1))
+        )
+        connection.executemany(
+            "INSERT INTO chat_messages (id, session_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+            ((i, rng.randint(1, sessions), "user" if i % 2 else "assistant", f"Message {i}", stamp(i))
+             for i in range(1, rows + 1))
+        )
+        connection.executemany(
+            "INSERT INTO memories (id, user_id, memory_type, key, value, importance, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((i, rng.randint(1, users), MEMORY_TYPES[i % 3], f"key_{i}", f"value {i}", rng.randint(1, 10),
+              stamp(i), stamp(i)) for i in range(1, memories + 1))
+        )
+    connection.close()
+
+
+def hot_queries() -> List[Tuple[str, object, List[Union[str, Tuple[str, ...]]], bool]]:
+    """(name, statement, indexes its plan must use, whether it must not sort) for every hot query.
+
+    An index given as a tuple is satisfied by any one of its names.
+    """
+    # Either index of a session's messages serves the per-session message count
+    session_messages = ("ix_chat_messages_session_id_timestamp", "ix_chat_messages_session_id_id")
+    cursor = encode_cursor(datetime(2024, 6, 1), 100)
+    identities = [(7, "fact", "key_7"), (8, "context", "key_8"), (9, "preference", "key_9")]
+
+    # Paged and limited queries must read rows in index order: a temp B-tree sorts every matching row first
+    return [
+        ("session list", session_list_query(7).limit(51),
+         ["ix_chat_sessions_user_id_updated_at", session_messages], True),
+        ("session list, next page", session_list_query(7, cursor).limit(51),
+         ["ix_chat_sessions_user_id_updated_at", session_messages], True),
+        ("session messages", session_messages_query(7).limit(51),
+         ["ix_chat_messages_session_id_timestamp"], True),
+        ("session messages, older page", session_messages_query(7, cursor).limit(51),
+         ["ix_chat_messages_session_id_timestamp"], True),
+        ("recent history", recent_messages_query(7, 0, 64), ["ix_chat_messages_session_id_id"], True),
+        ("memory upsert lookup", memory_lookup_query(7, "key_7", "fact"),
+         ["ix_memories_user_id_key_memory_type"], False),
+        ("write-behind memory lookup", memory_batch_query(identities),
+         ["ix_memories_user_id_key_memory_type"], False),
+        ("memories by importance", memories_query(7),
+         ["ix_memories_user_id_importance_updated_at"], True),
+        ("memories of one type", memories_query(7, "context"),
+         ["ix_memories_user_id_importance_updated_at"], True),
+    ]
+
+
+def explain(connection, statement) -> Tuple[str, List[str]]:
+    """The SQL of ``statement`` and the steps of SQLite's plan for it"""
+    sql = str(statement.compile(connection.engine, compile_kwargs={"literal_binds": True}))
+    return sql, [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def plan_problems(plan: List[str], indexes, ordered: bool) -> List[str]:
+    """Why ``plan`` is not good enough for a hot query; empty when it is"""
+    problems = []
+    for index in indexes:
+        names = index if isinstance(index, tuple) else (index,)
+        if not any(f"INDEX {name}" in step for name in names for step in plan):
+            problems.append(f"missing index {' or '.join(names)}")
+    problems += [f"full scan: {step}" for step in plan if step.startswith("SCAN ") and "INDEX" not in step]
+    if ordered:
+        problems += [f"sorts: {step}" for step in plan if "TEMP B-TREE" in step]
+    return problems
+
+
+def check(path: str) -> bool:
+    engine = create_engine(f"sqlite:///{path}")
+    ok = True
+    with engine.connect() as connection:
+        for name, statement, indexes, ordered in hot_queries():
+            sql, plan = explain(connection, statement)
+            started = time.perf_counter()
+            connection.exec_driver_sql(sql).fetchall()
+            elapsed = time.perf_counter() - started
+
+            problems = plan_problems(plan, indexes, ordered)
+            passed = not problems
+            ok = ok and passed
+            print(f"{'ok  ' if passed else 'FAIL'} {name:<30} {elapsed * 1000:8.2f} ms")
+            for step in plan:
+                print(f"       {step}")
+            for problem in problems:
+                print(f"       {problem}")
+    engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the API's hot queries use their indexes")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="chat messages to seed")
+    parser.add_argument("--keep", help="seed this database file and keep it (reused if it exists)")
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), "query_plans.db")
+    try:
+        if not (args.keep and os.path.exists(path)):
+            started = time.perf_counter()
+            print(f"Seeding {args.rows} chat messages into {path}...")
+            seed(path, args.rows)
+            print(f"Seeded in {time.perf_counter() - started:.1f} s\n")
+        ok = check(path)
+    finally:
+        if not args.keep and os.path.exists(path):
+            os.remove(path)
+    print("\nAll hot queries use their indexes" if ok else "\nSome hot queries do not use their indexes")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
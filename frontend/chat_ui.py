@@ -1,11 +1,12 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import scrolledtext, messagebox
 import requests
 import json
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 import threading
 import time
+from frontend.session_list import SessionList
 
 class ChatUI:
     def __init__(self, user_data: Dict[str, Any], access_token: str, api_base_url: str = "http://localhost:8000"):
@@ -22,6 +23,8 @@ class ChatUI:
         # Chat variables
         self.current_session_id = None
         self.chat_sessions = []
+        self.sessions_cursor = None  # Next page of the session list, None when all are loaded
+        self.messages_cursor = None  # Older messages of the open session, None when all are shown
         self.is_typing = False
         
         self.setup_ui()
@@ -124,21 +127,8 @@ class ChatUI:
         sessions_frame = tk.Frame(sidebar_frame, bg='#16213e')
         sessions_frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
         
-        # Scrollable sessions list
-        self.sessions_canvas = tk.Canvas(sessions_frame, bg='#16213e', highlightthickness=0)
-        sessions_scrollbar = ttk.Scrollbar(sessions_frame, orient="vertical", command=self.sessions_canvas.yview)
-        self.sessions_scrollable_frame = tk.Frame(self.sessions_canvas, bg='#16213e')
-        
-        self.sessions_scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.sessions_canvas.configure(scrollregion=self.sessions_canvas.bbox("all"))
-        )
-        
-        self.sessions_canvas.create_window((0, 0), window=self.sessions_scrollable_frame, anchor="nw")
-        self.sessions_canvas.configure(yscrollcommand=sessions_scrollbar.set)
-        
-        self.sessions_canvas.pack(side="left", fill="both", expand=True)
-        sessions_scrollbar.pack(side="right", fill="y")
+        # Virtualized sessions list
+        self.session_list = SessionList(sessions_frame, self.select_session, on_more=self.load_more_sessions)
         
     def setup_chat_area(self, parent):
         chat_frame = tk.Frame(parent, bg='#1a1a2e')
@@ -167,6 +157,8 @@ class ChatUI:
         self.chat_display.tag_configure("assistant", foreground="#10b981", font=('Arial', 11, 'bold'))
         self.chat_display.tag_configure("timestamp", foreground="#6b7280", font=('Arial', 9))
         self.chat_display.tag_configure("typing", foreground="#fbbf24", font=('Arial', 10, 'italic'))
+        self.chat_display.tag_configure("load_earlier", foreground="#8b5cf6", font=('Arial', 9, 'underline'), justify='center')
+        self.chat_display.tag_bind("load_earlier", "<Button-1>", lambda e: self.load_earlier_messages())
         
         # Input area
         input_frame = tk.Frame(chat_frame, bg='#1a1a2e')
@@ -218,100 +210,115 @@ class ChatUI:
         self.status_label.pack(fill='x', pady=(5, 0))
         
     def load_chat_sessions(self):
-        """Load chat sessions from API"""
+        """Load the first page of chat sessions from API"""
         try:
             response = requests.get(f"{self.api_base_url}/chat/sessions", headers=self.headers)
             if response.status_code == 200:
-                self.chat_sessions = response.json()
+                page = response.json()
+                self.chat_sessions = page['sessions']
+                self.sessions_cursor = page['next_cursor']
                 self.update_sessions_display()
             else:
                 messagebox.showerror("Error", "Failed to load chat sessions")
         except Exception as e:
             messagebox.showerror("Error", f"Connection error: {str(e)}")
     
-    def update_sessions_display(self):
-        """Update the sessions display in sidebar"""
-        # Clear existing sessions
-        for widget in self.sessions_scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        if not self.chat_sessions:
-            no_sessions_label = tk.Label(
-                self.sessions_scrollable_frame,
-                text="No chat sessions yet.\nClick 'New Chat' to start!",
-                font=('Arial', 10),
-                fg='#6b7280',
-                bg='#16213e',
-                justify='center'
-            )
-            no_sessions_label.pack(pady=20)
+    def load_more_sessions(self):
+        """Load the next page of chat sessions once the end of the list scrolls into view"""
+        if not self.sessions_cursor:
             return
-        
-        for session in self.chat_sessions:
-            session_frame = tk.Frame(
-                self.sessions_scrollable_frame,
-                bg='#1f2937' if session['id'] != self.current_session_id else '#8b5cf6',
-                relief='flat',
-                bd=1
-            )
-            session_frame.pack(fill='x', pady=2, padx=5)
-            
-            # Session title
-            title_label = tk.Label(
-                session_frame,
-                text=session['title'][:30] + "..." if len(session['title']) > 30 else session['title'],
-                font=('Arial', 10, 'bold'),
-                fg='white',
-                bg=session_frame['bg'],
-                anchor='w'
-            )
-            title_label.pack(fill='x', padx=10, pady=(8, 2))
-            
-            # Session info
-            message_count = len(session.get('messages', []))
-            updated_at = datetime.fromisoformat(session['updated_at'].replace('Z', '+00:00'))
-            time_str = updated_at.strftime('%m/%d %H:%M')
-            
-            info_label = tk.Label(
-                session_frame,
-                text=f"{message_count} messages • {time_str}",
-                font=('Arial', 8),
-                fg='#9ca3af',
-                bg=session_frame['bg'],
-                anchor='w'
+        try:
+            response = requests.get(
+                f"{self.api_base_url}/chat/sessions",
+                params={'cursor': self.sessions_cursor},
+                headers=self.headers
             )
-            info_label.pack(fill='x', padx=10, pady=(0, 8))
-            
-            # Bind click event
-            session_frame.bind("<Button-1>", lambda e, s=session: self.select_session(s))
-            title_label.bind("<Button-1>", lambda e, s=session: self.select_session(s))
-            info_label.bind("<Button-1>", lambda e, s=session: self.select_session(s))
+            if response.status_code == 200:
+                page = response.json()
+                loaded = {session['id'] for session in self.chat_sessions}
+                self.chat_sessions = self.chat_sessions + [s for s in page['sessions'] if s['id'] not in loaded]
+                self.sessions_cursor = page['next_cursor']
+                self.update_sessions_display()
+        except Exception as e:
+            self.status_label.config(text=f"Could not load more chats: {str(e)}")
+    
+    def update_sessions_display(self):
+        """Update the sessions display in sidebar (only changed rows are redrawn)"""
+        self.session_list.select(self.current_session_id)
+        self.session_list.set_sessions(self.chat_sessions)
     
     def select_session(self, session):
         """Select and load a chat session"""
         self.current_session_id = session['id']
         self.load_session_messages(session)
-        self.update_sessions_display()
+        self.session_list.select(self.current_session_id)
+    
+    def fetch_messages(self, session_id, cursor=None):
+        """One page of a session's messages (oldest first) and the cursor for older ones"""
+        params = {'cursor': cursor} if cursor else {}
+        response = requests.get(
+            f"{self.api_base_url}/chat/sessions/{session_id}/messages",
+            params=params,
+            headers=self.headers
+        )
+        response.raise_for_status()
+        page = response.json()
+        return page['messages'], page['next_cursor']
     
     def load_session_messages(self, session):
-        """Load messages for the selected session"""
+        """Load the latest messages for the selected session; older ones are loaded on request"""
         self.chat_display.config(state='normal')
         self.chat_display.delete(1.0, tk.END)
+        self.chat_display.config(state='disabled')
+        
+        try:
+            messages, self.messages_cursor = self.fetch_messages(session['id'])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load messages: {str(e)}")
+            return
         
-        messages = session.get('messages', [])
         for message in messages:
             self.display_message(
                 message['role'],
                 message['content'],
                 datetime.fromisoformat(message['timestamp'].replace('Z', '+00:00'))
             )
+        self.show_load_earlier()
+        self.chat_display.see(tk.END)
+    
+    def load_earlier_messages(self):
+        """Insert the previous page of messages above the ones shown"""
+        if not self.messages_cursor or not self.current_session_id:
+            return
+        try:
+            messages, self.messages_cursor = self.fetch_messages(self.current_session_id, self.messages_cursor)
+        except Exception as e:
+            self.status_label.config(text=f"Could not load earlier messages: {str(e)}")
+            return
         
+        self.chat_display.config(state='normal')
+        link = self.chat_display.tag_ranges("load_earlier")
+        if link:
+            self.chat_display.delete(*link)
+        # Inserting at the top in reverse keeps the page in order
+        for message in reversed(messages):
+            timestamp = datetime.fromisoformat(message['timestamp'].replace('Z', '+00:00'))
+            for text, *tags in reversed(self.message_segments(message['role'], message['content'], timestamp)):
+                self.chat_display.insert(1.0, text, *tags)
         self.chat_display.config(state='disabled')
-        self.chat_display.see(tk.END)
+        self.show_load_earlier()
+    
+    def show_load_earlier(self):
+        """Offer older messages at the top of the chat while there are any"""
+        if self.messages_cursor:
+            self.chat_display.config(state='normal')
+            self.chat_display.insert(1.0, "Load earlier messages\n\n", "load_earlier")
+            self.chat_display.config(state='disabled')
     
     def create_new_chat(self):
         """Create a new chat session"""
         self.current_session_id = None
+        self.messages_cursor = None
         self.chat_display.config(state='normal')
         self.chat_display.delete(1.0, tk.END)
         self.chat_display.config(state='disabled')
@@ -323,22 +330,24 @@ class ChatUI:
             datetime.now()
         )
         
-        self.update_sessions_display()
+        self.session_list.select(None)
+    
+    def message_segments(self, role, content, timestamp):
+        """The pieces of text (with their tags) a message is displayed as"""
+        sender = self.user_data['username'] if role == 'user' else 'Spectre AI'
+        return [
+            (f"[{timestamp.strftime('%H:%M')}] ", "timestamp"),
+            (f"{sender}: ", role),
+            (f"{content}\n\n",)
+        ]
     
     def display_message(self, role, content, timestamp):
         """Display a message in the chat area"""
         self.chat_display.config(state='normal')
         
-        # Add timestamp
-        time_str = timestamp.strftime('%H:%M')
-        self.chat_display.insert(tk.END, f"[{time_str}] ", "timestamp")
-        
-        # Add sender name
-        sender = self.user_data['username'] if role == 'user' else 'Spectre AI'
-        self.chat_display.insert(tk.END, f"{sender}: ", role)
-        
-        # Add message content
-        self.chat_display.insert(tk.END, f"{content}\n\n")
+        # Timestamp, sender name and message content
+        for text, *tags in self.message_segments(role, content, timestamp):
+            self.chat_display.insert(tk.END, text, *tags)
         
         self.chat_display.config(state='disabled')
         self.chat_display.see(tk.END)
@@ -353,12 +362,10 @@ class ChatUI:
     def remove_typing_indicator(self):
         """Remove typing indicator"""
         self.chat_display.config(state='normal')
-        content = self.chat_display.get(1.0, tk.END)
-        if "Spectre AI is thinking..." in content:
-            lines = content.split('\n')
-            lines = [line for line in lines if "Spectre AI is thinking..." not in line]
-            self.chat_display.delete(1.0, tk.END)
-            self.chat_display.insert(1.0, '\n'.join(lines))
+        # Only the indicator's own text is removed, so the other messages keep their tags
+        indicator = self.chat_display.tag_ranges("typing")
+        if indicator:
+            self.chat_display.delete(*indicator)
         self.chat_display.config(state='disabled')
     
     def send_message(self):
@@ -381,44 +388,89 @@ class ChatUI:
         threading.Thread(target=self._send_message_thread, args=(message,), daemon=True).start()
     
     def _send_message_thread(self, message):
-        """Send message in background thread"""
+        """Send message in background thread and render the answer as it streams in"""
         try:
             chat_data = {
                 'message': message,
                 'session_id': self.current_session_id
             }
             
-            response = requests.post(
-                f"{self.api_base_url}/chat",
+            with requests.post(
+                f"{self.api_base_url}/chat/stream",
                 json=chat_data,
-                headers=self.headers
-            )
-            
-            if response.status_code == 200:
-                message_data = response.json()
+                headers=self.headers,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    error_data = response.json()
+                    error_msg = error_data.get('detail', 'Unknown error')
+                    self.root.after(0, self._handle_response_error, error_msg)
+                    return
                 
-                # Update UI in main thread
-                self.root.after(0, self._handle_response_success, message_data)
+                # Server-Sent Events: "event: <name>" and "data: <json>" lines, blank line between events
+                response.encoding = 'utf-8'
+                event = None
+                started = False
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith('event:'):
+                        event = line[len('event:'):].strip()
+                        continue
+                    if not line.startswith('data:'):
+                        continue
+                    data = json.loads(line[len('data:'):].strip())
+                    
+                    if event == 'session':
+                        # If this was a new chat, update session ID
+                        if not self.current_session_id:
+                            self.current_session_id = data.get('session_id')
+                    elif event == 'token':
+                        if not started:
+                            started = True
+                            self.root.after(0, self._begin_streamed_message)
+                        self.root.after(0, self._append_streamed_token, data['content'])
+                    elif event == 'done':
+                        if not started:
+                            self.root.after(0, self._begin_streamed_message)
+                            self.root.after(0, self._append_streamed_token, data['content'])
+                        self.root.after(0, self._finish_streamed_message)
+                        return
+                    elif event == 'error':
+                        if started:
+                            self.root.after(0, self._finish_streamed_message)
+                        self.root.after(0, self._handle_response_error, data.get('detail', 'Unknown error'))
+                        return
                 
-                # If this was a new chat, update session ID
-                if not self.current_session_id:
-                    self.current_session_id = message_data.get('session_id')
-                
-            else:
-                error_data = response.json()
-                error_msg = error_data.get('detail', 'Unknown error')
-                self.root.after(0, self._handle_response_error, error_msg)
+                # The connection closed before the answer was complete
+                if started:
+                    self.root.after(0, self._finish_streamed_message)
+                self.root.after(0, self._handle_response_error, "Connection closed before the answer was complete")
                 
         except Exception as e:
             self.root.after(0, self._handle_response_error, str(e))
     
-    def _handle_response_success(self, message_data):
-        """Handle successful response in main thread"""
+    def _begin_streamed_message(self):
+        """Replace the typing indicator with the header of the streamed answer"""
         self.remove_typing_indicator()
-        
-        # Display AI response
-        timestamp = datetime.fromisoformat(message_data['timestamp'].replace('Z', '+00:00'))
-        self.display_message("assistant", message_data['content'], timestamp)
+        self.chat_display.config(state='normal')
+        self.chat_display.insert(tk.END, f"[{datetime.now().strftime('%H:%M')}] ", "timestamp")
+        self.chat_display.insert(tk.END, "Spectre AI: ", "assistant")
+        self.chat_display.config(state='disabled')
+        self.chat_display.see(tk.END)
+        self.status_label.config(text="Receiving answer...")
+    
+    def _append_streamed_token(self, token):
+        """Append one streamed chunk to the answer being displayed"""
+        self.chat_display.config(state='normal')
+        self.chat_display.insert(tk.END, token)
+        self.chat_display.config(state='disabled')
+        self.chat_display.see(tk.END)
+    
+    def _finish_streamed_message(self):
+        """Close the streamed answer once the server has stored it"""
+        self.chat_display.config(state='normal')
+        self.chat_display.insert(tk.END, "\n\n")
+        self.chat_display.config(state='disabled')
+        self.chat_display.see(tk.END)
         
         # Update status
         self.status_label.config(text="Ready to chat...")
@@ -0,0 +1,193 @@
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional
+
+ROW_HEIGHT = 52
+ROW_GAP = 4
+BACKGROUND = '#16213e'
+ROW_BACKGROUND = '#1f2937'
+SELECTED_BACKGROUND = '#8b5cf6'
+
+
+def session_signature(session: Dict[str, Any]) -> tuple:
+    """What a row shows for a session; a row is redrawn only when this changes"""
+    return (
+        session['title'],
+        session['updated_at'],
+        session['message_count']
+    )
+
+
+class SessionRow:
+    """One reusable row widget; it is moved and re-filled as the list scrolls"""
+
+    def __init__(self, canvas: tk.Canvas, on_click: Callable[['SessionRow'], None], on_wheel: Callable):
+        self.canvas = canvas
+        self.session_id = None
+        self.shown = None  # (session id, signature, selected) currently drawn
+        self.y = None
+
+        self.frame = tk.Frame(canvas, bg=ROW_BACKGROUND, relief='flat', bd=1)
+        self.title_label = tk.Label(
+            self.frame,
+            font=('Arial', 10, 'bold'),
+            fg='white',
+            bg=ROW_BACKGROUND,
+            anchor='w'
+        )
+        self.title_label.pack(fill='x', padx=10, pady=(8, 2))
+        self.info_label = tk.Label(
+            self.frame,
+            font=('Arial', 8),
+            fg='#9ca3af',
+            bg=ROW_BACKGROUND,
+            anchor='w'
+        )
+        self.info_label.pack(fill='x', padx=10, pady=(0, 8))
+
+        for widget in (self.frame, self.title_label, self.info_label):
+            widget.bind("<Button-1>", lambda e: on_click(self))
+            widget.bind("<MouseWheel>", on_wheel)
+
+        self.window = canvas.create_window(5, 0, window=self.frame, anchor='nw', height=ROW_HEIGHT - ROW_GAP)
+
+    def show(self, y: int, width: int, session: Dict[str, Any], signature: tuple, selected: bool) -> bool:
+        """Place the row and draw ``session`` into it; returns whether the labels had to be redrawn"""
+        if self.y != y:
+            self.canvas.coords(self.window, 5, y)
+            self.y = y
+        self.canvas.itemconfigure(self.window, state='normal', width=width)
+
+        self.session_id = session['id']
+        shown = (session['id'], signature, selected)
+        if shown == self.shown:
+            return False
+        self.shown = shown
+
+        title, updated_at, message_count = signature
+        bg = SELECTED_BACKGROUND if selected else ROW_BACKGROUND
+        time_str = datetime.fromisoformat(updated_at.replace('Z', '+00:00')).strftime('%m/%d %H:%M')
+        self.frame.config(bg=bg)
+        self.title_label.config(text=title[:30] + "..." if len(title) > 30 else title, bg=bg)
+        self.info_label.config(text=f"{message_count} messages • {time_str}", bg=bg)
+        return True
+
+    def hide(self):
+        self.session_id = None
+        if self.y is not None:
+            # Also moved out of the scroll region; older Tk ignores state on window items
+            self.canvas.coords(self.window, 5, -2 * ROW_HEIGHT)
+            self.y = None
+        self.canvas.itemconfigure(self.window, state='hidden')
+
+
+class SessionList:
+    """Virtualized sidebar list of chat sessions.
+
+    Only the rows that fit in the visible part of the canvas exist as
+    widgets; scrolling moves and re-fills them. ``set_sessions()`` diffs the
+    new data against what each row shows (by id, title, updated_at and
+    message count), so an update touches only the rows that changed.
+    ``on_more`` is called once the last loaded session scrolls into view,
+    so the owner can fetch the next page and call ``set_sessions()`` again.
+    """
+
+    def __init__(self, parent: tk.Widget, on_select: Callable[[Dict[str, Any]], None],
+                 on_more: Optional[Callable[[], None]] = None):
+        self.on_select = on_select
+        self.on_more = on_more
+        self._more_requested = False
+        self.sessions: List[Dict[str, Any]] = []
+        self.signatures: Dict[int, tuple] = {}
+        self.by_id: Dict[int, Dict[str, Any]] = {}
+        self.selected_id: Optional[int] = None
+        self.rows: List[SessionRow] = []
+        self.rows_redrawn = 0
+        self._scrollregion = None
+
+        self.canvas = tk.Canvas(parent, bg=BACKGROUND, highlightthickness=0, yscrollincrement=ROW_HEIGHT)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.empty_label = self.canvas.create_text(
+            0, 20,
+            text="No chat sessions yet.\nClick 'New Chat' to start!",
+            font=('Arial', 10),
+            fill='#6b7280',
+            justify='center',
+            anchor='n',
+            state='hidden'
+        )
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+
+    def set_sessions(self, sessions: List[Dict[str, Any]]):
+        """Show a new list of sessions; unchanged visible rows are left alone"""
+        self.sessions = sessions
+        self.signatures = {session['id']: session_signature(session) for session in sessions}
+        self.by_id = {session['id']: session for session in sessions}
+        self._more_requested = False
+        self.render()
+
+    def select(self, session_id: Optional[int]):
+        """Highlight a session (None for a new, unsaved chat)"""
+        if session_id != self.selected_id:
+            self.selected_id = session_id
+            self.render()
+
+    def render(self):
+        """Fill the visible rows from the current scroll position"""
+        width = max(self.canvas.winfo_width() - 10, 1)
+        height = max(self.canvas.winfo_height(), ROW_HEIGHT)
+        total = len(self.sessions)
+
+        scrollregion = (0, 0, width, total * ROW_HEIGHT)
+        if scrollregion != self._scrollregion:
+            self._scrollregion = scrollregion
+            self.canvas.configure(scrollregion=scrollregion)
+
+        self.canvas.coords(self.empty_label, width / 2, 20)
+        self.canvas.itemconfigure(self.empty_label, state='hidden' if total else 'normal')
+
+        first = max(int(self.canvas.canvasy(0) // ROW_HEIGHT), 0)
+        visible = height // ROW_HEIGHT + 2
+        while len(self.rows) < visible:
+            self.rows.append(SessionRow(self.canvas, self._on_row_click, self._on_wheel))
+
+        for offset, row in enumerate(self.rows):
+            index = first + offset
+            if offset >= visible or index >= total:
+                row.hide()
+                continue
+            session = self.sessions[index]
+            if row.show(index * ROW_HEIGHT, width, session, self.signatures[session['id']],
+                        session['id'] == self.selected_id):
+                self.rows_redrawn += 1
+
+        if self.on_more and total and first + visible >= total and not self._more_requested:
+            # After the current event, so a page load never runs inside a render
+            self._more_requested = True
+            self.canvas.after_idle(self.on_more)
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.render()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def _on_wheel(self, event):
+        if not event.delta:
+            return
+        self.canvas.yview_scroll(int(-event.delta / 120) or (-1 if event.delta > 0 else 1), 'units')
+        self.render()
+
+    def _on_row_click(self, row: SessionRow):
+        session = self.by_id.get(row.session_id)
+        if session is not None:
+            self.on_select(session)
@@ -2,24 +2,27 @@ from Frontend.GUI import (
     GraphicalUserInterface,
     SetAssistantStatus,
     ShowTextToScreen,
-    TempDirectoryPath,
+    LoadChatHistory,
     SetMicrophoneStatus,
     AnswerModifier,
     QueryModifier,
     GetAssistantStatus,
     GetMicrophoneStatus )
-from Backend.model import FirstLayerDMM
-from Backend.RealtimeSearchEngine import RealtimeSearchEngine
+from Backend.model import FirstLayerDMMStream, SpeculativeDecisionStream
+from Backend.FastPath import Speculator
+from Backend.TaskDispatcher import TaskDispatcher
+from Backend.RealtimeSearchEngine import RealtimeSearchEngineStream
 from Backend.Automation import Automation
-from Backend.stt import SpeechRecognition
-from Backend.Chatbot import ChatBot
-from Backend.tts import TextToSpeech
+from Backend.stt import SpeechRecognition, WarmUpSpeechRecognition
+from Backend.Chatbot import ChatBotStream
+from Backend.tts import SpeakStream, PrewarmResponses, StopSpeaking
+from Backend.EventBus import Bus, MicrophoneTopic
+from Backend.StatusChannel import StartStatusChannel
+from Backend.ChatLogStore import GetChatLogStore
 from dotenv import dotenv_values
 from asyncio import run
-from time import sleep
 import subprocess
 import threading
-import json
 import os
 
 env_vars = dotenv_values(".env")
@@ -27,138 +30,105 @@ Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 DefaultMessage = f'''{Username}: Hello {Assistantname}, How are you?
 {Assistantname} Welcome sir. How may I help you?'''
-subprocess=[]
-Functions = ['open','close','play','content','google search','youtube search']
+subprocess_list = []
 
 def ShowDefaultChatIfNoChats():
-    File = open(r'Data\ChatLog.json', "r",encoding='utf-8')
-    if len(File.read())<5:
-        with open(TempDirectoryPath('Database.data'),'w', encoding='utf-8') as file:
-            file.write("")
-        with open(TempDirectoryPath('Responses.data'), "w", encoding='utf-8') as file:
-            file.write(DefaultMessage)
+    if len(GetChatLogStore()) == 0:
+        ShowTextToScreen(DefaultMessage)
 
 def ReadChatLogJson():
-    with open(r'Data\ChatLog.json',"r",encoding = 'utf-8') as file:
-        chatlog_data = json.load(file)
-    return chatlog_data
+    return GetChatLogStore().read_all()
 
+#Hands the saved conversation to the GUI once; new messages are added as they happen
 def ChatLogIntegration():
     json_data = ReadChatLogJson()
-    formatted_chatlog = ""
+    messages = []
     for entry in json_data:
         if entry["role"] == "user":
-            formatted_chatlog += f"User: {entry['content']}\n"
+            messages.append(f"{Username} : {AnswerModifier(entry['content'])}")
         elif entry["role"] == "assistant":
-            formatted_chatlog += f"Assistant: {entry['content']}\n"
-    formatted_chatlog = formatted_chatlog.replace("User", Username+" ")
-    formatted_chatlog = formatted_chatlog.replace("Assistant", Assistantname+" ")
-
-    with open(TempDirectoryPath('Database.data'),'w',encoding='utf-8') as file:
-        file.write(AnswerModifier(formatted_chatlog))
-
-def ShowChatsOnGUI():
-    File = open(TempDirectoryPath('Database.data'),'r',encoding='utf-8')
-    Data = File.read()
-    if len(str(Data))>0:
-        lines = Data.split('\n')
-        result = '\n'.join(lines)
-        File.close()
-        File = open(TempDirectoryPath('Responses.data'),'w',encoding='utf-8')
-        File.write(result)
-        File.close()
+            messages.append(f"{Assistantname} : {AnswerModifier(entry['content'])}")
+    LoadChatHistory(messages)
 
 def InitialExecution():
     SetMicrophoneStatus("False")
-    ShowTextToScreen("")
-    ShowDefaultChatIfNoChats()
     ChatLogIntegration()
+    ShowDefaultChatIfNoChats()
+    PrewarmResponses()
+    WarmUpSpeechRecognition()
+    StartStatusChannel()
 
 InitialExecution()
 
-def MainExecution():
-    TaskExecution = False
-    ImageExecution = False
-    ImageGenerationQuery = ""
+def StartAutomation(Task):
+    run(Automation([Task]))
 
-    SetAssistantStatus("Listening...")
-    Query = SpeechRecognition()
-    ShowTextToScreen(f"{Username}:{Query}")
-    SetAssistantStatus("Thinking...")
-    Decision = FirstLayerDMM(Query)
-
-    print("")
-    print(f"Decision: {Decision}")
-    print("")
-
-    G = any([i for i in Decision if i.startswith("general")])
-    R = any([i for i in Decision if i.startswith("realtime")])
-
-    Merged_query = " and ".join(
-        [" ".join(i.split()[1:]) for i in Decision if i.startswith("general") or i.startswith("realtime")]
-    )
-
-    for queries in Decision:
-        if "generate" in queries:
-            ImageGenerationQuery = str(queries)
-            ImageExecution = True
-    for queries in Decision:
-        if TaskExecution == False:
-            if any(queries.startswith(func) for func in Functions):
-                run(Automation(list(Decision)))
-                TaskExecution = True
-                SetAssistantStatus("Available...")
-        
-    if ImageExecution == True:
-        with open(r'Frontend\Files\ImageGenertion.data','w') as file:
-            file.write(f"{ImageGenerationQuery},True")
-        
-        try:
-            p1 = subprocess.Popen(['python', r"Backend\ImageGeneration.py"],
-                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
-                                  stdin=subprocess.PIPE, shell=False)
-            subprocess.append(p1)
-        except Exception as e:
-            print(f"Error starting ImageGeneration.py: {e}")
+def StartImageGeneration(Task):
+    with open(r'Frontend\Files\ImageGenertion.data','w') as file:
+        file.write(f"{Task},True")
     
-    if G and R or R:
+    try:
+        p1 = subprocess.Popen(['python', r"Backend\ImageGeneration.py"],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
+                              stdin=subprocess.PIPE, shell=False)
+        subprocess_list.append(p1)
+    except Exception as e:
+        print(f"Error starting ImageGeneration.py: {e}")
+
+def AnswerTask(Task):
+    if Task.startswith("realtime"):
         SetAssistantStatus("Searching...")
-        Answer = RealtimeSearchEngine(QueryModifier(Merged_query))
-        ShowTextToScreen(f"{Assistantname}: {Answer}")
-        SetAssistantStatus("Answering...")
-        TextToSpeech(Answer)
-        return True
-    
+        Tokens = RealtimeSearchEngineStream(QueryModifier(Task.removeprefix("realtime")))
+    elif Task.startswith("general"):
+        SetAssistantStatus("Thinking...")
+        Tokens = ChatBotStream(QueryModifier(Task.removeprefix("general")))
     else:
-        for Queries in Decision:
-
-            if "general" in Queries:
-                SetAssistantStatus("Thinking...")
-                QueryFinal = Queries.replace("general","")
-                Answer = ChatBot(QueryModifier(QueryFinal))
-                ShowTextToScreen(f"{Assistantname}: {Answer}")
-                SetAssistantStatus("Answering...")
-                TextToSpeech(Answer)
-                return True
-
-            elif "realtime" in Queries:
-                SetAssistantStatus("Searching...")
-                Answer = RealtimeSearchEngine(QueryModifier(QueryFinal))
-                ShowTextToScreen(f"{Assistantname}: {Answer}")
-                SetAssistantStatus("Answering...")
-                TextToSpeech(Answer)
-                return True
-        
-            elif "exit" in Queries:
-                QueryFinal = "Okay, Bye!"
-                Answer = ChatBot(QueryModifier(QueryFinal))
-                ShowTextToScreen(f"{Assistantname}: {Answer}")
-                SetAssistantStatus("Answering...")
-                TextToSpeech(Answer)
-                SetAssistantStatus("Turning Off...")
-                os._exit(1)
+        Tokens = ChatBotStream(QueryModifier("Okay, Bye!"))
+
+    #Show and speak the answer while it is still being generated; it stays one message on screen
+    Answering = []
+    def ShowAnswer(Answer):
+        if not Answering:
+            SetAssistantStatus("Answering...")
+            Answering.append(ShowTextToScreen(f"{Assistantname}: {Answer}"))
+        else:
+            ShowTextToScreen(f"{Assistantname}: {Answer}", Answering[0])
+
+    SpeakStream(Tokens, on_text=ShowAnswer)
+
+    if Task.startswith("exit"):
+        SetAssistantStatus("Turning Off...")
+        os._exit(1)
+
+def MainExecution():
+    SetAssistantStatus("Listening...")
+    #Partial transcripts are classified while the user is speaking; a settled one the fast path cannot decide goes to the model early
+    Speculation = Speculator(SpeculativeDecisionStream)
+    Query = SpeechRecognition(on_partial=Speculation.feed)
+    ShowTextToScreen(f"{Username}:{Query}")
+    SetAssistantStatus("Thinking...")
+
+    #Start each task as soon as the decision model emits it, instead of after the whole decision
+    Dispatcher = TaskDispatcher(StartAutomation, StartImageGeneration, AnswerTask)
+    for Task in FirstLayerDMMStream(Query, Speculation):
+        print(f"Decision: {Task}")
+        Dispatcher.dispatch(Task)
+
+    if Dispatcher.time_to_first_action is not None:
+        print(f"Time to first action: {Dispatcher.time_to_first_action * 1000:.0f} ms")
+
+    Dispatcher.wait()
+    if not Dispatcher.has_conversation:
+        SetAssistantStatus("Available...")
+    return True
+
+#Turning the mic off cuts the assistant off mid-sentence
+def OnMicrophoneStatus(Status):
+    if Status == "False":
+        StopSpeaking()
 
 def FirstThread():
+    Bus.subscribe(MicrophoneTopic, OnMicrophoneStatus)
 
     while True:
         CurrentStatus = GetMicrophoneStatus()
@@ -168,10 +138,10 @@ def FirstThread():
         else:
             AIStatus = GetAssistantStatus()
 
-            if "Available..." in AIStatus:
-                sleep(0.1)
-            else:
+            if "Available..." not in AIStatus:
                 SetAssistantStatus("Available...")
+            #Sleep until the mic is switched on instead of polling it
+            Bus.wait_for(MicrophoneTopic, lambda Status: Status == "True")
 
 def SecondThread():
     GraphicalUserInterface()
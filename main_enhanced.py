@@ -2,19 +2,24 @@ from Frontend.GUI import (
     GraphicalUserInterface,
     SetAssistantStatus,
     ShowTextToScreen,
-    TempDirectoryPath,
+    LoadChatHistory,
     SetMicrophoneStatus,
     AnswerModifier,
     QueryModifier,
     GetAssistantStatus,
     GetMicrophoneStatus
 )
-from Backend.model import FirstLayerDMM
+from Backend.model import FirstLayerDMMStream, SpeculativeDecisionStream
+from Backend.FastPath import Speculator
+from Backend.TaskDispatcher import TaskDispatcher
 from Backend.RealtimeSearchEngine import RealtimeSearchEngine
 from Backend.Automation import Automation
-from Backend.stt import SpeechRecognition
+from Backend.stt import SpeechRecognition, WarmUpSpeechRecognition
 from Backend.enhanced_chatbot import EnhancedChatBot, RealTimeInformation
-from Backend.tts import TextToSpeech
+from Backend.tts import TextToSpeech, PrewarmResponses, StopSpeaking
+from Backend.EventBus import Bus, MicrophoneTopic
+from Backend.StatusChannel import StartStatusChannel
+from Backend.ChatLogStore import GetChatLogStore
 from frontend.auth_ui import authenticate_user
 from frontend.chat_ui import start_chat_interface
 from frontend.main_menu import show_main_menu
@@ -23,7 +28,6 @@ from asyncio import run
 from time import sleep
 import subprocess
 import threading
-import json
 import os
 import uvicorn
 import multiprocessing
@@ -32,7 +36,6 @@ import sys
 env_vars = dotenv_values(".env")
 Assistantname = env_vars.get("Assistantname")
 subprocess_list = []
-Functions = ['open', 'close', 'play', 'content', 'google search', 'youtube search']
 
 # Global variables for user session
 current_user = None
@@ -85,168 +88,125 @@ def ShowDefaultChatIfNoChats():
         DefaultMessage = f'''User: Hello {Assistantname}, How are you?
 {Assistantname}: Welcome! How may I help you?'''
     
-    with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as file:
-        file.write("")
-    with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as file:
-        file.write(DefaultMessage)
+    ShowTextToScreen(DefaultMessage)
 
 def ChatLogIntegration():
-    """Integrate chat log with enhanced memory"""
+    """Hand the saved conversation to the GUI once; new messages are added as they happen"""
     if enhanced_chatbot:
         # Get chat sessions from API
-        sessions = enhanced_chatbot.get_chat_sessions()
+        sessions = enhanced_chatbot.get_chat_sessions(limit=1)
         
         if sessions:
             # Get the most recent session
             latest_session = sessions[0]
-            formatted_chatlog = ""
+            messages = []
             
-            for message in latest_session.get('messages', []):
+            for message in enhanced_chatbot.get_session_messages(latest_session['id']):
                 if message['role'] == 'user':
-                    formatted_chatlog += f"{current_user['user']['username']}: {message['content']}\n"
+                    messages.append(f"{current_user['user']['username']}: {AnswerModifier(message['content'])}")
                 elif message['role'] == 'assistant':
-                    formatted_chatlog += f"{Assistantname}: {message['content']}\n"
+                    messages.append(f"{Assistantname}: {AnswerModifier(message['content'])}")
             
-            with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as file:
-                file.write(AnswerModifier(formatted_chatlog))
+            LoadChatHistory(messages)
     else:
         # Fallback to local chat log
         try:
-            with open(r'Data\ChatLog.json', "r", encoding='utf-8') as file:
-                chatlog_data = json.load(file)
+            chatlog_data = GetChatLogStore().read_all()
             
-            formatted_chatlog = ""
+            messages = []
             for entry in chatlog_data:
                 if entry["role"] == "user":
                     username = current_user['user']['username'] if current_user else "User"
-                    formatted_chatlog += f"{username}: {entry['content']}\n"
+                    messages.append(f"{username}: {AnswerModifier(entry['content'])}")
                 elif entry["role"] == "assistant":
-                    formatted_chatlog += f"{Assistantname}: {entry['content']}\n"
+                    messages.append(f"{Assistantname}: {AnswerModifier(entry['content'])}")
             
-            with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as file:
-                file.write(AnswerModifier(formatted_chatlog))
+            LoadChatHistory(messages)
         except:
             pass
 
-def ShowChatsOnGUI():
-    """Show chats on GUI"""
-    try:
-        with open(TempDirectoryPath('Database.data'), 'r', encoding='utf-8') as file:
-            data = file.read()
-        
-        if len(str(data)) > 0:
-            lines = data.split('\n')
-            result = '\n'.join(lines)
-            
-            with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as file:
-                file.write(result)
-    except:
-        pass
-
 def InitialExecution():
     """Initial setup"""
     SetMicrophoneStatus("False")
-    ShowTextToScreen("")
-    ShowDefaultChatIfNoChats()
     ChatLogIntegration()
+    ShowDefaultChatIfNoChats()
+    PrewarmResponses()
+    WarmUpSpeechRecognition()
+    StartStatusChannel()
 
-def MainExecution():
-    """Main execution loop with enhanced features"""
-    global current_session_id
+def StartAutomation(Task):
+    """Run one automation task"""
+    run(Automation([Task]))
+
+def StartImageGeneration(Task):
+    """Hand an image generation task to the image generation process"""
+    with open(r'Frontend\Files\ImageGenertion.data', 'w') as file:
+        file.write(f"{Task},True")
     
-    TaskExecution = False
-    ImageExecution = False
-    ImageGenerationQuery = ""
+    try:
+        p1 = subprocess.Popen(['python', r"Backend\ImageGeneration.py"],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              stdin=subprocess.PIPE, shell=False)
+        subprocess_list.append(p1)
+    except Exception as e:
+        print(f"Error starting ImageGeneration.py: {e}")
 
+def AnswerTask(Task):
+    """Answer a general/realtime task (or say goodbye) with memory when available"""
+    if Task.startswith("realtime"):
+        SetAssistantStatus("Searching...")
+        Answer = RealtimeSearchEngine(QueryModifier(Task.removeprefix("realtime")))
+    else:
+        Query = QueryModifier(Task.removeprefix("general")) if Task.startswith("general") else "Okay, Bye!"
+        SetAssistantStatus("Thinking...")
+        if enhanced_chatbot:
+            Answer = enhanced_chatbot.chat_with_memory(Query, current_session_id)
+        else:
+            from Backend.Chatbot import ChatBot
+            Answer = ChatBot(Query)
+    
+    ShowTextToScreen(f"{Assistantname}: {Answer}")
+    SetAssistantStatus("Answering...")
+    TextToSpeech(Answer)
+    
+    if Task.startswith("exit"):
+        SetAssistantStatus("Turning Off...")
+        os._exit(1)
+
+def MainExecution():
+    """Main execution loop with enhanced features"""
     SetAssistantStatus("Listening...")
-    Query = SpeechRecognition()
+    # Partial transcripts are classified while the user is speaking; a settled one the fast path
+    # cannot decide is sent to the decision model before the user has finished
+    speculation = Speculator(SpeculativeDecisionStream)
+    Query = SpeechRecognition(on_partial=speculation.feed)
     
     username = current_user['user']['username'] if current_user else "User"
     ShowTextToScreen(f"{username}: {Query}")
     SetAssistantStatus("Thinking...")
     
-    Decision = FirstLayerDMM(Query)
-    print(f"Decision: {Decision}")
-
-    G = any([i for i in Decision if i.startswith("general")])
-    R = any([i for i in Decision if i.startswith("realtime")])
-
-    Merged_query = " and ".join(
-        [" ".join(i.split()[1:]) for i in Decision if i.startswith("general") or i.startswith("realtime")]
-    )
-
-    # Handle image generation
-    for queries in Decision:
-        if "generate" in queries:
-            ImageGenerationQuery = str(queries)
-            ImageExecution = True
-
-    # Handle automation tasks
-    for queries in Decision:
-        if TaskExecution == False:
-            if any(queries.startswith(func) for func in Functions):
-                run(Automation(list(Decision)))
-                TaskExecution = True
-                SetAssistantStatus("Available...")
-
-    # Handle image generation
-    if ImageExecution == True:
-        with open(r'Frontend\Files\ImageGenertion.data', 'w') as file:
-            file.write(f"{ImageGenerationQuery},True")
-        
-        try:
-            p1 = subprocess.Popen(['python', r"Backend\ImageGeneration.py"],
-                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                  stdin=subprocess.PIPE, shell=False)
-            subprocess_list.append(p1)
-        except Exception as e:
-            print(f"Error starting ImageGeneration.py: {e}")
-
-    # Handle chat responses with memory
-    if G or R:
-        if enhanced_chatbot:
-            if R:
-                SetAssistantStatus("Searching...")
-                Answer = RealtimeSearchEngine(QueryModifier(Merged_query))
-            else:
-                SetAssistantStatus("Thinking...")
-                Answer = enhanced_chatbot.chat_with_memory(QueryModifier(Merged_query), current_session_id)
-        else:
-            # Fallback to original methods
-            if R:
-                SetAssistantStatus("Searching...")
-                Answer = RealtimeSearchEngine(QueryModifier(Merged_query))
-            else:
-                from Backend.Chatbot import ChatBot
-                SetAssistantStatus("Thinking...")
-                Answer = ChatBot(QueryModifier(Merged_query))
-        
-        ShowTextToScreen(f"{Assistantname}: {Answer}")
-        SetAssistantStatus("Answering...")
-        TextToSpeech(Answer)
-        
-        # Update chat log integration
-        ChatLogIntegration()
-        return True
+    # Start each task as soon as the decision model emits it
+    dispatcher = TaskDispatcher(StartAutomation, StartImageGeneration, AnswerTask)
+    for Task in FirstLayerDMMStream(Query, speculation):
+        print(f"Decision: {Task}")
+        dispatcher.dispatch(Task)
+    
+    if dispatcher.time_to_first_action is not None:
+        print(f"Time to first action: {dispatcher.time_to_first_action * 1000:.0f} ms")
+    
+    dispatcher.wait()
+    if not dispatcher.has_conversation:
+        SetAssistantStatus("Available...")
+    return True
 
-    # Handle exit
-    for Queries in Decision:
-        if "exit" in Queries:
-            QueryFinal = "Okay, Bye!"
-            if enhanced_chatbot:
-                Answer = enhanced_chatbot.chat_with_memory(QueryFinal, current_session_id)
-            else:
-                from Backend.Chatbot import ChatBot
-                Answer = ChatBot(QueryModifier(QueryFinal))
-            
-            ShowTextToScreen(f"{Assistantname}: {Answer}")
-            SetAssistantStatus("Answering...")
-            TextToSpeech(Answer)
-            SetAssistantStatus("Turning Off...")
-            os._exit(1)
+def OnMicrophoneStatus(Status):
+    """Turning the mic off cuts the assistant off mid-sentence"""
+    if Status == "False":
+        StopSpeaking()
 
 def FirstThread():
     """Main execution thread"""
+    Bus.subscribe(MicrophoneTopic, OnMicrophoneStatus)
     while True:
         CurrentStatus = GetMicrophoneStatus()
 
@@ -254,10 +214,10 @@ def FirstThread():
             MainExecution()
         else:
             AIStatus = GetAssistantStatus()
-            if "Available..." in AIStatus:
-                sleep(0.1)
-            else:
+            if "Available..." not in AIStatus:
                 SetAssistantStatus("Available...")
+            # Sleep until the mic is switched on instead of polling it
+            Bus.wait_for(MicrophoneTopic, lambda Status: Status == "True")
 
 def SecondThread():
     """GUI thread"""
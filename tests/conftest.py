@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend and API packages are imported from the project root, as the entry points do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from Backend.AudioPlayback import ClockBackend, PlaybackEngine
+from Backend.SpeechPipeline import SilenceSynthesizer, SpeechPipeline
+
+Voice = SilenceSynthesizer(seconds_per_word=0.05)
+
+
+def test_clips_play_in_order_until_their_end_event():
+    backend = ClockBackend()
+    engine = PlaybackEngine(backend)
+    clips = [engine.submit(Voice.synthesize(text)) for text in ("one", "two words", "and three more")]
+    started = time.perf_counter()
+    assert clips[-1].done.wait(2)
+    assert time.perf_counter() - started >= 0.3
+    assert backend.played == [clip.audio for clip in clips]
+    assert engine.clips_played == 3
+    engine.close()
+
+
+def test_interrupt_cuts_off_the_playing_and_queued_clips():
+    engine = PlaybackEngine(ClockBackend())
+    long_clip = engine.submit(Voice.synthesize("word " * 100))
+    queued = engine.submit(Voice.synthesize("never heard"))
+    time.sleep(0.05)
+    started = time.perf_counter()
+    engine.interrupt()
+    assert long_clip.done.wait(1) and queued.done.wait(1)
+    assert time.perf_counter() - started < 0.5
+    assert long_clip.interrupted and queued.interrupted
+    assert engine.interruptions == 1
+    engine.close()
+
+
+def test_stopping_a_pipeline_wakes_the_engine():
+    engine = PlaybackEngine(ClockBackend())
+    speech = SpeechPipeline(Voice, engine)
+    speech.speak("word " * 100 + ".")
+    time.sleep(0.1)
+    started = time.perf_counter()
+    speech.stop()
+    assert speech.wait(1)
+    assert time.perf_counter() - started < 0.5
+    engine.close()
+
+
+def test_cancel_leaves_other_callers_playing():
+    engine = PlaybackEngine(ClockBackend())
+    mine, theirs = threading.Event(), threading.Event()
+    clip = engine.submit(Voice.synthesize("short clip"), theirs)
+    engine.cancel(mine)
+    assert clip.done.wait(1)
+    assert not clip.interrupted and engine.clips_played == 1
+    engine.close()
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+
+from Backend.ChatLogStore import ChatLogStore, SegmentSizesName
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def store(directory, **options):
+    return ChatLogStore(directory=str(directory), legacy_path=None, **options)
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("segment-"))
+
+
+def test_segments_roll_over_and_ids_stay_in_order(tmp_path):
+    log = store(tmp_path, segment_size=10, compact_every=1000)
+    log.extend([{"role": "user", "content": f"m{i}"} for i in range(25)])
+    assert len(segment_files(tmp_path)) == 3
+    assert [r["id"] for r in log.iter_entries()] == list(range(25))
+    assert len(log) == 25
+
+
+def test_tail_is_rebuilt_from_the_newest_segments(tmp_path):
+    log = store(tmp_path, segment_size=10, tail_size=15, compact_every=1000)
+    for i in range(40):
+        log.append("user" if i % 2 else "assistant", f"m{i}")
+    reopened = store(tmp_path, segment_size=10, tail_size=15)
+    assert [m["content"] for m in reopened.tail()] == [f"m{i}" for i in range(25, 40)]
+    assert reopened.entries_since(37) == [{"id": 38, "role": "assistant", "content": "m38"},
+                                          {"id": 39, "role": "user", "content": "m39"}]
+    assert reopened.last_id() == 39
+
+
+def test_compaction_merges_small_segments_up_to_the_cap(tmp_path):
+    log = store(tmp_path, segment_size=10, compact_every=10, max_segments=2, compacted_size=30)
+    for i in range(100):
+        log.append("user", f"m{i}")
+    # Closed segments hold at most 30 records and the history is unchanged
+    closed = segment_files(tmp_path)[:-1]
+    counts = [sum(1 for _ in open(tmp_path / name)) for name in closed]
+    assert counts and all(count <= 30 for count in counts)
+    assert [r["content"] for r in log.iter_entries()] == [f"m{i}" for i in range(100)]
+
+    sizes = json.loads((tmp_path / SegmentSizesName).read_text())
+    assert {name: size[1] for name, size in sizes.items()} == dict(zip(closed, counts))
+
+
+def test_compaction_does_not_read_full_segments(tmp_path, monkeypatch):
+    log = store(tmp_path, segment_size=10, compact_every=1000, max_segments=2, compacted_size=10)
+    for i in range(60):
+        log.append("user", f"m{i}")
+    log.compact()
+
+    reads = []
+    original = ChatLogStore._read_segment
+    monkeypatch.setattr(ChatLogStore, "_read_segment", lambda self, name: reads.append(name) or original(self, name))
+    log.compact()
+    assert reads == []
+
+
+def test_torn_last_line_is_skipped_and_repaired(tmp_path):
+    log = store(tmp_path)
+    log.append("user", "first")
+    with open(tmp_path / segment_files(tmp_path)[-1], "a", encoding="utf-8") as f:
+        f.write('{"id": 1, "role": "user", "con')
+    reopened = store(tmp_path)
+    assert reopened.append("assistant", "second")["id"] == 1
+    assert [r["content"] for r in reopened.iter_entries()] == ["first", "second"]
+
+
+def test_legacy_chat_log_is_imported_once(tmp_path):
+    legacy = tmp_path / "ChatLog.json"
+    legacy.write_text(json.dumps([{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]))
+    log = ChatLogStore(directory=str(tmp_path / "ChatLog"), legacy_path=str(legacy))
+    assert log.read_all() == [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    again = ChatLogStore(directory=str(tmp_path / "ChatLog"), legacy_path=str(legacy))
+    assert len(again) == 2
+
+
+def test_processes_sharing_a_log_never_reuse_ids(tmp_path):
+    script = (
+        "import sys\n"
+        "from Backend.ChatLogStore import ChatLogStore\n"
+        "log = ChatLogStore(directory=sys.argv[1], legacy_path=None, segment_size=16, compact_every=8,"
+        " max_segments=2, compacted_size=64)\n"
+        "for i in range(150):\n"
+        "    log.append('user', f'{sys.argv[2]}-{i}')\n"
+    )
+    writers = [subprocess.Popen([sys.executable, "-c", script, str(tmp_path), name], cwd=ROOT) for name in "ab"]
+    assert [writer.wait(timeout=120) for writer in writers] == [0, 0]
+
+    records = list(store(tmp_path).iter_entries())
+    assert [r["id"] for r in records] == list(range(300))
+    for name in "ab":
+        assert [r["content"] for r in records if r["content"].startswith(name)] == [f"{name}-{i}" for i in range(150)]
@@ -0,0 +1,48 @@
+from Backend.ContextWindow import ApproximateTokenizer, ContextWindow, DefaultTokenizer, MessageOverhead
+
+
+class WordTokenizer:
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+def turn(words, role="user"):
+    return {"role": role, "content": " ".join(["word"] * words)}
+
+
+def test_default_tokenizer_is_the_offline_estimate():
+    assert isinstance(DefaultTokenizer(), ApproximateTokenizer)
+    assert ApproximateTokenizer().count("Hi, you") == 3
+    assert ApproximateTokenizer().count("internationalization") == 5
+
+
+def test_build_keeps_the_newest_turns_that_fit():
+    window = ContextWindow(budget=100, tokenizer=WordTokenizer())
+    system = [turn(10, "system")]
+    history = [turn(30), turn(30), turn(30), turn(30)]
+    built = window.build(system, history)
+    # 100 - (10 + 4) leaves room for two 34-token turns
+    assert built == system + history[2:]
+    assert window.total(built) == 3 * MessageOverhead + 70
+
+
+def test_the_newest_turn_is_kept_even_when_it_alone_is_too_long():
+    window = ContextWindow(budget=10, tokenizer=WordTokenizer())
+    history = [turn(5), turn(50)]
+    assert window.build([], history) == [history[-1]]
+
+
+def test_counts_are_cached_per_message():
+    tokenizer = WordTokenizer()
+    window = ContextWindow(budget=1000, tokenizer=tokenizer, cache_size=2)
+    history = [turn(1), turn(2)]
+    window.build([], history)
+    window.build([], history)
+    assert tokenizer.calls == 2
+    window.count(turn(3))
+    window.count(turn(2))  # Evicted: fit() reads the history newest first, so this was used least recently
+    assert tokenizer.calls == 4
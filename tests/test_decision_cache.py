@@ -0,0 +1,59 @@
+import json
+
+from Backend import DecisionCache as decision_cache
+from Backend.DecisionCache import DecisionCache, MaxCachedQueryLength
+
+
+def test_queries_that_differ_in_case_and_punctuation_share_an_entry():
+    cache = DecisionCache(max_size=4, ttl=60)
+    cache.put("open chrome", ["open chrome"])
+    assert cache.get("Open Chrome.") == ["open chrome"]
+    assert cache.get("open brave") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(decision_cache.time, "time", lambda: now[0])
+    cache = DecisionCache(max_size=4, ttl=10)
+    cache.put("who is he", ["general who is he"])
+    now[0] += 9
+    assert cache.get("who is he") == ["general who is he"]
+    now[0] += 2
+    assert cache.get("who is he") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_the_least_recently_used_entry_is_evicted():
+    cache = DecisionCache(max_size=2, ttl=60)
+    cache.put("one", ["general one"])
+    cache.put("two", ["general two"])
+    cache.get("one")
+    cache.put("three", ["general three"])
+    assert cache.get("two") is None
+    assert cache.get("one") == ["general one"]
+    assert cache.evictions == 1
+
+
+def test_empty_decisions_and_long_queries_are_not_cached():
+    cache = DecisionCache(max_size=4, ttl=60)
+    cache.put("nothing", [])
+    cache.put("x" * (MaxCachedQueryLength + 1), ["general x"])
+    assert cache.stats()["size"] == 0
+
+
+def test_live_entries_survive_a_restart(tmp_path, monkeypatch):
+    path = str(tmp_path / "DecisionCache.json")
+    now = [1000.0]
+    monkeypatch.setattr(decision_cache.time, "time", lambda: now[0])
+    cache = DecisionCache(max_size=4, ttl=10, path=path)
+    cache.put("open chrome", ["open chrome"])
+    now[0] += 5
+    cache.put("mute", ["system mute"])
+    cache.save()
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+    now[0] += 7
+    reloaded = DecisionCache(max_size=4, ttl=10, path=path)
+    assert reloaded.get("open chrome") is None
+    assert reloaded.get("mute") == ["system mute"]
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from Backend.FastPath import LocalDecision, Speculator
+
+
+@pytest.mark.parametrize("query, decision", [
+    ("open chrome", ["open chrome"]),
+    ("Open chrome and brave, please.", ["open chrome", "open brave"]),
+    ("open visual studio code", ["open visual studio code"]),
+    ("open youtube website", ["open youtube"]),
+    ("exit chrome", ["close chrome"]),
+    ("close notepad", ["close notepad"]),
+    ("play despacito", ["play despacito"]),
+    ("play rock and roll", ["play rock and roll"]),
+    ("launch spotify, then play lofi beats", ["open spotify", "play lofi beats"]),
+    ("google search python decorators", ["google search python decorators"]),
+    ("search cats on google", ["google search cats"]),
+    ("youtube search lofi", ["youtube search lofi"]),
+    ("volume up 20%", ["system volume up 20%"]),
+    ("lower the brightness", ["system brightness down"]),
+    ("generate image of a cat", ["generate image of a cat"]),
+    ("set a reminder at 5pm for my meeting", ["reminder 5pm my meeting"]),
+    ("bye", ["exit"]),
+])
+def test_commands_are_resolved_locally(query, decision):
+    assert LocalDecision(query, Record=False) == decision
+
+
+@pytest.mark.parametrize("query", [
+    "open source software is great, right?",
+    "quit smoking tips",
+    "kill bill",
+    "google is a company",
+    "play a game with me",
+    "close enough",
+    "play it again",
+    "open it",
+    "remind me to call mom",
+    "what is the capital of france",
+    "open chrome and tell me a joke",
+])
+def test_conversation_falls_back_to_the_model(query):
+    assert LocalDecision(query, Record=False) is None
+
+
+def test_speculator_reuses_the_last_partial():
+    speculator = Speculator()
+    speculator.feed("open")
+    speculator.feed("open chrome")
+    assert speculator.resolve("open chrome") == ["open chrome"]
+    assert (speculator.hits, speculator.misses) == (1, 0)
+    assert speculator.resolve("open brave") == ["open brave"]
+    assert speculator.misses == 1
+
+
+class FakeRemote:
+    """Stands in for the decision model: records prompts and streams a task per word"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+        self.cancelled = []
+
+    def __call__(self, query, cancelled):
+        self.prompts.append(query)
+        self.cancelled.append(cancelled)
+        for word in query.split():
+            time.sleep(self.delay)
+            if cancelled.is_set():
+                return
+            yield f"general {word}"
+
+
+def test_a_settled_partial_starts_the_remote_decision_early():
+    remote = FakeRemote()
+    speculator = Speculator(remote, Settle=0.01)
+    speculator.feed("tell me about")
+    speculator.feed("tell me about nikola tesla")
+    time.sleep(0.2)
+    assert remote.prompts == ["tell me about nikola tesla"]
+    assert speculator.resolve("Tell me about Nikola Tesla.") is None
+    assert list(speculator.take("Tell me about Nikola Tesla.")) == [
+        "general tell", "general me", "general about", "general nikola", "general tesla"]
+    assert (speculator.remote_started, speculator.remote_used) == (1, 1)
+
+
+def test_a_remote_decision_on_words_that_changed_is_cancelled():
+    remote = FakeRemote(delay=0.1)
+    speculator = Speculator(remote, Settle=0.05)
+    speculator.feed("what is the weather")
+    time.sleep(0.15)
+    speculator.feed("what is the weather in paris")
+    assert remote.cancelled[0].is_set()
+    speculator.resolve("what is the weather in paris today")
+    assert speculator.take("what is the weather in paris today") is None
+    assert speculator.remote_cancelled == 1
+
+
+def test_commands_and_unsettled_partials_are_not_sent_to_the_model():
+    remote = FakeRemote()
+    speculator = Speculator(remote, Settle=0.2)
+    speculator.feed("open chrome")
+    speculator.feed("who is the prime")
+    speculator.feed("who is the prime minister")
+    assert speculator.resolve("who is the prime minister") is None
+    assert speculator.take("who is the prime minister") is None
+    time.sleep(0.3)
+    assert remote.prompts == []
@@ -0,0 +1,75 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from api.pagination import decode_cursor, encode_cursor, session_list_query, session_messages_query
+from database.models import Base, ChatMessage, ChatSession
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pagination.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def pages(db, query_for, key, limit):
+    """Every page of a listing, following next cursors the way the endpoints build them"""
+    cursor, result = None, []
+    while True:
+        rows = db.execute(query_for(cursor).limit(limit + 1)).all()
+        page = rows[:limit]
+        result.append([row.id for row in page])
+        if len(rows) <= limit:
+            return result
+        cursor = encode_cursor(key(page[-1]), page[-1].id)
+
+
+def test_cursor_round_trip():
+    moment = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"2024-01-01T00:00:00").decode(),
+    base64.urlsafe_b64encode(b"yesterday|3").decode(),
+    base64.urlsafe_b64encode(b"2024-01-01T00:00:00|three").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+])
+def test_bad_cursors_are_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_messages_with_equal_timestamps_are_paged_without_gaps_or_repeats(db):
+    # Three messages per second, so page boundaries fall between equal timestamps
+    db.add_all(ChatMessage(session_id=1, role="user", content=str(n), timestamp=START + timedelta(seconds=n // 3))
+               for n in range(20))
+    db.add(ChatMessage(session_id=2, role="user", content="other session", timestamp=START))
+    db.commit()
+    result = pages(db, lambda cursor: session_messages_query(1, cursor).with_only_columns(
+        ChatMessage.id, ChatMessage.timestamp), lambda row: row.timestamp, limit=4)
+    assert [len(page) for page in result] == [4, 4, 4, 4, 4]
+    assert sum(result, []) == list(range(20, 0, -1))
+
+
+def test_sessions_are_listed_most_recently_updated_first(db):
+    for n in range(7):
+        db.add(ChatSession(user_id=1, title=f"s{n}", updated_at=START + timedelta(minutes=n % 3)))
+    db.add(ChatSession(user_id=2, title="someone else's", updated_at=START))
+    db.add(ChatMessage(session_id=3, role="user", content="hi", timestamp=START))
+    db.commit()
+    result = pages(db, lambda cursor: session_list_query(1, cursor), lambda row: row.updated_at, limit=3)
+    assert sum(result, []) == [6, 3, 5, 2, 7, 4, 1]
+    counts = {row.id: row.message_count for row in db.execute(session_list_query(1)).all()}
+    assert counts[3] == 1 and counts[1] == 0
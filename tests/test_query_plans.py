@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import create_engine
+
+from database.query_plans import explain, hot_queries, plan_problems, seed
+
+QUERIES = hot_queries()
+
+
+@pytest.fixture(scope="module")
+def connection(tmp_path_factory):
+    path = tmp_path_factory.mktemp("query_plans") / "query_plans.db"
+    seed(str(path), 20_000)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+@pytest.mark.parametrize("statement, indexes, ordered", [query[1:] for query in QUERIES],
+                         ids=[query[0] for query in QUERIES])
+def test_hot_query_uses_its_index(connection, statement, indexes, ordered):
+    _, plan = explain(connection, statement)
+    assert plan_problems(plan, indexes, ordered) == [], plan
+
+
+def test_plan_problems_reports_scans_and_sorts():
+    plan = ["SCAN chat_messages", "USE TEMP B-TREE FOR ORDER BY"]
+    assert plan_problems(plan, ["ix_chat_messages_session_id_id"], ordered=True) == [
+        "missing index ix_chat_messages_session_id_id",
+        "full scan: SCAN chat_messages",
+        "sorts: USE TEMP B-TREE FOR ORDER BY",
+    ]
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from Backend.Reminders import ParseReminderTask
+
+NOW = datetime(2026, 10, 18, 18, 0)
+
+
+@pytest.mark.parametrize("task, when, message", [
+    ("reminder 5pm tomorrow my meeting", datetime(2026, 10, 19, 17, 0), "my meeting"),
+    ("reminder 7pm dinner", datetime(2026, 10, 18, 19, 0), "dinner"),
+    ("reminder 17:30 call mom", datetime(2026, 10, 19, 17, 30), "call mom"),
+    ("reminder 9:00 pm october 20 dentist", datetime(2026, 10, 20, 21, 0), "dentist"),
+    ("reminder 9:00pm 25th june business meeting", datetime(2027, 6, 25, 21, 0), "business meeting"),
+])
+def test_reminder_tasks_are_parsed(task, when, message):
+    assert ParseReminderTask(task, NOW) == (when, message)
+
+
+@pytest.mark.parametrize("task", ["reminder tomorrow meeting", "reminder 13pm lunch", "reminder 5pm 31st february party"])
+def test_reminders_without_a_valid_time_are_rejected(task):
+    assert ParseReminderTask(task, NOW) is None
@@ -0,0 +1,37 @@
+import threading
+
+from Backend.TaskDispatcher import TaskDispatcher
+
+
+def run(tasks):
+    calls = {"automation": [], "image": [], "conversation": []}
+    lock = threading.Lock()
+
+    def handler(kind):
+        def handle(task):
+            with lock:
+                calls[kind].append(task)
+        return handle
+
+    dispatcher = TaskDispatcher(handler("automation"), handler("image"), handler("conversation"))
+    for task in tasks:
+        dispatcher.dispatch(task)
+    dispatcher.wait()
+    return calls
+
+
+def test_tasks_go_to_their_handlers():
+    calls = run(["open chrome", "generate image of a cat", "reminder 5pm meeting", "general hi", "exit"])
+    assert sorted(calls["automation"]) == ["open chrome", "reminder 5pm meeting"]
+    assert calls["image"] == ["generate image of a cat"]
+    assert calls["conversation"] == ["general hi", "exit"]
+
+
+def test_realtime_questions_are_merged_into_one_search():
+    calls = run(["realtime who won the match", "general tell me a joke", "realtime weather in paris", "exit"])
+    assert calls["conversation"] == ["realtime who won the match and tell me a joke and weather in paris", "exit"]
+
+
+def test_general_tasks_before_a_realtime_one_are_answered_on_their_own():
+    calls = run(["general hi", "realtime news today"])
+    assert calls["conversation"] == ["general hi", "realtime news today"]
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from api.write_behind import WriteBehindQueue
+from database.models import Base, ChatMessage, Memory
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A session factory on a fresh SQLite file; the tables are created once per test"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'write_behind.db'}")
+
+    async def create():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def message(n, session_id=1):
+    return {"session_id": session_id, "role": "user", "content": f"m{n}",
+            "timestamp": START + timedelta(seconds=n)}
+
+
+async def rows(session_factory, model):
+    async with session_factory() as db:
+        return (await db.execute(select(model).order_by(model.id))).scalars().all()
+
+
+def test_concurrent_rows_are_committed_in_submission_order_and_share_batches(database, tmp_path):
+    queue = WriteBehindQueue(database, max_batch=16, max_delay=0.01, journal_path=str(tmp_path / "wb.journal"))
+
+    async def scenario():
+        await queue.start()
+        stored = await asyncio.gather(*(queue.write("chat_message", message(n)) for n in range(50)))
+        await queue.close()
+        return stored
+
+    stored = asyncio.run(scenario())
+    saved = asyncio.run(rows(database, ChatMessage))
+    assert [m.content for m in saved] == [f"m{n}" for n in range(50)]
+    assert [m.id for m in stored] == [m.id for m in saved]
+    assert queue.batches < queue.items == 50
+    assert queue.stats()["max_batch_size"] <= 16
+    assert os.listdir(tmp_path) == ["write_behind.db"]  # The journal is removed after a clean close
+
+
+def test_memories_in_one_batch_are_upserted_by_identity(database):
+    queue = WriteBehindQueue(database, journal_path=None)
+    identity = {"user_id": 1, "memory_type": "preference", "key": "color"}
+
+    async def scenario():
+        await queue.start()
+        first = await queue.submit("memory", dict(identity, value="blue"))
+        second = await queue.submit("memory", dict(identity, value="green", importance=5))
+        await asyncio.gather(first, second)
+        await queue.close()
+
+    asyncio.run(scenario())
+    saved = asyncio.run(rows(database, Memory))
+    assert [(m.value, m.importance) for m in saved] == [("green", 5)]
+
+
+def test_a_bad_row_fails_alone(database):
+    queue = WriteBehindQueue(database, journal_path=None)
+
+    async def scenario():
+        await queue.start()
+        futures = [await queue.submit("chat_message", message(n)) for n in range(3)]
+        futures.insert(1, await queue.submit("chat_message", dict(message(9), content=None)))
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        await queue.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert isinstance(results[1], Exception)
+    assert [m.content for m in asyncio.run(rows(database, ChatMessage))] == ["m0", "m1", "m2"]
+    assert queue.failed == 1
+
+
+def test_rows_after_the_last_done_marker_are_replayed_once(database, tmp_path):
+    journal = tmp_path / "wb.12345.journal"
+    entries = [{"seq": n, "kind": "chat_message",
+                "values": dict(message(n), timestamp=message(n)["timestamp"].isoformat())} for n in (1, 2, 3)]
+    lines = [json.dumps(entries[0]), json.dumps({"done": 1}), json.dumps(entries[1]), json.dumps(entries[2])]
+    journal.write_text("\n".join(lines) + '\n{"seq": 4, "kind": "chat_')  # The crash cut the last line short
+
+    async def committed_before_the_crash():
+        async with database() as db:
+            db.add(ChatMessage(**message(2)))
+            await db.commit()
+
+    asyncio.run(committed_before_the_crash())
+    queue = WriteBehindQueue(database, journal_path=str(tmp_path / "wb.journal"))
+
+    async def scenario():
+        await queue.start()
+        await queue.close()
+
+    asyncio.run(scenario())
+    assert [m.content for m in asyncio.run(rows(database, ChatMessage))] == ["m2", "m3"]
+    assert queue.replayed == 2
+    assert not journal.exists()